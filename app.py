@@ -1,13 +1,184 @@
 import streamlit as st
+import json
 import os
-import re
-from pathlib import Path
 import shutil
-import PyPDF2
+import time
+import uuid
+from collections import deque
+from dataclasses import replace
+from io import BytesIO
+from pathlib import Path
+
+from automacao.analise import analisar_pdf, extrair_texto_pagina
+from automacao.busca import IndiceBusca, versao_do_indice
+from automacao.cache import CachePaginas, hash_fluxo
+from automacao.classificador import obter_classificador
+from automacao.clientes import IndicePastasClientes
+from automacao.duplicados import IndiceConteudo, separar_repetidos
+from automacao.exportacao import (
+    LIMITE_PARTE_MB,
+    arquivos_das_pastas,
+    dividir_em_partes,
+    exportar_zip,
+)
+from automacao.extratores import (
+    EXTRATOR_PADRAO,
+    extratores_disponiveis,
+    obter_extrator,
+)
+from automacao.fila import CANCELADO, CONCLUIDO, FALHOU, PENDENTE, FilaTrabalhos
+from automacao.manifesto import ManifestoProcessamento
+from automacao.metricas import (
+    exportar_csv,
+    linha_desempenho,
+    resumir_etapas,
+    resumir_execucao,
+)
+from automacao.memoria import ARQUIVO_GRANDE_MB, LIMITE_MEMORIA_PADRAO_MB
+from automacao.pipeline import CONCORRENCIA_PADRAO, ConcorrenciaEtapas
+from automacao.segmentacao import ORIGEM_PERFIL_FIXO, descrever_paginas
+from automacao.trabalhador import iniciar_trabalhador
+from automacao.processamento import (
+    DOCUMENTO_UNICO,
+    TIPOS_PRINCIPAIS,
+    OpcoesProcessamento,
+    descrever_plano,
+    extrair_documentos_principais,
+    extrair_nome_cliente,
+    extrair_paginas,
+    listar_pdfs,
+    processar_lote,
+    resolver_destinos,
+)
+
+# Níveis de detalhe do log da execução
+NIVEL_RESUMO = 0
+NIVEL_ARQUIVO = 1
+NIVEL_DEBUG = 2
+NIVEIS_LOG = {
+    "Resumo": NIVEL_RESUMO,
+    "Por arquivo": NIVEL_ARQUIVO,
+    "Debug (por página)": NIVEL_DEBUG,
+}
+
+# Tamanho dos blocos na gravação dos arquivos enviados
+TAMANHO_BLOCO_UPLOAD = 1048576
+
+# Segundos entre as atualizações da tela enquanto a execução está na fila
+INTERVALO_ATUALIZACAO_FILA = 2
+
+
+@st.cache_resource(show_spinner=False)
+def classificador_do_app():
+    """Classificador compilado uma vez para todas as sessões do servidor"""
+    return obter_classificador()
+
+
+@st.cache_resource(show_spinner=False)
+def extrator_do_app(nome=None):
+    """Extrator de texto (sem estado) compartilhado entre as sessões"""
+    return obter_extrator(nome)
+
+
+@st.cache_resource(show_spinner=False)
+def extratores_instalados():
+    """Extratores disponíveis, procurados uma vez (e não a cada rerun)"""
+    return tuple(extratores_disponiveis())
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def listar_pasta_pdfs(pasta_downloads, modificada_em):
+    """
+    [(caminho, tamanho em KB)] dos PDFs da pasta, compartilhado entre os reruns
+
+    modificada_em (mtime da pasta) faz parte da chave: arquivo novo, removido
+    ou renomeado muda o mtime e a pasta é lida de novo.
+    """
+    arquivos = []
+    for pdf_path in listar_pdfs(pasta_downloads):
+        try:
+            arquivos.append((pdf_path, os.path.getsize(pdf_path) / 1024))
+        except OSError:
+            pass  # removido durante a leitura: a pasta muda e é lida de novo
+    return arquivos
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def buscar_no_indice(pasta_clientes, consulta, tipo, versao):
+    """
+    Busca no índice, compartilhada entre os reruns enquanto o índice não
+    muda (versao = versao_do_indice())
+    """
+    with IndiceBusca() as indice:
+        return indice.buscar(pasta_clientes, consulta, tipo=tipo)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def situacao_indexada(pasta_clientes, exigidos, versao):
+    """Documentos encontrados/faltando por cliente, como buscar_no_indice"""
+    with IndiceBusca() as indice:
+        return indice.situacao_clientes(pasta_clientes, exigidos)
+
+
+class RegistroExecucao:
+    """
+    Log, barra de progresso e tabela de resultados em containers fixos
+
+    As mensagens são acumuladas e a tela é redesenhada no máximo uma vez a
+    cada `intervalo` segundos, em vez de um elemento novo por mensagem.
+    """
+
+    def __init__(self, nivel=NIVEL_ARQUIVO, intervalo=0.5, max_linhas=300):
+        self.nivel = nivel
+        self.intervalo = intervalo
+        self._linhas = deque(maxlen=max_linhas)
+        self._resultados = []
+        self._fracao = 0.0
+        self._texto_progresso = ""
+        self._ultima_atualizacao = 0.0
+        self.planejados = set()  # caminhos já listados no plano (simulação)
+
+        self._barra = st.progress(0.0)
+        self._log = st.empty()
+        self._tabela = st.empty()
+
+    def registrar(self, mensagem, nivel=NIVEL_ARQUIVO):
+        if nivel <= self.nivel:
+            self._linhas.append(mensagem)
+            self._atualizar()
+
+    def progresso(self, fracao, texto=""):
+        self._fracao = min(max(fracao, 0.0), 1.0)
+        self._texto_progresso = texto
+        self._atualizar()
+
+    def adicionar_resultado(self, linha):
+        self._resultados.append(linha)
+        self._atualizar()
+
+    def finalizar(self):
+        self._atualizar(forcar=True)
+
+    def _atualizar(self, forcar=False):
+        agora = time.monotonic()
+        if not forcar and agora - self._ultima_atualizacao < self.intervalo:
+            return
+        self._ultima_atualizacao = agora
+
+        self._barra.progress(self._fracao, text=self._texto_progresso)
+        if self._linhas:
+            self._log.code("\n".join(self._linhas), language=None)
+        if self._resultados:
+            self._tabela.dataframe(
+                self._resultados, use_container_width=True, hide_index=True
+            )
 
 
 class AutomatizadorRequerimentosWeb:
     def __init__(self):
+        self._page_cache = None
+        self._fila_ativa = False  # execução desta sessão ainda na fila
+        self._tamanhos = {}  # {PDF detectado: tamanho em KB}
         self.setup_page()
 
     def setup_page(self):
@@ -78,7 +249,8 @@ class AutomatizadorRequerimentosWeb:
                 pasta_processados = st.text_input(
                     "Caminho da pasta temporária:",
                     value=st.session_state.get("pasta_processados", ""),
-                    help="Pasta para arquivos temporários durante processamento",
+                    help="Os arquivos de cada cliente são montados aqui e só vão para "
+                    "a pasta do cliente quando estão completos (vazio = grava direto)",
                     key="pasta_processados_input_main",
                     placeholder="Ex: C:/Users/SeuNome/AppData/Temp/Processamento",
                 )
@@ -119,96 +291,79 @@ class AutomatizadorRequerimentosWeb:
 
         return pasta_downloads, pasta_clientes, pasta_processados
 
+    def get_page_cache(self):
+        """Cache persistente de texto/classificação das páginas (None se indisponível)"""
+        if self._page_cache is None:
+            try:
+                self._page_cache = CachePaginas()
+            except Exception as e:
+                st.warning(f"⚠️ Cache de páginas indisponível: {e}")
+                self._page_cache = False
+        return self._page_cache or None
+
     def extract_text_from_page(self, pdf_reader, page_num):
         """Extrai texto de uma página específica"""
-        try:
-            page = pdf_reader.pages[page_num]
-            return page.extract_text()
-        except:
-            return ""
+        return extrair_texto_pagina(pdf_reader, page_num)
 
     def identify_document_type(self, text):
         """Identifica o tipo de documento baseado no conteúdo textual"""
-        text = text.upper()
-
-        # Padrões para identificar cada tipo de documento
-        patterns = {
-            "RG_CPF": [
-                r"CARTEIRA DE IDENTIDADE",
-                r"REGISTRO GERAL",
-                r"SECRETARIA DE SEGURANÇA PÚBLICA",
-                r"INSTITUTO DE IDENTIFICAÇÃO",
-                r"CPF.*\d{3}\.\d{3}\.\d{3}-\d{2}",
-                r"IDENTIDADE",
-            ],
-            "CERTIDAO_NASCIMENTO": [
-                r"CERTIDÃO DE NASCIMENTO",
-                r"REGISTRO CIVIL DAS PESSOAS NATURAIS",
-                r"NASCI.*EM",
-                r"FILIAÇÃO",
-                r"AVOS",
-            ],
-            "COMPROVANTE_RESIDENCIA": [
-                r"CONTA DE.*LUZ",
-                r"CONTA DE.*ÁGUA",
-                r"CONTA DE.*ENERGIA",
-                r"COMPROVANTE DE RESIDÊNCIA",
-                r"ENDEREÇO",
-                r"CEP.*\d{5}-\d{3}",
-            ],
-            "TERMO_REPRESENTACAO": [
-                r"TERMO DE REPRESENTAÇÃO",
-                r"AUTORIZAÇÃO DE ACESSO A INFORMAÇÕES PREVIDENCIÁRIAS",
-                r"INFORMAÇÕES PREVIDENCIÁRIAS",
-                r"INSS",
-                r"PREVIDENCIÁRIO",
-            ],
-            "PROCURACAO": [r"PROCURAÇÃO", r"OUTORGANTE", r"OUTORGADO", r"PODERES"],
-            "CONTRATO_ADVOCATICIOS": [
-                r"CONTRATO DE PRESTAÇÃO DE SERVIÇOS ADVOCATÍCIOS",
-                r"HONORÁRIOS",
-                r"CLÁUSULA",
-                r"CONTRATANTE",
-            ],
-        }
-
-        for doc_type, pattern_list in patterns.items():
-            for pattern in pattern_list:
-                if re.search(pattern, text, re.IGNORECASE):
-                    return doc_type
+        return self.classify_document(text).tipo
 
-        return "DESCONHECIDO"
+    def classify_document(self, text):
+        """Classifica a página com pontuação por tipo e confiança"""
+        return classificador_do_app().classificar(text)
 
-    def analyze_pdf_structure(self, input_pdf):
+    def analyze_pdf_structure(
+        self, input_pdf, registro=None, tipos_necessarios=None, limite_paginas=0
+    ):
         """Analisa a estrutura do PDF e identifica onde está cada documento - VERSÃO DEBUG"""
+        registro = registro or RegistroExecucao(nivel=NIVEL_DEBUG)
         try:
-            pdf_reader = PyPDF2.PdfReader(input_pdf)
-            document_map = {}
+            analise = analisar_pdf(
+                input_pdf,
+                cache=self.get_page_cache(),
+                classificador=classificador_do_app(),
+                tipos_necessarios=tipos_necessarios,
+                limite_paginas=limite_paginas,
+                extrator=extrator_do_app(),
+            )
 
-            st.write(
-                f"🔍 Analisando {Path(input_pdf).name} ({len(pdf_reader.pages)} páginas)"
+            registro.registrar(
+                f"🔍 Analisando {Path(input_pdf).name} ({len(analise.paginas)} de "
+                f"{analise.total_paginas} páginas)"
             )
+            if analise.paginas_do_cache:
+                registro.registrar(
+                    f"   ♻️ {analise.paginas_do_cache} página(s) lidas do cache"
+                )
 
-            for page_num in range(len(pdf_reader.pages)):
-                text = self.extract_text_from_page(pdf_reader, page_num)
+            if analise.paginas_ocr:
+                registro.registrar(
+                    f"   🖼️ Páginas só com imagem (precisam de OCR): "
+                    f"{descrever_paginas(analise.paginas_ocr)}"
+                )
 
+            for pagina in analise.paginas:
                 # Mostrar um preview do texto para debug
-                if len(text) > 0:
-                    preview = text[:100].replace("\n", " ")  # Primeiros 100 caracteres
-                    st.write(f"   Página {page_num + 1}: '{preview}...'")
-
-                doc_type = self.identify_document_type(text)
+                if len(pagina.texto) > 0:
+                    preview = pagina.texto[:100].replace("\n", " ")  # Primeiros 100 caracteres
+                    registro.registrar(
+                        f"   Página {pagina.numero}: '{preview}...'", NIVEL_DEBUG
+                    )
 
-                if doc_type != "DESCONHECIDO":
-                    if doc_type not in document_map:
-                        document_map[doc_type] = []
-                    document_map[doc_type].append(page_num + 1)
-                    st.write(
-                        f"   ✅ Página {page_num + 1} identificada como: {doc_type}"
+                classificacao = pagina.classificacao
+                if classificacao.tipo != "DESCONHECIDO":
+                    registro.registrar(
+                        f"   ✅ Página {pagina.numero} identificada como: {classificacao.tipo} "
+                        f"(confiança {classificacao.confianca:.0%})",
+                        NIVEL_DEBUG,
                     )
 
-            return document_map, pdf_reader
+            registro.finalizar()
+            # pdf_reader é None quando todas as páginas vieram do cache
+            return analise.document_map, analise.pdf_reader
         except Exception as e:
+            registro.finalizar()
             st.error(f"❌ Erro ao analisar PDF {Path(input_pdf).name}: {e}")
             return {}, None
 
@@ -217,19 +372,7 @@ class AutomatizadorRequerimentosWeb:
         Extrai páginas específicas de um PDF e salva em um novo arquivo
         """
         try:
-            pdf_writer = PyPDF2.PdfWriter()
-
-            for page_num in page_numbers:
-                # Ajusta para índice base 0
-                page = pdf_reader.pages[page_num - 1]
-                pdf_writer.add_page(page)
-
-            # Garantir que o arquivo seja salvo como PDF mesmo sem extensão
-            if not output_pdf.lower().endswith(".pdf"):
-                output_pdf += ".pdf"
-
-            with open(output_pdf, "wb") as output_file:
-                pdf_writer.write(output_file)
+            extrair_paginas(pdf_reader, output_pdf, page_numbers)
             return True
         except Exception as e:
             st.error(f"❌ Erro ao extrair páginas {page_numbers}: {e}")
@@ -239,101 +382,508 @@ class AutomatizadorRequerimentosWeb:
         """
         Extrai APENAS os 4 documentos principais especificados
         """
-        try:
-            pdf_reader = PyPDF2.PdfReader(input_pdf)
-
-            documentos_principais = {
-                "RG_CPF": [1, 2],  # RG da mãe
-                "CERTIDAO_NASCIMENTO": [6],  # Certidão de Nascimento
-                "COMPROVANTE_RESIDENCIA": [9],  # Comprovante de residência
-                "TERMO_REPRESENTACAO_INSS": [11],  # Termo de Representação
+        extracao = extrair_documentos_principais(input_pdf, output_folder)
+        for doc_name in extracao.documentos:
+            st.success(f"   ✅ {doc_name} extraído")
+        for erro in extracao.erros:
+            st.error(f"❌ {erro}")
+        return len(extracao.documentos)
+
+    def show_file_result(self, resultado, registro):
+        """Registra no log e na tabela o resultado do processamento de um arquivo"""
+        nome_arquivo = Path(resultado.arquivo).name
+        documentos_extraidos = len(resultado.documentos)
+
+        if resultado.erro is not None:
+            status = "❌ Erro"
+        elif resultado.simulacao:
+            status = "📝 Simulado"
+        elif resultado.erros:
+            status = "⚠️ Parcial"
+        else:
+            status = "✅ OK"
+        registro.adicionar_resultado(
+            {
+                "Arquivo": nome_arquivo,
+                "Cliente": resultado.nome_pasta,
+                "Páginas": resultado.paginas,
+                "Documentos": documentos_extraidos,
+                "Precisam de OCR": len(resultado.paginas_ocr),
+                "Cortes": (
+                    "páginas fixas"
+                    if resultado.segmentacao == ORIGEM_PERFIL_FIXO
+                    else f"classificação ({resultado.confianca:.0%})"
+                    + (
+                        f" + {len(resultado.documentos_pelo_perfil_fixo)} "
+                        "por páginas fixas"
+                        if resultado.documentos_pelo_perfil_fixo
+                        else ""
+                    )
+                ),
+                "Tempo (s)": round(resultado.duracao, 2),
+                "Status": status,
             }
+        )
+
+        if resultado.erro is not None:
+            registro.registrar(f"❌ Erro ao processar {resultado.arquivo}: {resultado.erro}")
+            return
 
-            # Extrair cada documento principal DIRETAMENTE na pasta do cliente
-            documentos_extraidos = 0
-            for doc_name, paginas in documentos_principais.items():
-                output_pdf = os.path.join(output_folder, doc_name)  # SEM .pdf no final
-                if self.extract_specific_pages(pdf_reader, output_pdf, paginas):
-                    documentos_extraidos += 1
-                    st.success(f"   ✅ {doc_name} extraído")
+        if resultado.simulacao:
+            registro.registrar(f"📝 {nome_arquivo} → {resultado.nome_pasta}/ (plano)")
+            if resultado.pasta_pelo_nome:
+                registro.registrar(
+                    f"   🔗 \"{resultado.pasta_pelo_nome}\" é a pasta já existente "
+                    f"\"{resultado.nome_pasta}\""
+                )
+            for linha in descrever_plano(resultado, registro.planejados):
+                registro.registrar(f"   • {linha}")
+            for erro in resultado.erros:
+                registro.registrar(f"   ❌ {erro}")
+            return
+
+        if resultado.pdf_unico:
+            destino = f"{documentos_extraidos} documentos em {DOCUMENTO_UNICO}.pdf"
+        else:
+            destino = f"{documentos_extraidos} documentos extraídos"
+        registro.registrar(
+            f"📁 {nome_arquivo} → {resultado.nome_pasta}/ ({destino} + original)"
+        )
+        if resultado.pasta_pelo_nome:
+            registro.registrar(
+                f"   🔗 \"{resultado.pasta_pelo_nome}\" é a pasta já existente "
+                f"\"{resultado.nome_pasta}\""
+            )
+        for erro in resultado.erros:
+            registro.registrar(f"   ❌ {erro}")
+        for sobreposicao in resultado.sobreposicoes:
+            registro.registrar(
+                f"   🧬 Páginas {descrever_paginas(sobreposicao['paginas'])} "
+                f"(de {sobreposicao['total_paginas']}) repetidas de "
+                f"{Path(sobreposicao['outro']).name}"
+            )
 
-            return documentos_extraidos
+        if resultado.paginas_ocr:
+            registro.registrar(
+                f"   🖼️ Páginas só com imagem (precisam de OCR): "
+                f"{descrever_paginas(resultado.paginas_ocr)}"
+            )
 
-        except Exception as e:
-            st.error(f"❌ Erro na extração estruturada: {e}")
-            return 0
+        espera = resultado.etapas.get("fila_memoria", {}).get("segundos", 0)
+        if espera:
+            registro.registrar(f"   ⏳ Aguardou {espera:.1f}s por memória livre")
+        if resultado.memoria_limitada:
+            registro.registrar("   🧠 Processado no modo de pouca memória", NIVEL_DEBUG)
 
-    def process_pdf_analysis(self, pdf_files, pasta_clientes):
+        if resultado.paginas_analisadas < resultado.paginas:
+            registro.registrar(
+                f"   ⏩ {resultado.paginas_analisadas} de {resultado.paginas} páginas lidas",
+                NIVEL_DEBUG,
+            )
+        if resultado.segmentacao == ORIGEM_PERFIL_FIXO:
+            registro.registrar(
+                "   🧭 Páginas fixas (classificação sem confiança suficiente)",
+                NIVEL_DEBUG,
+            )
+        else:
+            registro.registrar(
+                f"   🧭 Documentos separados pela classificação "
+                f"(confiança {resultado.confianca:.0%})",
+                NIVEL_DEBUG,
+            )
+            if resultado.documentos_pelo_perfil_fixo:
+                registro.registrar(
+                    "   🧭 Não encontrados pela classificação (ou com confiança "
+                    "baixa), cortados pelas "
+                    f"páginas fixas: {', '.join(resultado.documentos_pelo_perfil_fixo)}"
+                )
+        for doc_name in resultado.documentos:
+            paginas = descrever_paginas(resultado.paginas_documentos.get(doc_name, []))
+            origem = (
+                ", páginas fixas"
+                if doc_name in resultado.documentos_pelo_perfil_fixo
+                else ""
+            )
+            registro.registrar(
+                f"   ✅ {doc_name} extraído (páginas {paginas}{origem})", NIVEL_DEBUG
+            )
+        registro.registrar(
+            f"   📥 {resultado.bytes_lidos / 1024:.1f} KB lidos · "
+            f"📤 {resultado.bytes_gravados / 1024:.1f} KB gravados · "
+            f"original por {resultado.modo_original}",
+            NIVEL_DEBUG,
+        )
+
+    def process_pdf_analysis(
+        self,
+        pdf_files,
+        pasta_clientes,
+        workers=1,
+        forcar=False,
+        opcoes=None,
+        nivel_log=NIVEL_ARQUIVO,
+    ):
         """Processa a análise e organização dos PDFs - APENAS DOCUMENTOS PRINCIPAIS"""
         if not pdf_files:
             return 0, 0
 
         st.header("🔍 Analisando e Organizando Documentos")
 
-        progress_bar = st.progress(0)
+        # Ignorar os arquivos já organizados que não mudaram
+        manifesto = None
+        try:
+            manifesto = ManifestoProcessamento()
+            pdf_files, ignorados = manifesto.separar_pendentes(
+                pdf_files, pasta_clientes, forcar=forcar
+            )
+            if ignorados:
+                st.info(
+                    f"⏭️ {len(ignorados)} arquivo(s) já organizado(s) e sem alteração foram ignorados"
+                )
+        except Exception as e:
+            st.warning(f"⚠️ Manifesto indisponível, processando todos os arquivos: {e}")
+
+        # Mesmo conteúdo de outra entrada ou de um original já organizado
+        # Uma leitura da pasta dos clientes para os originais e os destinos
+        indice_pastas = IndicePastasClientes.carregar(pasta_clientes)
+        separacao = None
+        try:
+            separacao = separar_repetidos(
+                pdf_files, pasta_clientes, opcoes, forcar, indice_pastas
+            )
+            pdf_files = separacao.pendentes
+            self.show_duplicates(separacao.duplicados)
+        except Exception as e:
+            st.warning(f"⚠️ Verificação de arquivos repetidos indisponível: {e}")
+        opcoes = replace(
+            opcoes or OpcoesProcessamento(),
+            destinos=resolver_destinos(pdf_files, pasta_clientes, indice_pastas),
+        )
+
+        if workers > 1:
+            st.info(f"⚡ Processando com {workers} processos em paralelo")
+        elif opcoes is not None and opcoes.em_etapas and len(pdf_files) > 1:
+            st.info(
+                "🚚 Pipeline em etapas: a gravação na pasta dos clientes acontece "
+                "enquanto os próximos arquivos são lidos e classificados"
+            )
+
+        registro = RegistroExecucao(nivel=nivel_log)
         total_files = len(pdf_files)
+        inicio = time.perf_counter()
 
         pastas_criadas = 0
         arquivos_organizados = 0
+        arquivos_com_erro = 0
+        resultados = []
 
-        for i, pdf_path in enumerate(pdf_files):
-            try:
-                # Extrair nome do cliente COMPLETO
-                nome_cliente = self.extract_client_name(pdf_path)
-                nome_pasta = re.sub(r'[<>:"/\\|?*]', "", nome_cliente).strip()
-                caminho_pasta = os.path.join(pasta_clientes, nome_pasta)
-
-                # Criar pasta do cliente se não existir
-                pasta_nova = False
-                if not os.path.exists(caminho_pasta):
-                    os.makedirs(caminho_pasta)
-                    pasta_nova = True
-                    pastas_criadas += 1
-
-                # EXTRAIR APENAS OS DOCUMENTOS PRINCIPAIS
-                st.info(
-                    f"📊 Processando {Path(pdf_path).name} - Extração dos Documentos Principais"
+        # Resultados chegam na ordem original, mesmo em paralelo
+        for i, resultado in enumerate(
+            processar_lote(pdf_files, pasta_clientes, workers=workers, opcoes=opcoes)
+        ):
+            if separacao is not None:
+                separacao.anotar(resultado)
+            self.show_file_result(resultado, registro)
+            resultados.append(resultado)
+            if manifesto is not None:
+                manifesto.registrar(resultado, pasta_clientes)
+
+            if resultado.pasta_nova:
+                pastas_criadas += 1
+            arquivos_organizados += resultado.arquivos_organizados
+            if resultado.erro is not None:
+                arquivos_com_erro += 1
+
+            # Atualizar barra de progresso (o redesenho da tela é limitado)
+            registro.progresso(
+                (i + 1) / total_files, f"{i + 1}/{total_files} arquivo(s)"
+            )
+
+        registro.finalizar()
+        self.save_performance_log(resultados, time.perf_counter() - inicio)
+        self.save_export_folders(resultados)
+        if arquivos_com_erro:
+            st.error(
+                f"❌ {arquivos_com_erro} arquivo(s) com erro - veja a tabela de resultados"
+            )
+
+        if manifesto is not None:
+            manifesto.close()
+        return pastas_criadas, arquivos_organizados
+
+    def show_duplicates(self, duplicados):
+        """Arquivos ignorados por terem o mesmo conteúdo de outro"""
+        if not duplicados:
+            return
+        st.info(
+            f"🧬 {len(duplicados)} arquivo(s) repetido(s) (mesmo conteúdo de outro "
+            "arquivo ou de um original já organizado) foram ignorados"
+        )
+        with st.expander("🧬 Arquivos repetidos", expanded=False):
+            for repetido, igual in duplicados.items():
+                st.write(f"📄 {Path(repetido).name} = {igual}")
+
+    def save_performance_log(self, resultados, duracao):
+        """Guarda o desempenho da execução na sessão (sobrevive aos reruns)"""
+        linhas = [linha_desempenho(r) for r in resultados]
+        desempenho = {
+            "resumo": resumir_execucao(resultados, duracao),
+            "etapas": resumir_etapas(resultados),
+            "arquivos": linhas,
+        }
+        st.session_state["desempenho"] = desempenho
+
+    def show_performance_panel(self):
+        """Painel "Desempenho" da última execução, com exportação JSON/CSV"""
+        desempenho = st.session_state.get("desempenho")
+        if not desempenho:
+            return
+
+        with st.expander("📈 Desempenho", expanded=False):
+            resumo = desempenho["resumo"]
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Tempo total", f"{resumo['segundos']:.1f} s")
+            col2.metric("Páginas/s", f"{resumo['paginas_por_segundo']:.1f}")
+            col3.metric(
+                "Lido / gravado",
+                f"{resumo['bytes_lidos'] / 1048576:.1f} / "
+                f"{resumo['bytes_gravados'] / 1048576:.1f} MB",
+            )
+            pico = resumo["memoria_pico_mb"]
+            col4.metric("Pico de memória", f"{pico:.0f} MB" if pico else "n/d")
+
+            st.write(
+                "**Tempo por etapa (soma de todos os arquivos) e maior aumento "
+                "de memória em uma chamada:**"
+            )
+            st.dataframe(desempenho["etapas"], use_container_width=True, hide_index=True)
+            st.write("**Por arquivo:**")
+            st.dataframe(desempenho["arquivos"], use_container_width=True, hide_index=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "⬇️ Exportar JSON",
+                    data=json.dumps(desempenho, ensure_ascii=False, indent=2),
+                    file_name="desempenho.json",
+                    mime="application/json",
+                    key="btn_desempenho_json",
                 )
+            with col2:
+                st.download_button(
+                    "⬇️ Exportar CSV",
+                    data=exportar_csv(desempenho["arquivos"]),
+                    file_name="desempenho.csv",
+                    mime="text/csv",
+                    key="btn_desempenho_csv",
+                )
+
+    def save_export_folders(self, resultados):
+        """Pastas dos clientes gravadas na execução, para o download em ZIP"""
+        st.session_state["pastas_exportacao"] = list(
+            dict.fromkeys(
+                r.caminho_pasta
+                for r in resultados
+                if r.caminho_pasta and r.erro is None and not r.simulacao
+            )
+        )
 
-                documentos_extraidos = self.extract_main_documents_structured(
-                    pdf_path, caminho_pasta
+    def show_export_panel(self):
+        """Download das pastas da última execução em ZIP (em partes, se grandes)"""
+        pastas = st.session_state.get("pastas_exportacao")
+        if not pastas:
+            return
+
+        with st.expander("📦 Baixar pastas organizadas (ZIP)", expanded=False):
+            arquivos = arquivos_das_pastas(pastas)
+            partes = dividir_em_partes(arquivos)
+            if not partes:
+                st.info("📭 As pastas da última execução estão vazias")
+                return
+            total_mb = sum(arquivo.tamanho for arquivo in arquivos) / 1048576
+            st.write(
+                f"**{len(pastas)} pasta(s), {len(arquivos)} arquivo(s), {total_mb:.1f} MB**"
+            )
+            if len(partes) > 1:
+                st.caption(
+                    f"Dividido em {len(partes)} partes de até {LIMITE_PARTE_MB} MB "
+                    "(variável AUTOMACAO_ZIP_MB)"
                 )
 
-                if documentos_extraidos > 0:
-                    st.success(
-                        f"   ✅ {documentos_extraidos} documento(s) principal(is) extraído(s)"
+            for numero, parte in enumerate(partes, 1):
+                clientes = list(dict.fromkeys(arquivo.pasta for arquivo in parte))
+                parte_mb = sum(arquivo.tamanho for arquivo in parte) / 1048576
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.write(
+                        f"📦 Parte {numero}: {len(clientes)} cliente(s) "
+                        f"({clientes[0]}{' … ' + clientes[-1] if len(clientes) > 1 else ''}), "
+                        f"{parte_mb:.1f} MB"
                     )
+                with col2:
+                    # Montado só neste clique e não guardado na sessão. O
+                    # BytesIO vai direto para o download_button, que guarda
+                    # uma única cópia da parte até o próximo rerun
+                    if st.button("📦 Preparar", key=f"btn_preparar_zip_{numero}"):
+                        zip_parte = BytesIO()
+                        exportar_zip(parte, zip_parte)
+                        st.download_button(
+                            "⬇️ Baixar ZIP",
+                            data=zip_parte,
+                            file_name=(
+                                f"clientes_parte{numero}.zip"
+                                if len(partes) > 1
+                                else "clientes.zip"
+                            ),
+                            mime="application/zip",
+                            key=f"btn_baixar_zip_{numero}",
+                        )
+
+    def show_archive_search(self, pasta_clientes):
+        """Busca nos PDFs de todas as pastas dos clientes e documentos faltando"""
+        if not pasta_clientes or not os.path.isdir(pasta_clientes):
+            return
+
+        with st.expander("🔎 Buscar nas pastas dos clientes", expanded=False):
+            col1, col2 = st.columns([3, 1])
+            with col2:
+                atualizar = st.button(
+                    "🗂️ Atualizar índice",
+                    key="btn_indexar_clientes",
+                    help="Lê só os PDFs novos ou alterados desde a última vez",
+                )
+            try:
+                if atualizar:
+                    self.update_archive_index(pasta_clientes)
+                # O índice só é aberto quando muda ou a consulta é nova
+                versao = versao_do_indice()
+                tipos = classificador_do_app().tipos
+                situacao = situacao_indexada(
+                    pasta_clientes,
+                    tuple(tipo for tipo in tipos if tipo in TIPOS_PRINCIPAIS),
+                    versao,
+                )
+            except Exception as e:
+                st.warning(f"⚠️ Índice de busca indisponível: {e}")
+                return
 
-                # SEMPRE copiar o PDF original SEM extensão .pdf
-                nome_arquivo = Path(pdf_path).stem.upper()  # MAIÚSCULAS e sem .pdf
-                caminho_destino = os.path.join(caminho_pasta, nome_arquivo)
-                shutil.copy2(pdf_path, caminho_destino)
-
-                st.success(
-                    f"📁 {Path(pdf_path).name} → {nome_pasta}/ ({documentos_extraidos} documentos extraídos + original)"
+            total = sum(cliente.arquivos for cliente in situacao)
+            with col1:
+                st.write(f"**{total} PDF(s) indexado(s)**")
+            if not total:
+                st.info(
+                    "💡 Clique em **Atualizar índice** para ler os PDFs das pastas "
+                    "(da segunda vez em diante, só os novos ou alterados)"
                 )
-                arquivos_organizados += documentos_extraidos + 1  # +1 para o original
+                return
 
-            except Exception as e:
-                st.error(f"❌ Erro ao processar {pdf_path}: {e}")
+            aba_busca, aba_faltando = st.tabs(["🔎 Busca", "📋 Documentos faltando"])
+            with aba_busca:
+                consulta = st.text_input(
+                    "Palavras (todas na mesma página):",
+                    key="busca_palavras",
+                    placeholder="Ex: Maria outorgante",
+                )
+                tipo = st.selectbox(
+                    "Tipo de página:", ["Todos", *tipos], key="busca_tipo"
+                )
+                if consulta:
+                    inicio = time.perf_counter()
+                    ocorrencias = buscar_no_indice(
+                        pasta_clientes,
+                        consulta,
+                        None if tipo == "Todos" else tipo,
+                        versao,
+                    )
+                    duracao_ms = (time.perf_counter() - inicio) * 1000
+                    if ocorrencias:
+                        st.dataframe(
+                            [
+                                {
+                                    "Cliente": ocorrencia.cliente,
+                                    "Arquivo": os.path.relpath(
+                                        ocorrencia.arquivo, pasta_clientes
+                                    ),
+                                    "Página": ocorrencia.pagina,
+                                    "Tipo": ocorrencia.tipo,
+                                    "Trecho": ocorrencia.trecho,
+                                }
+                                for ocorrencia in ocorrencias
+                            ],
+                            use_container_width=True,
+                            hide_index=True,
+                        )
+                    else:
+                        st.info("📭 Nenhuma página com todas essas palavras")
+                    st.caption(
+                        f"{len(ocorrencias)} página(s) em "
+                        f"{len({o.cliente for o in ocorrencias})} cliente(s) "
+                        f"({duracao_ms:.0f} ms)"
+                    )
 
-            # Atualizar barra de progresso
-            if total_files > 0:
-                progress_bar.progress((i + 1) / total_files)
+            with aba_faltando:
+                exigidos = st.multiselect(
+                    "Documentos exigidos:",
+                    tipos,
+                    default=[tipo for tipo in tipos if tipo in TIPOS_PRINCIPAIS],
+                    key="faltando_tipos",
+                )
+                so_pendentes = st.checkbox(
+                    "Só clientes com documentos faltando",
+                    value=True,
+                    key="faltando_so_pendentes",
+                )
+                situacao = situacao_indexada(pasta_clientes, tuple(exigidos), versao)
+                pendentes = [cliente for cliente in situacao if cliente.faltando]
+                st.caption(
+                    f"{len(pendentes)} de {len(situacao)} cliente(s) com "
+                    "documentos faltando (pelos PDFs indexados)"
+                )
+                linhas = [
+                    {
+                        "Cliente": cliente.cliente,
+                        "PDFs": cliente.arquivos,
+                        "Faltando": ", ".join(cliente.faltando),
+                        "Encontrados": ", ".join(cliente.encontrados),
+                    }
+                    for cliente in (pendentes if so_pendentes else situacao)
+                ]
+                if linhas:
+                    st.dataframe(linhas, use_container_width=True, hide_index=True)
+
+    def update_archive_index(self, pasta_clientes):
+        """Indexa as pastas dos clientes (só os PDFs novos ou alterados)"""
+        progresso = st.progress(0.0, text="🗂️ Indexando...")
+
+        def ao_concluir(indice_arquivo, total, caminho):
+            progresso.progress(
+                (indice_arquivo + 1) / total, text=f"📄 {Path(caminho).name}"
+            )
 
-        return pastas_criadas, arquivos_organizados
+        with IndiceBusca() as indice:
+            resumo = indice.indexar(pasta_clientes, ao_concluir=ao_concluir)
+        progresso.empty()
+        st.success(
+            f"✅ {resumo.arquivos} PDF(s) de {resumo.clientes} cliente(s): "
+            f"{resumo.analisados} lido(s), {resumo.inalterados} inalterado(s), "
+            f"{resumo.removidos} removido(s) do índice ({resumo.segundos:.1f} s)"
+        )
+        for erro in resumo.erros:
+            st.error(f"❌ {erro}")
 
     def get_pdf_files_from_folder(self, pasta_downloads):
         """Obtém lista de arquivos PDF da pasta especificada"""
-        if not pasta_downloads or not os.path.exists(pasta_downloads):
+        if not pasta_downloads or not os.path.isdir(pasta_downloads):
             return []
-
         try:
-            pdf_files = list(Path(pasta_downloads).glob("*.pdf"))
-            return [str(pdf) for pdf in pdf_files]
+            arquivos = listar_pasta_pdfs(
+                pasta_downloads, os.stat(pasta_downloads).st_mtime_ns
+            )
         except Exception as e:
             st.error(f"❌ Erro ao ler arquivos da pasta: {e}")
             return []
+        self._tamanhos = dict(arquivos)
+        return [pdf_path for pdf_path, _ in arquivos]
 
     def show_detected_files(self, pdf_files):
         """Mostra os arquivos detectados na pasta"""
@@ -342,11 +892,21 @@ class AutomatizadorRequerimentosWeb:
                 f"✅ {len(pdf_files)} arquivo(s) PDF detectado(s) automaticamente"
             )
 
+            # Uma tabela só (e não um elemento por arquivo): o rerun não fica
+            # mais lento com centenas de PDFs na pasta
             with st.expander("📋 Arquivos que serão processados", expanded=True):
-                for i, pdf_path in enumerate(pdf_files, 1):
-                    file_name = Path(pdf_path).name
-                    file_size = os.path.getsize(pdf_path) / 1024  # KB
-                    st.write(f"{i}. 📄 {file_name} ({file_size:.1f} KB)")
+                st.dataframe(
+                    [
+                        {
+                            "Nº": i,
+                            "Arquivo": f"📄 {Path(pdf_path).name}",
+                            "Tamanho (KB)": round(self._tamanhos.get(pdf_path, 0.0), 1),
+                        }
+                        for i, pdf_path in enumerate(pdf_files, 1)
+                    ],
+                    use_container_width=True,
+                    hide_index=True,
+                )
 
             return True
         else:
@@ -397,56 +957,279 @@ class AutomatizadorRequerimentosWeb:
             st.error(f"❌ Erro ao criar pasta {pasta_downloads}: {e}")
             return saved_files
 
+        # O uploader devolve os mesmos arquivos a cada rerun: os já salvos (ou
+        # já reconhecidos como repetidos) nesta sessão não são lidos de novo
+        tratados = st.session_state.setdefault("envios_tratados", {})
+        uploaded_files = [
+            uploaded_file
+            for uploaded_file in uploaded_files
+            if not os.path.exists(tratados.get(uploaded_file.file_id, ""))
+        ]
+        if not uploaded_files:
+            return saved_files
+
+        # Conteúdo que já está na pasta (ou repetido no envio) não é salvo de novo
+        existentes = self.folder_content_hashes(pasta_downloads)
+        repetidos = []
         for uploaded_file in uploaded_files:
             try:
+                uploaded_file.seek(0)
+                conteudo = hash_fluxo(uploaded_file, TAMANHO_BLOCO_UPLOAD)
+                if conteudo in existentes:
+                    repetidos.append((uploaded_file.name, existentes[conteudo]))
+                    tratados[uploaded_file.file_id] = existentes[conteudo]
+                    continue
                 file_path = os.path.join(pasta_downloads, uploaded_file.name)
+                # Gravação em blocos de 1 MB (sem uma segunda cópia do arquivo)
+                uploaded_file.seek(0)
                 with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+                    shutil.copyfileobj(uploaded_file, f, TAMANHO_BLOCO_UPLOAD)
                 saved_files.append(file_path)
+                existentes[conteudo] = file_path
+                tratados[uploaded_file.file_id] = file_path
             except Exception as e:
                 st.error(f"❌ Erro ao salvar {uploaded_file.name}: {e}")
 
+        if repetidos:
+            st.info(
+                f"🧬 {len(repetidos)} arquivo(s) enviado(s) já estão na pasta com o "
+                "mesmo conteúdo e não foram salvos de novo"
+            )
+            with st.expander("🧬 Envios repetidos", expanded=False):
+                for nome, igual in repetidos:
+                    st.write(f"📄 {nome} = {Path(igual).name}")
+
         return saved_files
 
+    def folder_content_hashes(self, pasta_downloads):
+        """{hash do conteúdo: caminho} dos PDFs que já estão na pasta"""
+        hashes = {}
+        try:
+            with IndiceConteudo() as indice:
+                for pdf_path in listar_pdfs(pasta_downloads):
+                    hashes.setdefault(indice.hash_do_arquivo(pdf_path), pdf_path)
+        except Exception as e:
+            st.warning(f"⚠️ Não foi possível verificar envios repetidos: {e}")
+        return hashes
+
     def extract_client_name(self, caminho_pdf):
         """Extrai nome do cliente do nome do arquivo"""
         try:
-            nome_arquivo = Path(caminho_pdf).stem
-
-            # Remove números e caracteres especiais, mas mantém espaços
-            nome_limpo = re.sub(r"[_-]", " ", nome_arquivo)
-            nome_limpo = re.sub(r"\d+", "", nome_limpo)  # Remove números
-            nome_limpo = re.sub(
-                r"\.pdf$", "", nome_limpo, flags=re.IGNORECASE
-            )  # Remove .pdf se houver
-
-            # Remove APENAS palavras que realmente não são parte do nome
-            palavras_remover = [
-                "documentos",
-                "requerimento",
-                "procuração",
-                "contrato",
-                "pdf",
-                "copia",
-            ]
-            palavras = [
-                palavra
-                for palavra in nome_limpo.split()
-                if palavra.lower() not in palavras_remover
-            ]
-
-            # NÃO remove palavras pequenas como "de", "da", "do" - são parte do nome!
-            # Junta TODAS as palavras para manter nome completo
-            if palavras:
-                nome_cliente = " ".join(palavras).title()
-                return nome_cliente
-            else:
-                return nome_limpo.title()
-
+            return extrair_nome_cliente(caminho_pdf)
         except Exception as e:
             st.warning(f"⚠️ Usando nome do arquivo: {e}")
             return Path(caminho_pdf).stem
 
+    def pipeline_options_interface(self):
+        """Pipeline em etapas: threads por etapa e tamanho das filas"""
+        em_etapas = st.checkbox(
+            "🚚 Gravar enquanto lê os próximos arquivos (pipeline em etapas)",
+            value=True,
+            help="Com 1 processo: leitura, classificação, gravação e cópia do original "
+            "rodam em etapas separadas; útil quando a pasta dos clientes é o Drive",
+            key="pipeline_em_etapas",
+        )
+        padrao = ConcorrenciaEtapas.de_texto(CONCORRENCIA_PADRAO)
+        if not em_etapas:
+            return False, padrao
+
+        with st.expander("⚙️ Threads por etapa", expanded=False):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                escrita = st.number_input(
+                    "Gravação:", min_value=1, max_value=16, value=padrao.escrita,
+                    key="etapa_escrita",
+                )
+            with col2:
+                copia = st.number_input(
+                    "Cópia do original:", min_value=1, max_value=16, value=padrao.copia,
+                    key="etapa_copia",
+                )
+            with col3:
+                fila = st.number_input(
+                    "Arquivos na fila:", min_value=1, max_value=32, value=padrao.fila,
+                    help="Máximo de arquivos esperando entre uma etapa e a próxima "
+                    "(mais fila = mais memória)",
+                    key="etapa_fila",
+                )
+        padrao.escrita = int(escrita)
+        padrao.copia = int(copia)
+        padrao.fila = int(fila)
+        return True, padrao
+
+    def show_final_summary(
+        self,
+        total_arquivos,
+        pastas_criadas,
+        arquivos_organizados,
+        pasta_clientes,
+        simulacao=False,
+    ):
+        """Mensagem final da organização"""
+        if arquivos_organizados <= 0:
+            return
+        if simulacao:
+            st.info(
+                f"📝 **Simulação:** {total_arquivos} arquivo(s) analisado(s), "
+                f"{pastas_criadas} pasta(s) nova(s) e {arquivos_organizados} arquivo(s) "
+                f"seriam gravados em `{pasta_clientes}`. Nada foi gravado - veja o plano no log"
+            )
+            return
+        st.balloons()
+        st.success(
+            f"""
+        🎉 **Organização Inteligente Concluída com Sucesso!**
+
+        **📊 Resumo:**
+        - 📄 {total_arquivos} arquivo(s) processado(s)
+        - 📁 {pastas_criadas} nova(s) pasta(s) de cliente(s) criada(s)
+        - ✅ {arquivos_organizados} arquivo(s) organizado(s)
+        - 🔍 Documentos classificados automaticamente
+
+        **📍 Localização:**
+        - Pastas organizadas em: `{pasta_clientes}`
+        - Cada pasta contém documentos separados por tipo
+        - Documentos principais extraídos em subpasta 'documentos_extraidos'
+        """
+        )
+
+    def queue_user(self):
+        """Identificação da sessão na fila (a vez é dividida entre as sessões)"""
+        if "usuario_fila" not in st.session_state:
+            st.session_state["usuario_fila"] = uuid.uuid4().hex[:8]
+        return st.session_state["usuario_fila"]
+
+    def enqueue_job(self, pdf_files, pasta_clientes, workers, forcar, opcoes):
+        """Coloca a execução na fila e garante um trabalhador para processá-la"""
+        try:
+            with FilaTrabalhos() as fila:
+                trabalho_id = fila.enfileirar(
+                    pdf_files,
+                    pasta_clientes,
+                    opcoes,
+                    usuario=self.queue_user(),
+                    workers=workers,
+                    forcar=forcar,
+                )
+            iniciar_trabalhador()
+        except Exception as e:
+            st.error(f"❌ Não foi possível colocar a execução na fila: {e}")
+            return None
+        st.session_state["trabalho_id"] = trabalho_id
+        st.session_state.pop("trabalho_exibido", None)
+        return trabalho_id
+
+    def show_job_panel(self, nivel_log=NIVEL_ARQUIVO):
+        """
+        Andamento da execução em segundo plano desta sessão
+
+        Enquanto ela está na fila ou em andamento, a tela é atualizada
+        sozinha (ver refresh_job_panel).
+        """
+        self._fila_ativa = False
+        try:
+            with FilaTrabalhos() as fila:
+                self.show_job_queue(fila)
+                trabalho_id = st.session_state.get("trabalho_id")
+                trabalho = fila.obter(trabalho_id) if trabalho_id else None
+                if trabalho is None:
+                    return
+                resultados = fila.resultados(trabalho.id)
+                ignorados = fila.ignorados(trabalho.id)
+        except Exception as e:
+            st.warning(f"⚠️ Fila de execuções indisponível: {e}")
+            return
+
+        st.header(f"🗂️ Execução nº {trabalho.id}")
+        if trabalho.ignorados:
+            st.info(
+                f"⏭️ {len(ignorados)} arquivo(s) já organizado(s) e sem alteração "
+                "ou repetido(s) foram ignorados"
+            )
+        if trabalho.estado == PENDENTE:
+            st.info(
+                f"⏳ Aguardando na fila ({trabalho.posicao_fila} execução(ões) na frente)"
+            )
+        elif trabalho.tentativas > 1 and trabalho.ativo:
+            st.info("🔁 Execução retomada a partir do primeiro arquivo não concluído")
+
+        registro = RegistroExecucao(nivel=nivel_log)
+        for resultado in resultados:
+            self.show_file_result(resultado, registro)
+        feitos = trabalho.concluidos + trabalho.ignorados
+        registro.progresso(trabalho.progresso, f"{feitos}/{trabalho.total} arquivo(s)")
+        registro.finalizar()
+
+        if trabalho.ativo:
+            self._fila_ativa = True
+            if st.button("⏹️ Cancelar execução", key=f"cancelar_trabalho_{trabalho.id}"):
+                with FilaTrabalhos() as fila:
+                    fila.cancelar(trabalho.id)
+                st.warning("⏹️ Cancelamento pedido: a execução para após o arquivo atual")
+            # Uma queda do trabalhador não deixa a execução parada
+            iniciar_trabalhador()
+            return
+
+        if trabalho.estado == FALHOU:
+            st.error(f"❌ A execução falhou: {trabalho.mensagem}")
+        elif trabalho.estado == CANCELADO:
+            st.warning(f"⏹️ Execução cancelada após {feitos} arquivo(s)")
+        com_erro = sum(1 for r in resultados if r.erro is not None)
+        if com_erro:
+            st.error(f"❌ {com_erro} arquivo(s) com erro - veja a tabela de resultados")
+
+        # Desempenho e mensagem final uma única vez por execução
+        if st.session_state.get("trabalho_exibido") != trabalho.id:
+            st.session_state["trabalho_exibido"] = trabalho.id
+            self.save_performance_log(resultados, sum(r.duracao for r in resultados))
+            self.save_export_folders(resultados)
+            if trabalho.estado == CONCLUIDO:
+                self.show_final_summary(
+                    trabalho.total,
+                    sum(1 for r in resultados if r.pasta_nova),
+                    sum(r.arquivos_organizados for r in resultados),
+                    trabalho.pasta_clientes,
+                    simulacao=any(r.simulacao for r in resultados),
+                )
+
+    def show_job_queue(self, fila):
+        """Execuções recentes da fila; permite acompanhar uma delas"""
+        trabalhos = fila.listar(limite=20)
+        if not trabalhos:
+            return
+        with st.expander("🗂️ Fila de execuções", expanded=False):
+            st.dataframe(
+                [
+                    {
+                        "Nº": t.id,
+                        "Estado": t.estado,
+                        "Arquivos": f"{t.concluidos + t.ignorados}/{t.total}",
+                        "Criada em": t.criado_em,
+                        "Sua": "✅" if t.usuario == self.queue_user() else "",
+                    }
+                    for t in trabalhos
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+            ids = [t.id for t in trabalhos]
+            atual = st.session_state.get("trabalho_id")
+            escolhido = st.selectbox(
+                "Acompanhar a execução:",
+                options=ids,
+                index=ids.index(atual) if atual in ids else 0,
+                key="trabalho_acompanhado",
+            )
+            if st.button("👁️ Acompanhar", key="btn_acompanhar_trabalho"):
+                st.session_state["trabalho_id"] = escolhido
+                st.session_state.pop("trabalho_exibido", None)
+
+    def refresh_job_panel(self):
+        """Atualiza a tela enquanto a execução desta sessão não termina"""
+        if self._fila_ativa:
+            time.sleep(INTERVALO_ATUALIZACAO_FILA)
+            st.rerun()
+
     def run_automation(self):
         """Função principal que executa toda a automação"""
         # Obter configurações de pastas
@@ -476,6 +1259,143 @@ class AutomatizadorRequerimentosWeb:
                 f"📦 Total de {len(all_files_to_process)} arquivo(s) para processar"
             )
 
+        # Processos em paralelo (1 = sequencial)
+        workers = st.number_input(
+            "⚡ Processos em paralelo:",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=1,
+            help="Quantos PDFs processar ao mesmo tempo (1 = um de cada vez)",
+            key="workers_input_main",
+        )
+
+        forcar = st.checkbox(
+            "🔁 Reprocessar arquivos já organizados",
+            value=False,
+            help="Por padrão, PDFs já organizados e sem alteração são ignorados",
+            key="forcar_reprocessamento",
+        )
+
+        ignorar_repetidos = st.checkbox(
+            "🧬 Ignorar arquivos repetidos (mesmo conteúdo)",
+            value=True,
+            help="O mesmo PDF recebido com nomes diferentes, ou igual a um original "
+            "já organizado, é processado uma vez só",
+            key="ignorar_repetidos",
+        )
+
+        comparar_paginas = st.checkbox(
+            "🔍 Avisar de páginas repetidas entre pacotes",
+            value=False,
+            help="Compara cada página com as dos outros arquivos e dos originais já "
+            "organizados (a primeira vez lê todos os originais)",
+            key="comparar_paginas",
+        )
+
+        segmentar = st.checkbox(
+            "🧭 Separar documentos pela classificação das páginas",
+            value=True,
+            help="Desmarcado: usa sempre as páginas fixas (1-2, 6, 9 e 11)",
+            key="segmentar_por_classificacao",
+        )
+
+        documento_unico = st.checkbox(
+            "📚 Um PDF só por pacote, com marcadores",
+            value=False,
+            help="Grava DOCUMENTOS.pdf com um marcador para cada documento (RG, "
+            "certidão, comprovante, termo) em vez de um arquivo por documento",
+            key="documento_unico",
+        )
+
+        incluir_restantes = st.checkbox(
+            "📎 Incluir as demais páginas no fim do PDF único",
+            value=False,
+            help="As páginas que não entraram em nenhum documento vão no fim, no "
+            "marcador OUTRAS_PAGINAS",
+            key="incluir_restantes",
+            disabled=not documento_unico,
+        )
+
+        documentos_extras = st.checkbox(
+            "📄 Gravar também procuração e contrato",
+            value=False,
+            help="Por padrão só os documentos principais (RG, certidão, "
+            "comprovante, termo) são gravados. Com a leitura parada nos "
+            "principais, os outros documentos ficam de fora",
+            key="documentos_extras",
+        )
+
+        parar_ao_encontrar = st.checkbox(
+            "⏩ Parar a leitura quando os documentos principais forem encontrados",
+            value=True,
+            help="As páginas depois do último documento principal não são lidas "
+            "(pacotes grandes ficam muito mais rápidos)",
+            key="parar_ao_encontrar",
+        )
+
+        limite_paginas = st.number_input(
+            "📑 Máximo de páginas lidas por arquivo (0 = todas):",
+            min_value=0,
+            value=0,
+            step=10,
+            key="limite_paginas",
+        )
+
+        extratores = list(extratores_instalados())
+        extrator = st.selectbox(
+            "🔤 Extrator de texto:",
+            options=extratores,
+            index=extratores.index(EXTRATOR_PADRAO) if EXTRATOR_PADRAO in extratores else 0,
+            help="pypdf2 é o padrão; pypdfium2 e pdfminer aparecem quando instalados "
+            "(compare com: python -m benchmarks.bench_extratores)",
+            key="extrator_texto",
+        )
+
+        memoria_limitada = st.checkbox(
+            "🧠 Modo de pouca memória",
+            value=False,
+            help="Para PDFs escaneados muito grandes: o arquivo não é carregado "
+            "inteiro e as páginas são liberadas após o uso (um pouco mais lento). "
+            f"Arquivos a partir de {ARQUIVO_GRANDE_MB} MB sempre usam este modo",
+            key="memoria_limitada",
+        )
+
+        limite_memoria = st.number_input(
+            "📦 Limite de memória (MB, 0 = sem limite):",
+            min_value=0,
+            value=LIMITE_MEMORIA_PADRAO_MB,
+            step=128,
+            help="Arquivos que não cabem no limite esperam na fila, "
+            "inclusive quando outra pessoa está usando o app",
+            key="limite_memoria_mb",
+        )
+
+        em_etapas, concorrencia = self.pipeline_options_interface()
+
+        nivel_log = st.selectbox(
+            "📝 Detalhe do log:",
+            options=list(NIVEIS_LOG),
+            index=NIVEL_ARQUIVO,
+            help="Debug mostra os documentos de cada arquivo; Resumo mostra só a tabela",
+            key="nivel_log_main",
+        )
+
+        simular = st.checkbox(
+            "📝 Só planejar (simulação)",
+            value=False,
+            help="Mostra as pastas e os arquivos que seriam criados ou substituídos, "
+            "sem gravar nada",
+            key="simular_execucao",
+        )
+
+        em_segundo_plano = st.checkbox(
+            "🗂️ Executar em segundo plano",
+            value=True,
+            help="A execução vai para uma fila processada fora da página: continua "
+            "mesmo se você mexer em outra opção ou fechar a aba",
+            key="executar_na_fila",
+        )
+
         if st.button(
             "▶️ EXECUTAR ORGANIZAÇÃO INTELIGENTE DE DOCUMENTOS",
             type="primary",
@@ -494,30 +1414,58 @@ class AutomatizadorRequerimentosWeb:
                 st.warning("⚠️ Nenhum arquivo PDF encontrado para processar")
                 return
 
-            # Processar com análise inteligente
-            pastas_criadas, arquivos_organizados = self.process_pdf_analysis(
-                all_files_to_process, pasta_clientes
+            opcoes = OpcoesProcessamento(
+                segmentar=segmentar,
+                documentos_extras=documentos_extras,
+                parar_ao_encontrar=parar_ao_encontrar,
+                limite_paginas=int(limite_paginas),
+                extrator=extrator,
+                memoria_limitada=memoria_limitada,
+                limite_memoria_mb=int(limite_memoria),
+                em_etapas=em_etapas,
+                concorrencia=concorrencia,
+                pasta_processados=pasta_processados or None,
+                simular=simular,
+                ignorar_repetidos=ignorar_repetidos,
+                comparar_paginas=comparar_paginas,
+                documento_unico=documento_unico,
+                incluir_restantes=incluir_restantes and documento_unico,
             )
 
-            # Mensagem final
-            if arquivos_organizados > 0:
-                st.balloons()
-                st.success(
-                    f"""
-                🎉 **Organização Inteligente Concluída com Sucesso!**
+            # Na fila, a execução continua mesmo se a página for fechada
+            if em_segundo_plano:
+                self.enqueue_job(
+                    all_files_to_process, pasta_clientes, int(workers), forcar, opcoes
+                )
+            else:
+                # Processar com análise inteligente
+                pastas_criadas, arquivos_organizados = self.process_pdf_analysis(
+                    all_files_to_process,
+                    pasta_clientes,
+                    workers=int(workers),
+                    forcar=forcar,
+                    opcoes=opcoes,
+                    nivel_log=NIVEIS_LOG[nivel_log],
+                )
+                self.show_final_summary(
+                    len(all_files_to_process),
+                    pastas_criadas,
+                    arquivos_organizados,
+                    pasta_clientes,
+                    simulacao=simular,
+                )
 
-                **📊 Resumo:**
-                - 📄 {len(all_files_to_process)} arquivo(s) processado(s)
-                - 📁 {pastas_criadas} nova(s) pasta(s) de cliente(s) criada(s)
-                - ✅ {arquivos_organizados} arquivo(s) organizado(s)
-                - 🔍 Documentos classificados automaticamente
+        # Execução em segundo plano (acompanhada a cada atualização da tela)
+        self.show_job_panel(NIVEIS_LOG[nivel_log])
 
-                **📍 Localização:**
-                - Pastas organizadas em: `{pasta_clientes}`
-                - Cada pasta contém documentos separados por tipo
-                - Documentos principais extraídos em subpasta 'documentos_extraidos'
-                """
-                )
+        # Desempenho da última execução (continua visível após outros cliques)
+        self.show_performance_panel()
+
+        # Pastas da última execução em ZIP (a pasta dos clientes fica no servidor)
+        self.show_export_panel()
+
+        # Busca em todas as pastas dos clientes (índice local, incremental)
+        self.show_archive_search(pasta_clientes)
 
 
 # Função principal
@@ -554,12 +1502,14 @@ def main():
 
         3. **🚀 Executar Organização Inteligente**:
            - Clique em **EXECUTAR ORGANIZAÇÃO INTELIGENTE DE DOCUMENTOS**
-           - O sistema analisa e classifica automaticamente os documentos:
-             - 📄 RG/CPF da mãe (páginas 1-2)
-             - 📄 Certidão de Nascimento (página 6)  
-             - 📄 Comprovante de Residência (página 9)
-             - 📄 Termo de Representação (página 11)
+           - O sistema analisa e classifica automaticamente cada página e separa:
+             - 📄 RG/CPF da mãe
+             - 📄 Certidão de Nascimento
+             - 📄 Comprovante de Residência
+             - 📄 Termo de Representação
              - 📄 Outros documentos automaticamente identificados
+           - Se a classificação não for confiável, usa as páginas padrão
+             (RG 1-2, Certidão 6, Comprovante 9, Termo 11)
 
         **⚡ Funcionalidades Inteligentes:**
         - Extração estruturada dos documentos principais
@@ -570,6 +1520,9 @@ def main():
         """
         )
 
+    # Execução em segundo plano: atualiza a tela até ela terminar
+    app.refresh_job_panel()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,13 @@
+"""Núcleo da automação de requerimentos (sem dependência do Streamlit)"""
+
+from automacao.classificador import (
+    Classificacao,
+    ClassificadorDocumentos,
+    obter_classificador,
+)
+
+__all__ = [
+    "Classificacao",
+    "ClassificadorDocumentos",
+    "obter_classificador",
+]
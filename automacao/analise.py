@@ -0,0 +1,315 @@
+"""Análise página a página dos PDFs: texto extraído + classificação"""
+
+import hashlib
+import mmap
+import re
+from dataclasses import dataclass, field
+from io import BytesIO
+
+from automacao.classificador import TIPO_DESCONHECIDO, obter_classificador
+from automacao.extratores import ExtratorPyPDF2, obter_extrator
+from automacao.metricas import MedidorEtapas
+
+# Camada de texto da página
+CAMADA_TEXTO = "texto"
+CAMADA_IMAGEM = "imagem"  # só imagem (foto/escaneada): precisa de OCR
+CAMADA_VAZIA = "vazia"  # sem texto e sem imagem
+
+# Operadores de início de texto (BT) e de imagem embutida (BI) no conteúdo
+_OPERADOR_TEXTO = re.compile(rb"(?<![A-Za-z0-9])BT(?![A-Za-z0-9])")
+_OPERADOR_IMAGEM = re.compile(rb"(?<![A-Za-z0-9])BI(?![A-Za-z0-9])")
+
+# Profundidade máxima de formulários (XObject /Form) dentro de formulários
+_PROFUNDIDADE_FORMULARIOS = 3
+
+
+@dataclass
+class PaginaAnalisada:
+    numero: int  # base 1
+    texto: str
+    classificacao: object  # Classificacao
+    camada: str = CAMADA_TEXTO
+
+    @property
+    def precisa_ocr(self):
+        return self.camada == CAMADA_IMAGEM
+
+
+@dataclass
+class AnalisePdf:
+    """Resultado da análise de um PDF"""
+
+    arquivo: str
+    paginas: list = field(default_factory=list)
+    pdf_reader: object = None  # None quando nenhuma página precisou ser lida
+    paginas_do_cache: int = 0
+    total_paginas: int = 0  # páginas do PDF (as analisadas estão em paginas)
+    extrator: str = ""  # extrator de texto usado
+    hash_arquivo: str = ""  # SHA-256 do arquivo (calculado só com o cache)
+    erros: list = field(default_factory=list)  # falhas de extração (por página)
+    interrompida: bool = False  # parou ao encontrar os tipos necessários
+
+    @property
+    def paginas_ocr(self):
+        """Páginas (base 1) só com imagem, que precisam de OCR"""
+        return [pagina.numero for pagina in self.paginas if pagina.precisa_ocr]
+
+    @property
+    def document_map(self):
+        """{tipo de documento: [páginas (base 1)]}, sem as páginas desconhecidas"""
+        mapa = {}
+        for pagina in self.paginas:
+            if pagina.classificacao.tipo != TIPO_DESCONHECIDO:
+                mapa.setdefault(pagina.classificacao.tipo, []).append(pagina.numero)
+        return mapa
+
+
+def extrair_texto_pagina(pdf_reader, page_num):
+    """Extrai texto de uma página específica (índice base 0); "" se falhar"""
+    try:
+        return pdf_reader.pages[page_num].extract_text()
+    except Exception:
+        return ""
+
+
+def _inspecionar_recursos(recursos, profundidade=0):
+    """(fontes na página, fontes em formulários, imagens) dos recursos"""
+    recursos = recursos.get_object() if recursos is not None else {}
+    fontes = "/Font" in recursos and len(recursos["/Font"]) > 0
+    fontes_formularios = imagens = False
+    xobjects = recursos["/XObject"] if "/XObject" in recursos else {}
+    for referencia in xobjects.values():
+        xobject = referencia.get_object()
+        subtipo = xobject.get("/Subtype")
+        if subtipo == "/Image":
+            imagens = True
+        elif subtipo == "/Form" and profundidade < _PROFUNDIDADE_FORMULARIOS:
+            internas, formularios, imagens_internas = _inspecionar_recursos(
+                xobject.get("/Resources"), profundidade + 1
+            )
+            fontes_formularios = fontes_formularios or internas or formularios
+            imagens = imagens or imagens_internas
+    return fontes, fontes_formularios, imagens
+
+
+def _conteudo_bruto(pagina):
+    """Conteúdo (decodificado) da página, sem interpretar os operadores"""
+    if "/Contents" not in pagina:
+        return b""
+    conteudo = pagina["/Contents"]
+    partes = conteudo if isinstance(conteudo, list) else [conteudo]
+    return b"\n".join(parte.get_object().get_data() for parte in partes)
+
+
+def _dados_xobjects(recursos, profundidade=0):
+    """Conteúdo das imagens e formulários usados pela página"""
+    recursos = recursos.get_object() if recursos is not None else {}
+    xobjects = recursos["/XObject"] if "/XObject" in recursos else {}
+    for nome in sorted(xobjects):
+        xobject = xobjects[nome].get_object()
+        yield xobject.get_data()
+        if xobject.get("/Subtype") == "/Form" and profundidade < _PROFUNDIDADE_FORMULARIOS:
+            yield from _dados_xobjects(xobject.get("/Resources"), profundidade + 1)
+
+
+def hash_pagina(pagina):
+    """
+    Hash do que aparece na página: conteúdo + imagens e formulários usados
+
+    As imagens entram no hash porque páginas escaneadas diferentes têm o
+    mesmo conteúdo ("desenhe a imagem"). Página sem nada retorna None (não
+    serve para dizer que dois arquivos têm páginas em comum).
+    """
+    sha = hashlib.sha256()
+    vazia = True
+    for dados in (_conteudo_bruto(pagina), *_dados_xobjects(pagina.get("/Resources"))):
+        if dados.strip():
+            vazia = False
+        sha.update(len(dados).to_bytes(8, "big"))
+        sha.update(dados)
+    return None if vazia else sha.hexdigest()
+
+
+def detectar_camada_texto(pagina):
+    """
+    Verificação barata da camada de texto da página (sem extrair o texto)
+
+    Sem fonte nos recursos (nem nos formulários XObject) não há como haver
+    texto; com fonte, procura o operador BT no conteúdo. Sem texto, a página
+    é "imagem" se tiver alguma imagem (precisa de OCR) ou "vazia".
+    """
+    fontes, fontes_formularios, imagens = _inspecionar_recursos(
+        pagina.get("/Resources")
+    )
+    if fontes_formularios:
+        return CAMADA_TEXTO
+    if fontes or not imagens:
+        conteudo = _conteudo_bruto(pagina)
+        if fontes and _OPERADOR_TEXTO.search(conteudo):
+            return CAMADA_TEXTO
+        imagens = imagens or bool(_OPERADOR_IMAGEM.search(conteudo))
+    return CAMADA_IMAGEM if imagens else CAMADA_VAZIA
+
+
+def _camada_da_pagina(pdf_reader, page_num):
+    """Camada de texto da página; na dúvida (erro), tenta extrair o texto"""
+    try:
+        return detectar_camada_texto(pdf_reader.pages[page_num])
+    except Exception:
+        return CAMADA_TEXTO
+
+
+def fluxo_leitura(dados):
+    """Stream para o PdfReader sobre bytes ou mmap (sem copiar o conteúdo)"""
+    if isinstance(dados, mmap.mmap):
+        return dados
+    return BytesIO(dados)
+
+
+def liberar_objetos(pdf_reader):
+    """
+    Descarta os objetos já lidos do PDF (conteúdo das páginas, imagens)
+
+    O PdfReader guarda todo objeto que resolve; sem isso, um PDF escaneado
+    grande acaba inteiro na memória. Os objetos são lidos de novo se preciso.
+    """
+    pdf_reader.resolved_objects.clear()
+
+
+def analisar_pdf(
+    input_pdf,
+    cache=None,
+    classificador=None,
+    dados=None,
+    medidor=None,
+    liberar_paginas=False,
+    tipos_necessarios=None,
+    limite_paginas=0,
+    extrator=None,
+):
+    """
+    Extrai o texto e classifica as páginas do PDF
+
+    Com um CachePaginas, as páginas de um arquivo já visto (mesmo conteúdo)
+    vêm do cache e o PDF nem chega a ser aberto. Se o conteúdo do arquivo já
+    foi lido (dados: bytes ou mmap), ele é usado no lugar de uma nova leitura
+    do disco. Com liberar_paginas, os objetos de cada página são descartados
+    assim que o texto é extraído.
+
+    Com tipos_necessarios, a análise para quando todos os tipos já foram
+    encontrados e o último documento terminou (a página seguinte, de outro
+    tipo, não entra em analise.paginas). limite_paginas limita quantas páginas são analisadas (0 = todas).
+
+    extrator é um ExtratorTexto (padrão: obter_extrator()); uma falha de
+    extração vira uma mensagem em analise.erros e a página fica sem texto.
+    """
+    classificador = classificador or obter_classificador()
+    medidor = medidor or MedidorEtapas()
+    extrator = extrator or obter_extrator()
+    analise = AnalisePdf(arquivo=str(input_pdf), extrator=extrator.nome)
+    documento = None
+
+    def abrir():
+        if analise.pdf_reader is None:
+            from automacao.leitor import LeitorSobDemanda
+
+            with medidor.etapa("abrir_pdf"):
+                analise.pdf_reader = LeitorSobDemanda(
+                    fluxo_leitura(dados) if dados is not None else input_pdf
+                )
+        return analise.pdf_reader
+
+    def abrir_documento():
+        nonlocal documento, extrator
+        if documento is None:
+            if isinstance(extrator, ExtratorPyPDF2):
+                documento = extrator.abrir(None, abrir())
+                return documento
+            # Os outros extratores leem o arquivo por conta própria
+            origem = BytesIO(dados) if isinstance(dados, bytes) else input_pdf
+            try:
+                documento = extrator.abrir(origem)
+            except Exception as e:
+                analise.erros.append(
+                    f"Extrator {extrator.nome} falhou ao abrir o PDF ({e}); usando pypdf2"
+                )
+                extrator = ExtratorPyPDF2()
+                analise.extrator = extrator.nome
+                documento = extrator.abrir(None, abrir())
+        return documento
+
+    hash_conteudo = None
+    total = None
+    em_cache = {}
+    if cache is not None:
+        if dados is not None:
+            hash_conteudo = hashlib.sha256(dados).hexdigest()
+        else:
+            hash_conteudo = cache.hash_do_arquivo(input_pdf)
+        analise.hash_arquivo = hash_conteudo
+        if extrator.nome != ExtratorPyPDF2.nome:
+            # Cada extrator gera um texto um pouco diferente
+            hash_conteudo = f"{hash_conteudo}:{extrator.nome}"
+        total = cache.total_paginas(hash_conteudo)
+        if total is not None:
+            em_cache = cache.obter_paginas(hash_conteudo, classificador.assinatura)
+
+    if total is None:
+        total = len(abrir().pages)
+    analise.total_paginas = total
+
+    faltando = set(tipos_necessarios) if tipos_necessarios else None
+    tipo_anterior = None
+    novas = {}
+    try:
+        for indice in range(min(total, limite_paginas) if limite_paginas else total):
+            texto, classificacao, camada = em_cache.get(indice, (None, None, None))
+            falhou = False
+            if texto is None:
+                pdf_reader = abrir()
+                with medidor.etapa("deteccao_camada"):
+                    camada = _camada_da_pagina(pdf_reader, indice)
+                texto = ""  # só imagem ou vazia: nada a extrair
+                if camada == CAMADA_TEXTO:
+                    with medidor.etapa("extracao_texto"):
+                        try:
+                            texto = extrator.extrair(abrir_documento(), indice) or ""
+                        except Exception as e:
+                            falhou = True
+                            analise.erros.append(
+                                f"Página {indice + 1}: falha na extração de texto "
+                                f"({extrator.nome}): {e}"
+                            )
+                if liberar_paginas:
+                    liberar_objetos(pdf_reader)
+            else:
+                analise.paginas_do_cache += 1
+            camada = camada or CAMADA_TEXTO
+            if classificacao is None:
+                with medidor.etapa("classificacao"):
+                    classificacao = classificador.classificar(texto)
+                if not falhou:  # a extração é tentada de novo na próxima vez
+                    novas[indice] = (texto, classificacao, camada)
+            if faltando is not None:
+                # A página que começa o documento seguinte fica de fora: ele
+                # sairia cortado
+                if not faltando and classificacao.tipo != tipo_anterior:
+                    analise.interrompida = True
+                    break
+                faltando.discard(classificacao.tipo)
+                tipo_anterior = classificacao.tipo
+
+            analise.paginas.append(
+                PaginaAnalisada(indice + 1, texto, classificacao, camada)
+            )
+    finally:
+        if documento is not None and documento is not analise.pdf_reader:
+            extrator.fechar(documento)
+
+    if cache is not None:
+        if novas:
+            cache.guardar_paginas(hash_conteudo, novas, classificador.assinatura)
+        if analise.pdf_reader is not None:
+            cache.registrar_total_paginas(hash_conteudo, total)
+
+    return analise
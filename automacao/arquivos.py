@@ -0,0 +1,240 @@
+"""Operações de arquivo com poucas gravações (importante em unidades de rede)"""
+
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from io import BytesIO
+
+# ioctl do Linux que clona o arquivo por referência (btrfs, XFS...)
+_FICLONE = 0x40049409
+
+# Erros que indicam "vínculo não suportado aqui" (outro disco, FAT, SMB...)
+_ERROS_SEM_VINCULO = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EACCES,
+    errno.EMLINK,
+    errno.ENOTSUP,
+    errno.EOPNOTSUPP,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.ENOSYS,
+}
+
+
+def gravar_pdf(pdf_writer, output_pdf, medidor=None, direto=False):
+    """
+    Serializa o PdfWriter em memória e grava o arquivo em uma única escrita
+
+    Com direto=True (pouca memória) o PdfWriter escreve no arquivo por um
+    buffer de 1 MB, sem manter o PDF gerado inteiro na memória.
+
+    Retorna a quantidade de bytes gravados.
+    """
+    etapa = medidor.etapa if medidor is not None else _sem_medicao
+    if direto:
+        with etapa("pdfwriter_write"):
+            with open(output_pdf, "wb", buffering=1048576) as output_file:
+                pdf_writer.write(output_file)
+                tamanho = output_file.tell()
+        if medidor is not None:
+            medidor.contar_bytes("pdfwriter_write", tamanho)
+        return tamanho
+
+    buffer = BytesIO()
+    with etapa("pdfwriter_write"):
+        pdf_writer.write(buffer)
+    dados = buffer.getbuffer()
+    with etapa("escrita_disco"):
+        with open(output_pdf, "wb") as output_file:
+            output_file.write(dados)
+
+    if medidor is not None:
+        medidor.contar_bytes("escrita_disco", len(dados))
+    return len(dados)
+
+
+def _sem_medicao(nome):
+    return nullcontext()
+
+
+def _temporario(destino):
+    temporario = f"{destino}.publicar-tmp"
+    if os.path.lexists(temporario):
+        os.remove(temporario)
+    return temporario
+
+
+def _vincular(origem, destino):
+    """Hardlink em nome temporário + rename, para substituir o destino de uma vez"""
+    temporario = _temporario(destino)
+    os.link(origem, temporario)
+    os.replace(temporario, destino)
+
+
+def _clonar(origem, destino):
+    """Reflink (cópia por referência) no Linux; levanta OSError se não suportado"""
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOTSUP, "reflink não suportado nesta plataforma")
+    import fcntl
+
+    temporario = _temporario(destino)
+    try:
+        with open(origem, "rb") as fonte, open(temporario, "wb") as alvo:
+            fcntl.ioctl(alvo.fileno(), _FICLONE, fonte.fileno())
+        shutil.copystat(origem, temporario)
+        os.replace(temporario, destino)
+    finally:
+        if os.path.lexists(temporario):
+            os.remove(temporario)
+
+
+def _copiar(origem, destino, dados):
+    """
+    Cópia comum, em nome temporário + rename
+
+    O rename também evita escrever "através" de um destino que seja hardlink
+    de outro arquivo (o que alteraria esse outro arquivo).
+    """
+    temporario = _temporario(destino)
+    try:
+        if dados is None:
+            shutil.copy2(origem, temporario)
+        else:
+            with open(temporario, "wb") as arquivo:
+                arquivo.write(dados)
+            shutil.copystat(origem, temporario)
+        tamanho = os.path.getsize(temporario)
+        os.replace(temporario, destino)
+    finally:
+        if os.path.lexists(temporario):
+            os.remove(temporario)
+    return tamanho
+
+
+def publicar_original(origem, destino, dados=None, vincular=True):
+    """
+    Coloca o PDF original na pasta do cliente
+
+    Com vincular=True tenta hardlink e depois reflink (nenhum byte copiado);
+    se o sistema de arquivos não permitir, copia. Quando o conteúdo já foi
+    lido (dados), a cópia grava esses bytes em vez de ler a origem de novo.
+
+    Retorna (modo, bytes gravados), com modo "hardlink", "reflink" ou "copia".
+    """
+    if vincular:
+        if os.path.exists(destino) and os.path.samefile(origem, destino):
+            return "hardlink", 0
+        for modo, funcao in (("hardlink", _vincular), ("reflink", _clonar)):
+            try:
+                funcao(origem, destino)
+                return modo, 0
+            except OSError as e:
+                if e.errno not in _ERROS_SEM_VINCULO:
+                    raise
+
+    return "copia", _copiar(origem, destino, dados)
+
+
+def criar_pasta(caminho):
+    """
+    Cria a pasta; retorna False se ela já existia
+
+    Uma chamada só ao disco (em vez de verificar e depois criar), que é o
+    que conta quando a pasta dos clientes está na rede.
+    """
+    try:
+        os.mkdir(caminho)
+        return True
+    except FileExistsError:
+        return False
+    except FileNotFoundError:
+        os.makedirs(caminho, exist_ok=True)  # a pasta de cima ainda não existe
+        return True
+
+
+# Pastas de preparo deixadas por execuções interrompidas são apagadas depois
+# deste tempo (s)
+IDADE_PREPARO_ABANDONADO = 24 * 3600
+
+_PREFIXO_PREPARO = "preparo-"
+
+
+def criar_pasta_preparo(pasta_processados):
+    """
+    Pasta desta execução dentro da pasta de processamento
+
+    Aproveita para apagar as pastas de execuções interrompidas (nada delas
+    chegou às pastas dos clientes, então a execução pode ser refeita).
+    """
+    os.makedirs(pasta_processados, exist_ok=True)
+    limite = time.time() - IDADE_PREPARO_ABANDONADO
+    for entrada in os.scandir(pasta_processados):
+        if entrada.name.startswith(_PREFIXO_PREPARO) and entrada.is_dir():
+            try:
+                if entrada.stat().st_mtime < limite:
+                    shutil.rmtree(entrada.path, ignore_errors=True)
+            except OSError:
+                pass
+    return tempfile.mkdtemp(prefix=_PREFIXO_PREPARO, dir=pasta_processados)
+
+
+def mover_atomico(origem, destino):
+    """
+    Move o arquivo substituindo o destino de uma vez
+
+    No mesmo disco é um rename; em outro disco, cópia para um nome temporário
+    ao lado do destino + rename. Retorna os bytes copiados (0 no rename).
+    """
+    if os.path.exists(destino) and os.path.samefile(origem, destino):
+        # Dois vínculos do mesmo arquivo: o rename não faria nada
+        os.remove(origem)
+        return 0
+    try:
+        os.replace(origem, destino)
+        return 0
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    tamanho = _copiar(origem, destino, None)
+    os.remove(origem)
+    return tamanho
+
+
+def publicar_pasta(preparo, destino):
+    """
+    Publica os arquivos montados em `preparo` na pasta `destino`
+
+    Pasta nova: um único rename da pasta inteira (ela aparece completa para o
+    cliente de sincronização). Pasta existente: um rename por arquivo, em
+    sequência. Retorna {nome do arquivo: bytes copiados}.
+    """
+    nomes = sorted(os.listdir(preparo))
+    if not os.path.exists(destino):
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        try:
+            os.rename(preparo, destino)
+            return {nome: 0 for nome in nomes}
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EEXIST, errno.ENOTEMPTY):
+                raise
+        if not os.path.exists(destino):
+            # Outro disco: copia para uma pasta temporária ao lado e renomeia
+            temporaria = f"{destino}.publicar-tmp"
+            shutil.rmtree(temporaria, ignore_errors=True)
+            shutil.copytree(preparo, temporaria)
+            os.rename(temporaria, destino)
+            copiados = {nome: os.path.getsize(os.path.join(destino, nome)) for nome in nomes}
+            shutil.rmtree(preparo, ignore_errors=True)
+            return copiados
+
+    copiados = {
+        nome: mover_atomico(os.path.join(preparo, nome), os.path.join(destino, nome))
+        for nome in nomes
+    }
+    os.rmdir(preparo)
+    return copiados
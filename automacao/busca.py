@@ -0,0 +1,694 @@
+"""
+Busca no arquivo das pastas dos clientes: texto e tipos de documento
+
+Cada PDF das pastas dos clientes (documentos gerados e originais) tem o
+texto das páginas extraído e classificado uma vez; as palavras de cada
+página vão para um índice invertido (palavra -> páginas) em SQLite, na
+pasta do cache. A indexação é incremental: arquivos com o mesmo tamanho e
+mtime nem são abertos, e um conteúdo já indexado (mesmo hash, outro
+caminho) não é lido de novo. As consultas ("quem não tem
+COMPROVANTE_RESIDENCIA", "procurações que citam X") só leem o índice.
+"""
+
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from automacao.analise import analisar_pdf
+from automacao.cache import DIRETORIO_PADRAO, CachePaginas, hash_arquivo
+from automacao.classificador import TIPO_DESCONHECIDO, obter_classificador
+from automacao.extratores import EXTRATOR_PADRAO, obter_extrator
+from automacao.processamento import TIPOS_PRINCIPAIS
+from automacao.segmentacao import NOMES_DOCUMENTOS
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS conteudos (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    total_paginas INTEGER NOT NULL,
+    classificador TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS arquivos (
+    caminho TEXT PRIMARY KEY,
+    pasta_clientes TEXT NOT NULL,
+    cliente TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    conteudo INTEGER NOT NULL,
+    tipo_pelo_nome TEXT
+);
+CREATE INDEX IF NOT EXISTS arquivos_pasta ON arquivos (pasta_clientes, cliente);
+CREATE INDEX IF NOT EXISTS arquivos_conteudo ON arquivos (conteudo);
+CREATE TABLE IF NOT EXISTS clientes (
+    pasta_clientes TEXT NOT NULL,
+    cliente TEXT NOT NULL,
+    PRIMARY KEY (pasta_clientes, cliente)
+);
+CREATE TABLE IF NOT EXISTS paginas (
+    conteudo INTEGER NOT NULL,
+    pagina INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    confianca REAL NOT NULL,
+    camada TEXT,
+    PRIMARY KEY (conteudo, pagina)
+);
+CREATE TABLE IF NOT EXISTS textos (
+    conteudo INTEGER NOT NULL,
+    pagina INTEGER NOT NULL,
+    texto TEXT NOT NULL,
+    PRIMARY KEY (conteudo, pagina)
+);
+CREATE TABLE IF NOT EXISTS tipos (
+    conteudo INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    PRIMARY KEY (conteudo, tipo)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS termos (
+    termo TEXT NOT NULL,
+    conteudo INTEGER NOT NULL,
+    pagina INTEGER NOT NULL,
+    PRIMARY KEY (termo, conteudo, pagina)
+) WITHOUT ROWID;
+"""
+
+ARQUIVO_INDICE = "busca.sqlite3"
+
+# Palavras mais curtas que isso não entram no índice (nem na consulta)
+TAMANHO_MINIMO_TERMO = 2
+
+# Máximo de páginas devolvidas por consulta
+LIMITE_RESULTADOS = 200
+
+# Caracteres do texto antes e depois da palavra encontrada no trecho
+_CONTEXTO_TRECHO = 80
+
+# Acentos (combinantes) depois da decomposição NFKD e separadores de palavras
+_ACENTOS = re.compile(r"[\u0300-\u036f]")
+_SEPARADORES = re.compile(r"[\W_]+")
+
+# Os originais nas pastas dos clientes são PDFs gravados sem a extensão
+_ASSINATURA_PDF = b"%PDF-"
+
+# Cache de páginas de cada processo do pool da indexação
+_caches_do_processo = {}
+
+
+def _normalizar(caminho):
+    return os.path.normcase(os.path.abspath(caminho))
+
+
+def termos_do_texto(texto):
+    """Palavras distintas do texto, sem acento e em minúsculas"""
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return {
+        termo
+        for termo in _SEPARADORES.split(_ACENTOS.sub("", decomposto))
+        if len(termo) >= TAMANHO_MINIMO_TERMO
+    }
+
+
+def _variantes_acentuadas():
+    """{letra: letras acentuadas dela} no Latin-1 e Latin Extended-A"""
+    variantes = {}
+    for codigo in range(0xC0, 0x180):
+        decomposta = unicodedata.normalize("NFKD", chr(codigo))
+        if len(decomposta) > 1:
+            variantes.setdefault(decomposta[0].lower(), []).append(chr(codigo))
+    return {letra: "".join(acentuadas) for letra, acentuadas in variantes.items()}
+
+
+_VARIANTES = _variantes_acentuadas()
+
+
+@lru_cache(maxsize=256)
+def _padrao_trecho(termos):
+    """Regex das palavras da consulta com ou sem acento, em qualquer caixa"""
+    alternativas = [
+        "".join(
+            f"[{letra}{_VARIANTES[letra]}]"
+            if letra in _VARIANTES
+            else re.escape(letra)
+            for letra in termo
+        )
+        for termo in termos
+    ]
+    return re.compile("|".join(alternativas), re.IGNORECASE)
+
+
+def _trecho(texto, termos):
+    """Pedaço do texto em volta da primeira palavra da consulta encontrada"""
+    encontrada = _padrao_trecho(tuple(termos)).search(texto)
+    posicao = encontrada.start() if encontrada else 0
+    inicio = max(0, posicao - _CONTEXTO_TRECHO)
+    trecho = " ".join(texto[inicio : posicao + 2 * _CONTEXTO_TRECHO].split())
+    return ("…" if inicio else "") + trecho
+
+
+def versao_do_indice(diretorio=DIRETORIO_PADRAO):
+    """
+    Marca que muda a cada gravação no índice (mtime e tamanho dos arquivos
+    do SQLite), para guardar o resultado das consultas entre reruns do app
+    """
+    versao = []
+    for sufixo in ("", "-wal"):
+        try:
+            info = os.stat(os.path.join(diretorio, ARQUIVO_INDICE + sufixo))
+            versao.append((info.st_mtime_ns, info.st_size))
+        except OSError:
+            versao.append(None)
+    return tuple(versao)
+
+
+def _e_pdf(caminho):
+    """PDF pela extensão ou pelo conteúdo (os originais não têm extensão)"""
+    if caminho.lower().endswith(".pdf"):
+        return True
+    try:
+        with open(caminho, "rb") as arquivo:
+            return arquivo.read(len(_ASSINATURA_PDF)) == _ASSINATURA_PDF
+    except OSError:
+        return False
+
+
+def _tipos_pelo_nome(classificador):
+    """{nome do arquivo gerado (sem .pdf): tipo} para os tipos do classificador"""
+    return {NOMES_DOCUMENTOS.get(tipo, tipo): tipo for tipo in classificador.tipos}
+
+
+def analisar_para_indice(caminho, cache=None, extrator=None):
+    """
+    (total de páginas, [(texto, tipo, confiança, camada)]) de um PDF
+
+    Usa o mesmo caminho da organização (analisar_pdf, com o cache de
+    páginas): os originais já organizados costumam vir do cache.
+    """
+    analise = analisar_pdf(
+        caminho,
+        cache=cache,
+        liberar_paginas=True,
+        extrator=obter_extrator(extrator or EXTRATOR_PADRAO),
+    )
+    paginas = [
+        (
+            pagina.texto,
+            pagina.classificacao.tipo,
+            pagina.classificacao.confianca,
+            pagina.camada,
+        )
+        for pagina in analise.paginas
+    ]
+    return analise.total_paginas, paginas
+
+
+def _analisar_no_processo(caminho, diretorio_cache):
+    """analisar_para_indice nos processos do pool (um cache por processo)"""
+    if diretorio_cache and diretorio_cache not in _caches_do_processo:
+        _caches_do_processo[diretorio_cache] = CachePaginas(diretorio_cache)
+    return analisar_para_indice(caminho, _caches_do_processo.get(diretorio_cache))
+
+
+@dataclass
+class ResumoIndexacao:
+    arquivos: int = 0  # PDFs encontrados nas pastas dos clientes
+    analisados: int = 0  # lidos e classificados nesta indexação
+    inalterados: int = 0  # mesmo tamanho e mtime: nem foram abertos
+    reaproveitados: int = 0  # conteúdo já indexado em outro caminho
+    reclassificados: int = 0  # só a classificação refeita (regras mudaram)
+    removidos: int = 0  # saíram das pastas desde a última indexação
+    clientes: int = 0
+    paginas: int = 0  # páginas lidas nesta indexação
+    erros: list = field(default_factory=list)
+    segundos: float = 0.0
+
+
+@dataclass
+class Ocorrencia:
+    """Página que contém todas as palavras da consulta"""
+
+    cliente: str
+    arquivo: str
+    pagina: int  # base 1
+    tipo: str
+    trecho: str
+
+
+@dataclass
+class SituacaoCliente:
+    cliente: str
+    arquivos: int
+    encontrados: list  # tipos de documento presentes em algum PDF da pasta
+    faltando: list  # tipos pedidos que não estão em nenhum PDF da pasta
+
+
+class IndiceBusca:
+    """
+    Índice invertido das páginas dos PDFs das pastas dos clientes
+
+    O texto, o tipo de cada página e as palavras ficam por conteúdo (hash),
+    e os caminhos apontam para o conteúdo: o original e uma cópia dele em
+    outra pasta são indexados uma vez só.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.caminho = os.path.join(diretorio, ARQUIVO_INDICE)
+        self._conexao = sqlite3.connect(self.caminho, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        # O índice pode ser refeito a partir das pastas: sem fsync a cada PDF
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_ESQUEMA)
+        self._tipos_pelo_nome = _tipos_pelo_nome(obter_classificador())
+
+    def close(self):
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Indexação
+
+    def indexar(
+        self,
+        pasta_clientes,
+        workers=1,
+        forcar=False,
+        diretorio_cache=DIRETORIO_PADRAO,
+        ao_concluir=None,
+    ):
+        """
+        Atualiza o índice com os PDFs das pastas dos clientes
+
+        Só são lidos os arquivos novos ou alterados (tamanho/mtime e, se
+        preciso, hash); forcar=True lê tudo de novo. Com workers > 1, a
+        leitura dos PDFs é dividida em processos. ao_concluir(indice, total,
+        caminho) é chamado a cada PDF lido. Devolve um ResumoIndexacao.
+        """
+        inicio = time.perf_counter()
+        resumo = ResumoIndexacao()
+        chave_pasta = _normalizar(pasta_clientes)
+        classificador = obter_classificador()
+
+        registrados = {
+            caminho: (tamanho, mtime_ns)
+            for caminho, tamanho, mtime_ns in self._conexao.execute(
+                "SELECT caminho, tamanho, mtime_ns FROM arquivos WHERE pasta_clientes = ?",
+                (chave_pasta,),
+            )
+        }
+        clientes, encontrados = self._listar_pdfs(pasta_clientes, registrados)
+        resumo.arquivos = len(encontrados)
+        resumo.clientes = len(clientes)
+
+        cache = CachePaginas(diretorio_cache) if diretorio_cache else None
+        try:
+            pendentes = self._separar_pendentes(
+                encontrados, registrados, chave_pasta, cache, forcar, resumo
+            )
+            analises = self._analisar(pendentes, workers, diretorio_cache, cache, resumo)
+            for indice, (hash_conteudo, (total, paginas)) in enumerate(analises):
+                caminhos = pendentes[hash_conteudo]
+                # Um PDF por transação: interrompida, a indexação continua dele
+                with self._conexao:
+                    conteudo = self._guardar_conteudo(
+                        hash_conteudo, total, paginas, classificador.assinatura
+                    )
+                    for caminho, cliente, info in caminhos:
+                        self._registrar_arquivo(
+                            _normalizar(caminho), chave_pasta, cliente, info, conteudo
+                        )
+                resumo.analisados += len(caminhos)
+                resumo.paginas += len(paginas)
+                if ao_concluir is not None:
+                    ao_concluir(indice, len(pendentes), caminhos[0][0])
+        finally:
+            if cache is not None:
+                cache.close()
+
+        vistos = {_normalizar(caminho) for caminho, _, _ in encontrados}
+        resumo.removidos = self._remover_ausentes(chave_pasta, registrados, vistos)
+        with self._conexao:
+            self._conexao.execute(
+                "DELETE FROM clientes WHERE pasta_clientes = ?", (chave_pasta,)
+            )
+            self._conexao.executemany(
+                "INSERT INTO clientes VALUES (?, ?)",
+                [(chave_pasta, cliente) for cliente in clientes],
+            )
+        resumo.reclassificados = self._reclassificar(classificador)
+        resumo.segundos = time.perf_counter() - inicio
+        return resumo
+
+    def _separar_pendentes(
+        self, encontrados, registrados, chave_pasta, cache, forcar, resumo
+    ):
+        """
+        {hash: [(caminho, cliente, stat)]} dos conteúdos que precisam ser lidos
+
+        Os inalterados ficam como estão; os alterados cujo conteúdo já está no
+        índice (ex.: o mesmo original em outra pasta) só passam a apontar
+        para ele.
+        """
+        pendentes = {}
+        with self._conexao:
+            for caminho, cliente, info in encontrados:
+                chave = _normalizar(caminho)
+                if not forcar and registrados.get(chave) == (
+                    info.st_size,
+                    info.st_mtime_ns,
+                ):
+                    resumo.inalterados += 1
+                    continue
+                try:
+                    if cache is not None:
+                        hash_conteudo = cache.hash_do_arquivo(caminho)
+                    else:
+                        hash_conteudo = hash_arquivo(caminho)
+                except OSError as e:
+                    resumo.erros.append(f"{caminho}: {e}")
+                    continue
+                conteudo = self._conteudo(hash_conteudo)
+                if conteudo is not None and not forcar:
+                    resumo.reaproveitados += 1
+                    self._registrar_arquivo(chave, chave_pasta, cliente, info, conteudo)
+                    continue
+                pendentes.setdefault(hash_conteudo, []).append((caminho, cliente, info))
+        return pendentes
+
+    def _listar_pdfs(self, pasta_clientes, registrados):
+        """
+        ([clientes], [(caminho, cliente, stat)]) das pastas dos clientes
+
+        Arquivos sem .pdf já indexados com o mesmo tamanho e mtime não têm a
+        assinatura conferida de novo (nenhuma leitura do conteúdo).
+        """
+        clientes = []
+        encontrados = []
+        try:
+            with os.scandir(pasta_clientes) as entradas:
+                pastas = sorted(
+                    (entrada.name, entrada.path)
+                    for entrada in entradas
+                    if entrada.is_dir()
+                )
+        except OSError:
+            return clientes, encontrados
+
+        for cliente, pasta in pastas:
+            clientes.append(cliente)
+            for raiz, subpastas, nomes in os.walk(pasta):
+                subpastas.sort()
+                for nome in sorted(nomes):
+                    caminho = os.path.join(raiz, nome)
+                    try:
+                        info = os.stat(caminho)
+                    except OSError:
+                        continue
+                    conhecido = registrados.get(_normalizar(caminho)) == (
+                        info.st_size,
+                        info.st_mtime_ns,
+                    )
+                    if conhecido or _e_pdf(caminho):
+                        encontrados.append((caminho, cliente, info))
+        return clientes, encontrados
+
+    def _analisar(self, pendentes, workers, diretorio_cache, cache, resumo):
+        """(hash, (total, páginas)) de cada conteúdo novo, na ordem de pendentes"""
+        caminhos = [arquivos[0][0] for arquivos in pendentes.values()]
+        if workers > 1 and len(caminhos) > 1:
+            max_workers = min(workers, len(caminhos))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futuros = [
+                    executor.submit(_analisar_no_processo, caminho, diretorio_cache)
+                    for caminho in caminhos
+                ]
+                for hash_conteudo, caminho, futuro in zip(pendentes, caminhos, futuros):
+                    try:
+                        yield hash_conteudo, futuro.result()
+                    except Exception as e:
+                        resumo.erros.append(f"{caminho}: {e}")
+            return
+
+        for hash_conteudo, caminho in zip(pendentes, caminhos):
+            try:
+                yield hash_conteudo, analisar_para_indice(caminho, cache)
+            except Exception as e:
+                resumo.erros.append(f"{caminho}: {e}")
+
+    def _conteudo(self, hash_conteudo):
+        linha = self._conexao.execute(
+            "SELECT id FROM conteudos WHERE hash = ?", (hash_conteudo,)
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def _guardar_conteudo(self, hash_conteudo, total, paginas, assinatura):
+        """
+        Grava páginas, tipos e palavras de um conteúdo; devolve o id dele
+
+        Chamado dentro da transação do arquivo (indexar).
+        """
+        conteudo = self._conteudo(hash_conteudo)
+        if conteudo is None:
+            conteudo = self._conexao.execute(
+                "INSERT INTO conteudos (hash, total_paginas, classificador) "
+                "VALUES (?, ?, ?)",
+                (hash_conteudo, total, assinatura),
+            ).lastrowid
+        else:
+            # Lido de novo (forcar): o id continua o mesmo para os outros
+            # caminhos com este conteúdo
+            self._apagar_paginas([conteudo])
+            self._conexao.execute(
+                "UPDATE conteudos SET total_paginas = ?, classificador = ? "
+                "WHERE id = ?",
+                (total, assinatura, conteudo),
+            )
+        self._conexao.executemany(
+            "INSERT INTO paginas VALUES (?, ?, ?, ?, ?)",
+            [
+                (conteudo, numero, tipo, confianca, camada)
+                for numero, (_, tipo, confianca, camada) in enumerate(paginas, 1)
+            ],
+        )
+        self._conexao.executemany(
+            "INSERT INTO textos VALUES (?, ?, ?)",
+            [
+                (conteudo, numero, texto)
+                for numero, (texto, _, _, _) in enumerate(paginas, 1)
+            ],
+        )
+        self._conexao.executemany(
+            "INSERT INTO termos VALUES (?, ?, ?)",
+            [
+                (termo, conteudo, numero)
+                for numero, (texto, _, _, _) in enumerate(paginas, 1)
+                for termo in termos_do_texto(texto)
+            ],
+        )
+        self._guardar_tipos(conteudo, [tipo for _, tipo, _, _ in paginas])
+        return conteudo
+
+    def _guardar_tipos(self, conteudo, tipos_paginas):
+        self._conexao.execute("DELETE FROM tipos WHERE conteudo = ?", (conteudo,))
+        self._conexao.executemany(
+            "INSERT INTO tipos VALUES (?, ?)",
+            [
+                (conteudo, tipo)
+                for tipo in set(tipos_paginas)
+                if tipo != TIPO_DESCONHECIDO
+            ],
+        )
+
+    def _registrar_arquivo(self, caminho, pasta_clientes, cliente, info, conteudo):
+        """Aponta o caminho para o conteúdo (dentro de uma transação)"""
+        nome = os.path.splitext(os.path.basename(caminho))[0].upper()
+        self._conexao.execute(
+            "INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                caminho,
+                pasta_clientes,
+                cliente,
+                info.st_size,
+                info.st_mtime_ns,
+                conteudo,
+                self._tipos_pelo_nome.get(nome),
+            ),
+        )
+
+    def _remover_ausentes(self, pasta_clientes, registrados, vistos):
+        """Tira do índice os arquivos que saíram das pastas; devolve quantos"""
+        ausentes = [(caminho,) for caminho in registrados if caminho not in vistos]
+        with self._conexao:
+            self._conexao.executemany(
+                "DELETE FROM arquivos WHERE caminho = ?", ausentes
+            )
+            # Conteúdos sem nenhum arquivo apontando para eles saem também
+            orfaos = [
+                conteudo
+                for (conteudo,) in self._conexao.execute(
+                    "SELECT id FROM conteudos "
+                    "WHERE id NOT IN (SELECT DISTINCT conteudo FROM arquivos)"
+                )
+            ]
+            self._apagar_conteudos(orfaos)
+        return len(ausentes)
+
+    def _apagar_paginas(self, conteudos):
+        """Páginas, tipos e palavras dos conteúdos (o registro deles fica)"""
+        for tabela in ("termos", "tipos", "textos", "paginas"):
+            self._conexao.executemany(
+                f"DELETE FROM {tabela} WHERE conteudo = ?",
+                [(conteudo,) for conteudo in conteudos],
+            )
+
+    def _apagar_conteudos(self, conteudos):
+        self._apagar_paginas(conteudos)
+        self._conexao.executemany(
+            "DELETE FROM conteudos WHERE id = ?",
+            [(conteudo,) for conteudo in conteudos],
+        )
+
+    def _reclassificar(self, classificador):
+        """
+        Refaz a classificação dos conteúdos indexados com outras regras
+
+        O texto já está no índice: nenhum PDF é aberto. Devolve quantos
+        conteúdos foram reclassificados.
+        """
+        antigos = [
+            conteudo
+            for (conteudo,) in self._conexao.execute(
+                "SELECT id FROM conteudos WHERE classificador != ?",
+                (classificador.assinatura,),
+            )
+        ]
+        for conteudo in antigos:
+            paginas = self._conexao.execute(
+                "SELECT pagina, texto FROM textos WHERE conteudo = ?", (conteudo,)
+            ).fetchall()
+            classificacoes = [
+                (pagina, classificador.classificar(texto)) for pagina, texto in paginas
+            ]
+            with self._conexao:
+                self._conexao.executemany(
+                    "UPDATE paginas SET tipo = ?, confianca = ? "
+                    "WHERE conteudo = ? AND pagina = ?",
+                    [
+                        (classificacao.tipo, classificacao.confianca, conteudo, pagina)
+                        for pagina, classificacao in classificacoes
+                    ],
+                )
+                self._guardar_tipos(
+                    conteudo,
+                    [classificacao.tipo for _, classificacao in classificacoes],
+                )
+                self._conexao.execute(
+                    "UPDATE conteudos SET classificador = ? WHERE id = ?",
+                    (classificador.assinatura, conteudo),
+                )
+        return len(antigos)
+
+    # Consultas
+
+    def total_arquivos(self, pasta_clientes):
+        (total,) = self._conexao.execute(
+            "SELECT COUNT(*) FROM arquivos WHERE pasta_clientes = ?",
+            (_normalizar(pasta_clientes),),
+        ).fetchone()
+        return total
+
+    def buscar(self, pasta_clientes, consulta, tipo=None, limite=LIMITE_RESULTADOS):
+        """
+        Páginas com todas as palavras da consulta (sem acento, em qualquer
+        ordem), opcionalmente só as classificadas como tipo
+        """
+        termos = sorted(termos_do_texto(consulta))
+        if not termos:
+            return []
+        marcadores = ",".join("?" * len(termos))
+        filtro_tipo = "AND p.tipo = ?" if tipo else ""
+        # O texto (para o trecho) só é lido nas páginas que entram no resultado
+        linhas = self._conexao.execute(
+            f"""
+            SELECT r.cliente, r.caminho, r.pagina, r.tipo, x.texto
+            FROM (
+                SELECT a.cliente, a.caminho, p.conteudo, p.pagina, p.tipo
+                FROM (
+                    SELECT conteudo, pagina FROM termos
+                    WHERE termo IN ({marcadores})
+                    GROUP BY conteudo, pagina
+                    HAVING COUNT(*) = ?
+                ) AS t
+                JOIN paginas AS p ON p.conteudo = t.conteudo AND p.pagina = t.pagina
+                JOIN arquivos AS a ON a.conteudo = t.conteudo
+                WHERE a.pasta_clientes = ? {filtro_tipo}
+                ORDER BY a.cliente, a.caminho, p.pagina
+                LIMIT ?
+            ) AS r
+            JOIN textos AS x ON x.conteudo = r.conteudo AND x.pagina = r.pagina
+            ORDER BY r.cliente, r.caminho, r.pagina
+            """,
+            (
+                *termos,
+                len(termos),
+                _normalizar(pasta_clientes),
+                *([tipo] if tipo else []),
+                limite,
+            ),
+        ).fetchall()
+        return [
+            Ocorrencia(cliente, caminho, pagina, tipo_pagina, _trecho(texto, termos))
+            for cliente, caminho, pagina, tipo_pagina, texto in linhas
+        ]
+
+    def situacao_clientes(self, pasta_clientes, tipos=TIPOS_PRINCIPAIS):
+        """
+        Tipos de documento encontrados e faltando na pasta de cada cliente
+
+        Um tipo conta como encontrado se alguma página de algum PDF da pasta
+        foi classificada com ele, ou se há um documento gerado com o nome
+        dele (ex.: COMPROVANTE_RESIDENCIA.pdf montado pelo perfil fixo).
+        """
+        chave_pasta = _normalizar(pasta_clientes)
+        situacao = {
+            cliente: [0, set()]
+            for (cliente,) in self._conexao.execute(
+                "SELECT cliente FROM clientes WHERE pasta_clientes = ? ORDER BY cliente",
+                (chave_pasta,),
+            )
+        }
+        for cliente, arquivos in self._conexao.execute(
+            "SELECT cliente, COUNT(*) FROM arquivos WHERE pasta_clientes = ? "
+            "GROUP BY cliente",
+            (chave_pasta,),
+        ):
+            situacao.setdefault(cliente, [0, set()])[0] = arquivos
+        for cliente, tipo in self._conexao.execute(
+            """
+            SELECT DISTINCT a.cliente, t.tipo
+            FROM arquivos AS a JOIN tipos AS t ON t.conteudo = a.conteudo
+            WHERE a.pasta_clientes = ?
+            UNION
+            SELECT DISTINCT cliente, tipo_pelo_nome FROM arquivos
+            WHERE pasta_clientes = ? AND tipo_pelo_nome IS NOT NULL
+            """,
+            (chave_pasta, chave_pasta),
+        ):
+            situacao.setdefault(cliente, [0, set()])[1].add(tipo)
+        return [
+            SituacaoCliente(
+                cliente,
+                arquivos,
+                sorted(encontrados),
+                sorted(set(tipos) - encontrados),
+            )
+            for cliente, (arquivos, encontrados) in sorted(situacao.items())
+        ]
@@ -0,0 +1,286 @@
+"""Cache persistente (SQLite) do texto e da classificação de cada página"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from automacao.classificador import Classificacao
+
+DIRETORIO_PADRAO = os.environ.get(
+    "AUTOMACAO_CACHE_DIR",
+    str(Path.home() / ".cache" / "automacao_requerimentos"),
+)
+LIMITE_PADRAO_MB = int(os.environ.get("AUTOMACAO_CACHE_MB", "200"))
+
+# Ao estourar o limite, remove as páginas menos usadas até ficar nesta fração
+_FRACAO_APOS_LIMPEZA = 0.9
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    caminho TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documentos (
+    hash TEXT PRIMARY KEY,
+    total_paginas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paginas (
+    hash TEXT NOT NULL,
+    pagina INTEGER NOT NULL,
+    texto TEXT NOT NULL,
+    classificador TEXT,
+    tipo TEXT,
+    confianca REAL,
+    pontuacoes TEXT,
+    tamanho INTEGER NOT NULL,
+    acesso REAL NOT NULL,
+    camada TEXT,
+    PRIMARY KEY (hash, pagina)
+);
+CREATE INDEX IF NOT EXISTS paginas_acesso ON paginas (acesso);
+CREATE TABLE IF NOT EXISTS ocupacao (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    bytes INTEGER NOT NULL
+);
+"""
+
+# Colunas acrescentadas depois da primeira versão do cache
+_COLUNAS_NOVAS = {"camada": "TEXT"}
+
+
+def hash_fluxo(fluxo, tamanho_bloco=1024 * 1024):
+    """SHA-256 do conteúdo de um stream binário (lido em blocos)"""
+    sha = hashlib.sha256()
+    for bloco in iter(lambda: fluxo.read(tamanho_bloco), b""):
+        sha.update(bloco)
+    return sha.hexdigest()
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """SHA-256 do conteúdo do arquivo (lido em blocos)"""
+    with open(caminho, "rb") as arquivo:
+        return hash_fluxo(arquivo, tamanho_bloco)
+
+
+class CachePaginas:
+    """
+    Cache de páginas endereçado pelo conteúdo do arquivo (hash + índice da página)
+
+    O hash de cada caminho também fica guardado junto com tamanho e mtime,
+    então um arquivo que não mudou nem precisa ser lido de novo. O tamanho
+    ocupado fica em uma linha do próprio banco, atualizada na mesma
+    transação de cada gravação: processos do pool, vagas do trabalhador e o
+    app respeitam juntos o mesmo limite.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, limite_mb=LIMITE_PADRAO_MB):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, "paginas.sqlite3")
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self._conexao = sqlite3.connect(self.caminho, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_ESQUEMA)
+        self._atualizar_esquema()
+        with self._conexao:
+            # Cache de uma versão sem a linha de ocupação: soma uma vez só
+            self._conexao.execute(
+                "INSERT OR IGNORE INTO ocupacao "
+                "SELECT 1, COALESCE(SUM(tamanho), 0) FROM paginas"
+            )
+
+    def _atualizar_esquema(self):
+        existentes = {
+            linha[1] for linha in self._conexao.execute("PRAGMA table_info(paginas)")
+        }
+        for coluna, tipo in _COLUNAS_NOVAS.items():
+            if coluna not in existentes:
+                with self._conexao:
+                    self._conexao.execute(f"ALTER TABLE paginas ADD COLUMN {coluna} {tipo}")
+
+    def close(self):
+        self._conexao.close()
+
+    @property
+    def ocupado(self):
+        """Bytes ocupados pelas páginas (de todas as conexões)"""
+        (ocupado,) = self._conexao.execute(
+            "SELECT bytes FROM ocupacao WHERE id = 1"
+        ).fetchone()
+        return ocupado
+
+    @contextmanager
+    def _transacao(self):
+        """Transação com trava de escrita desde o início (BEGIN IMMEDIATE)"""
+        with self._conexao:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            yield self._conexao
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def hash_conhecido(self, caminho, info):
+        """Hash já calculado para o arquivo neste tamanho e mtime (ou None), sem lê-lo"""
+        linha = self._conexao.execute(
+            "SELECT hash FROM arquivos WHERE caminho = ? AND tamanho = ? AND mtime_ns = ?",
+            (os.path.abspath(caminho), info.st_size, info.st_mtime_ns),
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def hash_do_arquivo(self, caminho, info=None):
+        """Hash do conteúdo, reaproveitado enquanto tamanho e mtime não mudarem"""
+        caminho = os.path.abspath(caminho)
+        info = info or os.stat(caminho)
+        hash_conteudo = self.hash_conhecido(caminho, info)
+        if hash_conteudo:
+            return hash_conteudo
+
+        hash_conteudo = hash_arquivo(caminho)
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?, ?)",
+                (caminho, info.st_size, info.st_mtime_ns, hash_conteudo),
+            )
+        return hash_conteudo
+
+    def total_paginas(self, hash_conteudo):
+        linha = self._conexao.execute(
+            "SELECT total_paginas FROM documentos WHERE hash = ?", (hash_conteudo,)
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def registrar_total_paginas(self, hash_conteudo, total):
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO documentos VALUES (?, ?)", (hash_conteudo, total)
+            )
+
+    def obter_paginas(self, hash_conteudo, classificador=None):
+        """
+        Páginas já em cache: {índice: (texto, Classificacao ou None, camada)}
+
+        A classificação só é devolvida se foi feita pelo mesmo classificador
+        (mesma assinatura de regras); caso contrário vem None. A camada de
+        texto ("texto", "imagem" ou "vazia") vem None nas páginas gravadas por
+        versões anteriores.
+        """
+        linhas = self._conexao.execute(
+            "SELECT pagina, texto, classificador, tipo, confianca, pontuacoes, camada "
+            "FROM paginas WHERE hash = ?",
+            (hash_conteudo,),
+        ).fetchall()
+        if not linhas:
+            return {}
+
+        with self._conexao:
+            self._conexao.execute(
+                "UPDATE paginas SET acesso = ? WHERE hash = ?",
+                (time.time(), hash_conteudo),
+            )
+
+        paginas = {}
+        for pagina, texto, assinatura, tipo, confianca, pontuacoes, camada in linhas:
+            classificacao = None
+            if tipo is not None and assinatura == classificador:
+                classificacao = Classificacao(tipo, confianca, json.loads(pontuacoes))
+            paginas[pagina] = (texto, classificacao, camada)
+        return paginas
+
+    def guardar_paginas(self, hash_conteudo, paginas, classificador=None):
+        """Grava {índice: (texto, Classificacao, camada)} e aplica o limite de tamanho"""
+        agora = time.time()
+        linhas = []
+        for pagina, (texto, classificacao, camada) in paginas.items():
+            tipo = confianca = pontuacoes = None
+            if classificacao is not None:
+                tipo = classificacao.tipo
+                confianca = classificacao.confianca
+                pontuacoes = json.dumps(classificacao.pontuacoes)
+            tamanho = len(texto.encode("utf-8")) + 64
+            linhas.append(
+                (
+                    hash_conteudo,
+                    pagina,
+                    texto,
+                    classificador,
+                    tipo,
+                    confianca,
+                    pontuacoes,
+                    tamanho,
+                    agora,
+                    camada,
+                )
+            )
+
+        with self._transacao() as conexao:
+            substituido = self._tamanho_existente(hash_conteudo, list(paginas))
+            conexao.executemany(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                linhas,
+            )
+            conexao.execute(
+                "UPDATE ocupacao SET bytes = bytes + ? WHERE id = 1",
+                (sum(linha[7] for linha in linhas) - substituido,),
+            )
+            ocupado = self.ocupado
+
+        if ocupado > self.limite_bytes:
+            self._remover_menos_usadas()
+
+    def limpar(self):
+        """Apaga todo o conteúdo do cache"""
+        with self._transacao() as conexao:
+            conexao.execute("DELETE FROM paginas")
+            conexao.execute("DELETE FROM documentos")
+            conexao.execute("DELETE FROM arquivos")
+            conexao.execute("UPDATE ocupacao SET bytes = 0 WHERE id = 1")
+
+    def _tamanho_existente(self, hash_conteudo, paginas):
+        marcadores = ",".join("?" * len(paginas))
+        (tamanho,) = self._conexao.execute(
+            f"SELECT COALESCE(SUM(tamanho), 0) FROM paginas "
+            f"WHERE hash = ? AND pagina IN ({marcadores})",
+            (hash_conteudo, *paginas),
+        ).fetchone()
+        return tamanho
+
+    def _remover_menos_usadas(self):
+        """
+        Remove as páginas acessadas há mais tempo (LRU)
+
+        O tamanho ocupado é lido de novo dentro da transação: se outra
+        conexão já liberou espaço, nada é removido.
+        """
+        alvo = self.limite_bytes * _FRACAO_APOS_LIMPEZA
+        with self._transacao() as conexao:
+            ocupado = self.ocupado
+            if ocupado <= self.limite_bytes:
+                return
+            removidas = []
+            liberado = 0
+            for hash_conteudo, pagina, tamanho in conexao.execute(
+                "SELECT hash, pagina, tamanho FROM paginas ORDER BY acesso"
+            ):
+                if ocupado - liberado <= alvo:
+                    break
+                removidas.append((hash_conteudo, pagina))
+                liberado += tamanho
+
+            conexao.executemany(
+                "DELETE FROM paginas WHERE hash = ? AND pagina = ?", removidas
+            )
+            # Documentos sem nenhuma página restante saem do cache também
+            conexao.execute(
+                "DELETE FROM documentos WHERE hash NOT IN (SELECT DISTINCT hash FROM paginas)"
+            )
+            conexao.execute(
+                "UPDATE ocupacao SET bytes = bytes - ? WHERE id = 1", (liberado,)
+            )
@@ -0,0 +1,205 @@
+"""Classificação de páginas por palavras-chave com pontuação ponderada"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+TIPO_DESCONHECIDO = "DESCONHECIDO"
+
+# Pontuação a partir da qual uma página é considerada "forte" (um título completo)
+PONTUACAO_FORTE = 5
+
+# Regras de cada tipo de documento: (padrão, peso)
+# Títulos completos pesam mais que palavras genéricas como "ENDEREÇO" ou "INSS"
+REGRAS_PADRAO = {
+    "RG_CPF": [
+        (r"CARTEIRA DE IDENTIDADE", 5),
+        (r"REGISTRO GERAL", 4),
+        (r"SECRETARIA DE SEGURANÇA PÚBLICA", 3),
+        (r"INSTITUTO DE IDENTIFICAÇÃO", 3),
+        (r"CPF.*\d{3}\.\d{3}\.\d{3}-\d{2}", 3),
+        (r"IDENTIDADE", 1),
+    ],
+    "CERTIDAO_NASCIMENTO": [
+        (r"CERTIDÃO DE NASCIMENTO", 5),
+        (r"REGISTRO CIVIL DAS PESSOAS NATURAIS", 4),
+        (r"NASCI.*EM", 1),
+        (r"FILIAÇÃO", 2),
+        (r"AVOS", 1),
+    ],
+    "COMPROVANTE_RESIDENCIA": [
+        (r"CONTA DE.*LUZ", 4),
+        (r"CONTA DE.*ÁGUA", 4),
+        (r"CONTA DE.*ENERGIA", 4),
+        (r"COMPROVANTE DE RESIDÊNCIA", 5),
+        (r"ENDEREÇO", 1),
+        (r"CEP.*\d{5}-\d{3}", 1),
+    ],
+    "TERMO_REPRESENTACAO": [
+        (r"TERMO DE REPRESENTAÇÃO", 5),
+        (r"AUTORIZAÇÃO DE ACESSO A INFORMAÇÕES PREVIDENCIÁRIAS", 5),
+        (r"INFORMAÇÕES PREVIDENCIÁRIAS", 3),
+        (r"INSS", 1),
+        (r"PREVIDENCIÁRIO", 1),
+    ],
+    "PROCURACAO": [
+        (r"PROCURAÇÃO", 5),
+        (r"OUTORGANTE", 2),
+        (r"OUTORGADO", 2),
+        (r"PODERES", 1),
+    ],
+    "CONTRATO_ADVOCATICIOS": [
+        (r"CONTRATO DE PRESTAÇÃO DE SERVIÇOS ADVOCATÍCIOS", 5),
+        (r"HONORÁRIOS", 2),
+        (r"CLÁUSULA", 1),
+        (r"CONTRATANTE", 1),
+    ],
+}
+
+# Caracteres que encerram o prefixo literal de um padrão
+_METACARACTERES = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+@dataclass(frozen=True)
+class Classificacao:
+    """Resultado da classificação de uma página"""
+
+    tipo: str
+    confianca: float = 0.0
+    pontuacoes: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Regra:
+    tipo: str
+    peso: int
+    gatilho: str
+    verificacao: object  # regex completa, ou None quando o padrão é só o literal
+
+
+def _prefixo_literal(padrao):
+    """Retorna o trecho literal inicial de um padrão (o "gatilho" da regra)"""
+    corte = _METACARACTERES.search(padrao)
+    prefixo = padrao[: corte.start()] if corte else padrao
+    if not prefixo:
+        raise ValueError(f"Padrão sem prefixo literal: {padrao!r}")
+    return prefixo
+
+
+def _alternancia_em_trie(palavras):
+    """
+    Monta uma alternância em forma de árvore de prefixos (ex.: "C(?:PF|EP)").
+
+    O motor de regex descarta cada posição pelo primeiro caractere, o que é
+    bem mais rápido que uma alternância simples com dezenas de ramos.
+    """
+    arvore = {}
+    for palavra in palavras:
+        no = arvore
+        for caractere in palavra:
+            no = no.setdefault(caractere, {})
+        no[""] = True
+
+    def montar(no):
+        ramos = [re.escape(c) + montar(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ""
+        expressao = ramos[0] if len(ramos) == 1 else "(?:" + "|".join(ramos) + ")"
+        # Fim de palavra no meio do caminho: o restante fica opcional (guloso,
+        # então na mesma posição vence sempre o gatilho mais longo)
+        return f"(?:{expressao})?" if "" in no else expressao
+
+    return montar(arvore)
+
+
+class ClassificadorDocumentos:
+    """
+    Compila todas as regras em UMA expressão de gatilhos literais.
+
+    Cada página é varrida uma única vez; as regras com complemento (ex.:
+    "CPF.*000.000.000-00") só são verificadas onde o gatilho aparece.
+    """
+
+    def __init__(self, regras=None):
+        regras = REGRAS_PADRAO if regras is None else regras
+        self.tipos = list(regras)
+
+        # Identifica o conjunto de regras (resultados em cache só valem para ele)
+        self.assinatura = hashlib.sha1(
+            json.dumps([regras, PONTUACAO_FORTE], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+
+        # Agrupar regras pelo gatilho literal (várias regras podem compartilhar um)
+        por_gatilho = {}
+        for tipo, lista in regras.items():
+            for padrao, peso in lista:
+                gatilho = _prefixo_literal(padrao)
+                verificacao = None
+                if gatilho != padrao:
+                    verificacao = re.compile(padrao, re.IGNORECASE)
+                regra = _Regra(tipo, peso, gatilho.upper(), verificacao)
+                por_gatilho.setdefault(regra.gatilho, []).append(regra)
+
+        self._gatilhos = list(por_gatilho)
+        self._regras = [por_gatilho[g] for g in self._gatilhos]
+        self._indices = {g: i for i, g in enumerate(self._gatilhos)}
+        self._regex = re.compile(_alternancia_em_trie(self._gatilhos))
+
+        # A varredura não se sobrepõe: "IDENTIDADE" dentro de "CARTEIRA DE
+        # IDENTIDADE" é consumido pelo gatilho maior, então registramos quais
+        # gatilhos estão contidos em cada um (com o deslocamento)
+        self._contidos = []
+        for gatilho in self._gatilhos:
+            contidos = []
+            for j, outro in enumerate(self._gatilhos):
+                if outro != gatilho:
+                    deslocamento = gatilho.find(outro)
+                    if deslocamento >= 0:
+                        contidos.append((j, deslocamento))
+            self._contidos.append(contidos)
+
+    def classificar(self, text):
+        """Pontua cada tipo de documento e retorna o de maior pontuação"""
+        if not text:
+            return Classificacao(TIPO_DESCONHECIDO)
+
+        # Maiúsculas uma única vez; os padrões são escritos em maiúsculas
+        text = text.upper()
+        atendidas = set()
+        for match in self._regex.finditer(text):
+            indice = self._indices[match.group()]
+            self._verificar(text, indice, match.start(), atendidas)
+            for contido, deslocamento in self._contidos[indice]:
+                self._verificar(text, contido, match.start() + deslocamento, atendidas)
+
+        if not atendidas:
+            return Classificacao(TIPO_DESCONHECIDO)
+
+        pontuacoes = dict.fromkeys(self.tipos, 0)
+        for regra in atendidas:
+            pontuacoes[regra.tipo] += regra.peso
+
+        # Empate: vale a ordem de declaração dos tipos (como no comportamento antigo)
+        melhor = max(self.tipos, key=lambda tipo: pontuacoes[tipo])
+        total = sum(pontuacoes.values())
+        confianca = (pontuacoes[melhor] / total) * min(
+            1.0, pontuacoes[melhor] / PONTUACAO_FORTE
+        )
+        pontuacoes = {tipo: p for tipo, p in pontuacoes.items() if p}
+        return Classificacao(melhor, round(confianca, 3), pontuacoes)
+
+    def _verificar(self, text, indice, posicao, atendidas):
+        """Confirma as regras de um gatilho encontrado na posição informada"""
+        for regra in self._regras[indice]:
+            if regra in atendidas:
+                continue
+            if regra.verificacao is None or regra.verificacao.match(text, posicao):
+                atendidas.add(regra)
+
+
+@lru_cache(maxsize=None)
+def obter_classificador():
+    """Classificador padrão, compilado uma única vez por processo"""
+    return ClassificadorDocumentos()
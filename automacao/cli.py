@@ -0,0 +1,686 @@
+"""
+Execução em lote pela linha de comando, sem Streamlit
+
+Uso:
+    python -m automacao organizar --entrada PASTA_PDFS --clientes PASTA_CLIENTES
+        [--workers N] [--forcar] [--copiar-original] [--perfil-fixo]
+        [--documento-unico [--incluir-restantes]]
+        [--confianca-minima 0.3] [--confianca-documento 0.5]
+        [--documentos-extras] [--ler-todas] [--limite-paginas N]
+        [--extrator pypdf2|pypdfium2|pdfminer]
+        [--relatorio relatorio.json]
+        [--log-desempenho desempenho.csv] [--memoria-limitada] [--limite-memoria MB]
+        [--sem-etapas] [--concorrencia escrita=2,copia=2,fila=2] [--na-fila]
+
+    python -m automacao trabalhador [--vagas 2] [--uma-vez] [--ocioso SEGUNDOS]
+    python -m automacao fila
+    python -m automacao exportar --clientes PASTA_CLIENTES --saida clientes.zip
+        [--pastas "Cliente A" "Cliente B"]
+    python -m automacao indexar --clientes PASTA_CLIENTES [--workers N] [--forcar]
+    python -m automacao buscar --clientes PASTA_CLIENTES PALAVRAS... [--tipo PROCURACAO]
+    python -m automacao faltando --clientes PASTA_CLIENTES
+        [--tipos COMPROVANTE_RESIDENCIA ...]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, replace
+from datetime import datetime
+
+from automacao.busca import LIMITE_RESULTADOS, IndiceBusca
+from automacao.classificador import obter_classificador
+from automacao.clientes import IndicePastasClientes
+from automacao.duplicados import separar_repetidos
+from automacao.exportacao import arquivos_das_pastas, exportar_zip
+from automacao.extratores import EXTRATOR_PADRAO, EXTRATORES
+from automacao.fila import TEMPO_ABANDONO, FilaTrabalhos
+from automacao.manifesto import ManifestoProcessamento
+from automacao.memoria import LIMITE_MEMORIA_PADRAO_MB
+from automacao.metricas import (
+    exportar_csv,
+    linha_desempenho,
+    resumir_etapas,
+    resumir_execucao,
+)
+from automacao.pipeline import CONCORRENCIA_PADRAO, ConcorrenciaEtapas
+from automacao.processamento import (
+    TIPOS_PRINCIPAIS,
+    OpcoesProcessamento,
+    descrever_plano,
+    listar_pdfs,
+    processar_lote,
+    resolver_destinos,
+)
+from automacao.segmentacao import (
+    CONFIANCA_DOCUMENTO_PADRAO,
+    CONFIANCA_MINIMA_PADRAO,
+    descrever_paginas,
+)
+from automacao.trabalhador import VAGAS_PADRAO, executar_trabalhador
+
+
+def _agora():
+    return datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def _avisar(mensagem):
+    """Mensagens de andamento vão para stderr (stdout fica livre para o JSON)"""
+    print(mensagem, file=sys.stderr, flush=True)
+
+
+def executar_organizacao(
+    pdf_files,
+    pasta_clientes,
+    workers=1,
+    ao_concluir=None,
+    manifesto=None,
+    forcar=False,
+    opcoes=None,
+):
+    """
+    Mesmo fluxo de run_automation, devolvendo um relatório serializável em JSON
+
+    ao_concluir(indice, total, resultado) é chamado a cada arquivo concluído.
+    Com um manifesto, arquivos já organizados e inalterados são ignorados
+    (a menos que forcar=True).
+    """
+    relatorio = {
+        "inicio": _agora(),
+        "pasta_clientes": pasta_clientes,
+        "workers": workers,
+        "arquivos": [],
+        "ignorados": [],
+    }
+    inicio = time.perf_counter()
+    pastas_criadas = 0
+    arquivos_organizados = 0
+    resultados = []
+
+    if manifesto is not None:
+        pdf_files, relatorio["ignorados"] = manifesto.separar_pendentes(
+            pdf_files, pasta_clientes, forcar=forcar
+        )
+    # Uma leitura da pasta dos clientes para os originais e os destinos
+    indice_pastas = IndicePastasClientes.carregar(pasta_clientes)
+    separacao = separar_repetidos(
+        pdf_files, pasta_clientes, opcoes, forcar, indice_pastas
+    )
+    pdf_files = separacao.pendentes
+    relatorio["repetidos"] = separacao.duplicados
+    opcoes = replace(
+        opcoes or OpcoesProcessamento(),
+        destinos=resolver_destinos(pdf_files, pasta_clientes, indice_pastas),
+    )
+
+    for indice, resultado in enumerate(
+        processar_lote(pdf_files, pasta_clientes, workers=workers, opcoes=opcoes)
+    ):
+        separacao.anotar(resultado)
+        if resultado.pasta_nova:
+            pastas_criadas += 1
+        arquivos_organizados += resultado.arquivos_organizados
+        if manifesto is not None:
+            manifesto.registrar(resultado, pasta_clientes)
+        resultados.append(resultado)
+        relatorio["arquivos"].append(asdict(resultado))
+        if ao_concluir is not None:
+            ao_concluir(indice, len(pdf_files), resultado)
+
+    arquivos = relatorio["arquivos"]
+    duracao = time.perf_counter() - inicio
+    relatorio["fim"] = _agora()
+    relatorio["duracao"] = round(duracao, 3)
+    relatorio["desempenho"] = resumir_execucao(resultados, duracao)
+    relatorio["etapas"] = resumir_etapas(resultados)
+    relatorio["desempenho_por_arquivo"] = [linha_desempenho(r) for r in resultados]
+    relatorio["resumo"] = {
+        "arquivos": len(arquivos),
+        "ignorados": len(relatorio["ignorados"]),
+        "repetidos": len(relatorio["repetidos"]),
+        "paginas": sum(a["paginas"] for a in arquivos),
+        "paginas_ocr": sum(len(a["paginas_ocr"]) for a in arquivos),
+        "pastas_criadas": pastas_criadas,
+        "arquivos_organizados": arquivos_organizados,
+        "arquivos_com_erro": sum(1 for a in arquivos if a["erro"] is not None),
+        "erros_parciais": sum(len(a["erros"]) for a in arquivos),
+        "bytes_lidos": sum(a["bytes_lidos"] for a in arquivos),
+        "bytes_gravados": sum(a["bytes_gravados"] for a in arquivos),
+    }
+    return relatorio
+
+
+def _gravar_relatorio(relatorio, destino):
+    conteudo = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if destino in (None, "-"):
+        print(conteudo)
+        return
+    with open(destino, "w", encoding="utf-8") as arquivo:
+        arquivo.write(conteudo + "\n")
+    _avisar(f"Relatório gravado em {destino}")
+
+
+def comando_organizar(args):
+    """Organiza os PDFs da pasta de entrada nas pastas dos clientes"""
+    if not os.path.isdir(args.entrada):
+        _avisar(f"Pasta dos PDFs não encontrada: {args.entrada}")
+        return 2
+
+    pdf_files = listar_pdfs(args.entrada)
+    if not pdf_files:
+        _avisar("Nenhum arquivo PDF encontrado para processar")
+    planejados = set()
+
+    def ao_concluir(indice, total, resultado):
+        if resultado.erro is not None:
+            _avisar(f"[{indice + 1}/{total}] ERRO {resultado.arquivo}: {resultado.erro}")
+            return
+        if resultado.simulacao:
+            _avisar(
+                f"[{indice + 1}/{total}] {os.path.basename(resultado.arquivo)} → "
+                f"{resultado.nome_pasta}/ (plano)"
+            )
+            if resultado.pasta_pelo_nome:
+                _avisar(
+                    f"    \"{resultado.pasta_pelo_nome}\" é a pasta já existente "
+                    f"\"{resultado.nome_pasta}\""
+                )
+            for linha in descrever_plano(resultado, planejados):
+                _avisar(f"    {linha}")
+            return
+        documentos = f"{len(resultado.documentos)} documentos"
+        if resultado.pdf_unico:
+            documentos += f" em {os.path.basename(resultado.pdf_unico)}"
+        _avisar(
+            f"[{indice + 1}/{total}] {os.path.basename(resultado.arquivo)} → "
+            f"{resultado.nome_pasta}/ ({documentos} + original)"
+        )
+        if resultado.pasta_pelo_nome:
+            _avisar(
+                f"    \"{resultado.pasta_pelo_nome}\" é a pasta já existente "
+                f"\"{resultado.nome_pasta}\""
+            )
+        for erro in resultado.erros:
+            _avisar(f"    {erro}")
+        for sobreposicao in resultado.sobreposicoes:
+            _avisar(
+                f"    Páginas repetidas de {sobreposicao['outro']}: "
+                f"{descrever_paginas(sobreposicao['paginas'])} "
+                f"(de {sobreposicao['total_paginas']})"
+            )
+        if resultado.paginas_ocr:
+            _avisar(
+                f"    Páginas só com imagem (precisam de OCR): "
+                f"{descrever_paginas(resultado.paginas_ocr)}"
+            )
+        if resultado.documentos_pelo_perfil_fixo:
+            _avisar(
+                "    Cortados pelas páginas fixas (não encontrados pela classificação "
+                "ou com confiança baixa): "
+                f"{', '.join(resultado.documentos_pelo_perfil_fixo)}"
+            )
+
+    opcoes = OpcoesProcessamento(
+        vincular_original=not args.copiar_original,
+        segmentar=not args.perfil_fixo,
+        confianca_minima=args.confianca_minima,
+        confianca_documento=args.confianca_documento,
+        documentos_extras=args.documentos_extras,
+        parar_ao_encontrar=not args.ler_todas,
+        limite_paginas=args.limite_paginas,
+        extrator=args.extrator,
+        memoria_limitada=args.memoria_limitada,
+        limite_memoria_mb=args.limite_memoria,
+        em_etapas=not args.sem_etapas,
+        concorrencia=args.concorrencia,
+        pasta_processados=args.processados,
+        simular=args.simular,
+        ignorar_repetidos=not args.manter_repetidos,
+        comparar_paginas=args.comparar_paginas,
+        documento_unico=args.documento_unico,
+        incluir_restantes=args.incluir_restantes,
+    )
+    if args.na_fila:
+        with FilaTrabalhos() as fila:
+            trabalho_id = fila.enfileirar(
+                pdf_files,
+                args.clientes,
+                opcoes,
+                usuario="linha de comando",
+                workers=args.workers,
+                forcar=args.forcar,
+            )
+        _avisar(
+            f"Execução {trabalho_id} enfileirada com {len(pdf_files)} arquivo(s); "
+            "acompanhe com: python -m automacao fila"
+        )
+        return 0
+
+    with ManifestoProcessamento() as manifesto:
+        relatorio = executar_organizacao(
+            pdf_files,
+            args.clientes,
+            workers=args.workers,
+            ao_concluir=ao_concluir,
+            manifesto=manifesto,
+            forcar=args.forcar,
+            opcoes=opcoes,
+        )
+    relatorio["entrada"] = args.entrada
+    for repetido, igual in relatorio["repetidos"].items():
+        _avisar(f"Repetido (ignorado): {os.path.basename(repetido)} = {igual}")
+    _gravar_relatorio(relatorio, args.relatorio)
+    if args.log_desempenho:
+        with open(args.log_desempenho, "w", encoding="utf-8", newline="") as arquivo:
+            arquivo.write(exportar_csv(relatorio["desempenho_por_arquivo"]))
+        _avisar(f"Log de desempenho gravado em {args.log_desempenho}")
+
+    resumo = relatorio["resumo"]
+    if args.simular:
+        _avisar(
+            f"Simulação: {resumo['arquivos']} arquivo(s), "
+            f"{resumo['pastas_criadas']} pasta(s) nova(s) e "
+            f"{resumo['arquivos_organizados']} arquivo(s) seriam gravados (nada foi gravado)"
+        )
+        return 1 if resumo["arquivos_com_erro"] else 0
+    _avisar(
+        f"{resumo['arquivos']} arquivo(s), {resumo['ignorados']} já organizado(s) ignorado(s), "
+        f"{resumo['repetidos']} repetido(s) ignorado(s), "
+        f"{resumo['pastas_criadas']} pasta(s) nova(s), "
+        f"{resumo['arquivos_organizados']} arquivo(s) organizado(s), "
+        f"{resumo['arquivos_com_erro']} com erro, em {relatorio['duracao']:.1f}s "
+        f"({resumo['bytes_lidos'] / 1048576:.1f} MB lidos, "
+        f"{resumo['bytes_gravados'] / 1048576:.1f} MB gravados)"
+    )
+    return 1 if resumo["arquivos_com_erro"] else 0
+
+
+def comando_trabalhador(args):
+    """Processa as execuções enfileiradas (pelo app ou por organizar --na-fila)"""
+    _avisar(f"Trabalhador iniciado com {args.vagas} vaga(s)")
+    if not executar_trabalhador(
+        vagas=args.vagas,
+        uma_vez=args.uma_vez,
+        tempo_abandono=args.tempo_abandono,
+        ocioso=args.ocioso,
+    ):
+        _avisar("Já existe um trabalhador ativo para esta fila")
+        return 1
+    return 0
+
+
+def comando_fila(args):
+    """Lista as execuções mais recentes e o andamento delas"""
+    with FilaTrabalhos() as fila:
+        trabalhos = fila.listar(limite=args.limite)
+        ativos = fila.trabalhadores_ativos()
+    print(f"Trabalhadores ativos: {len(ativos)}")
+    for trabalho in trabalhos:
+        print(
+            f"#{trabalho.id} {trabalho.estado:<11} "
+            f"{trabalho.concluidos + trabalho.ignorados}/{trabalho.total} arquivo(s) "
+            f"{trabalho.usuario or '-'} {trabalho.criado_em}"
+            + (f" — {trabalho.mensagem}" if trabalho.mensagem else "")
+        )
+    return 0
+
+
+def comando_exportar(args):
+    """Grava as pastas dos clientes em um ZIP, gerado aos poucos"""
+    if args.pastas:
+        pastas = []
+        for nome in args.pastas:
+            pasta = os.path.join(args.clientes, nome)
+            if os.path.isdir(pasta):
+                pastas.append(pasta)
+            else:
+                _avisar(f"Pasta não encontrada: {pasta}")
+    else:
+        try:
+            with os.scandir(args.clientes) as entradas:
+                pastas = sorted(entrada.path for entrada in entradas if entrada.is_dir())
+        except OSError as e:
+            _avisar(f"Não foi possível ler a pasta dos clientes: {e}")
+            return 1
+    arquivos = arquivos_das_pastas(pastas)
+
+    if args.saida == "-":
+        total = exportar_zip(arquivos, sys.stdout.buffer)
+    else:
+        # O ZIP só aparece com o nome final quando está completo
+        temporario = f"{args.saida}.tmp"
+        with open(temporario, "wb") as destino:
+            total = exportar_zip(arquivos, destino)
+        os.replace(temporario, args.saida)
+    _avisar(
+        f"{len(pastas)} pasta(s), {len(arquivos)} arquivo(s): "
+        f"{total / 1048576:.1f} MB em {args.saida}"
+    )
+    return 0
+
+
+def comando_indexar(args):
+    """Atualiza o índice de busca das pastas dos clientes (só o que mudou)"""
+    if not os.path.isdir(args.clientes):
+        _avisar(f"Pasta dos clientes não encontrada: {args.clientes}")
+        return 2
+
+    def ao_concluir(indice, total, caminho):
+        _avisar(f"[{indice + 1}/{total}] {os.path.relpath(caminho, args.clientes)}")
+
+    with IndiceBusca() as indice:
+        resumo = indice.indexar(
+            args.clientes,
+            workers=args.workers,
+            forcar=args.forcar,
+            ao_concluir=ao_concluir,
+        )
+    for erro in resumo.erros:
+        _avisar(f"ERRO {erro}")
+    _avisar(
+        f"{resumo.clientes} cliente(s), {resumo.arquivos} PDF(s): "
+        f"{resumo.analisados} lido(s) ({resumo.paginas} páginas), "
+        f"{resumo.inalterados} inalterado(s), {resumo.reaproveitados} com conteúdo "
+        f"já indexado, {resumo.removidos} removido(s) do índice, "
+        f"{len(resumo.erros)} com erro, em {resumo.segundos:.1f}s"
+    )
+    if resumo.reclassificados:
+        _avisar(
+            f"{resumo.reclassificados} PDF(s) reclassificado(s) com as regras atuais"
+        )
+    return 1 if resumo.erros else 0
+
+
+def comando_buscar(args):
+    """Páginas dos PDFs dos clientes com todas as palavras da consulta"""
+    inicio = time.perf_counter()
+    with IndiceBusca() as indice:
+        if not indice.total_arquivos(args.clientes):
+            _avisar(
+                "Pasta dos clientes ainda não indexada; "
+                "rode: python -m automacao indexar"
+            )
+            return 2
+        ocorrencias = indice.buscar(
+            args.clientes, " ".join(args.palavras), tipo=args.tipo, limite=args.limite
+        )
+    for ocorrencia in ocorrencias:
+        print(
+            f"{ocorrencia.cliente} | {os.path.basename(ocorrencia.arquivo)} "
+            f"p. {ocorrencia.pagina} [{ocorrencia.tipo}] {ocorrencia.trecho}"
+        )
+    _avisar(
+        f"{len(ocorrencias)} página(s) em "
+        f"{len({o.cliente for o in ocorrencias})} cliente(s), "
+        f"em {(time.perf_counter() - inicio) * 1000:.0f} ms"
+    )
+    return 0
+
+
+def comando_faltando(args):
+    """Clientes sem algum dos documentos pedidos em nenhum PDF da pasta"""
+    with IndiceBusca() as indice:
+        if not indice.total_arquivos(args.clientes):
+            _avisar(
+                "Pasta dos clientes ainda não indexada; "
+                "rode: python -m automacao indexar"
+            )
+            return 2
+        situacao = indice.situacao_clientes(args.clientes, args.tipos)
+    pendentes = [cliente for cliente in situacao if cliente.faltando]
+    for cliente in pendentes:
+        print(f"{cliente.cliente}: {', '.join(cliente.faltando)}")
+    _avisar(f"{len(pendentes)} de {len(situacao)} cliente(s) com documentos faltando")
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m automacao",
+        description="Automatizador de Requerimentos - execução sem navegador",
+    )
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    organizar = subcomandos.add_parser(
+        "organizar", help="Organiza os PDFs de uma pasta nas pastas dos clientes"
+    )
+    organizar.add_argument("--entrada", required=True, help="Pasta dos PDFs (WhatsApp)")
+    organizar.add_argument(
+        "--clientes", required=True, help="Pasta onde ficam as pastas dos clientes"
+    )
+    organizar.add_argument(
+        "--workers", type=int, default=1, help="Processos em paralelo (padrão: 1)"
+    )
+    organizar.add_argument(
+        "--forcar",
+        action="store_true",
+        help="Reprocessa também os arquivos já organizados e inalterados "
+        "(os repetidos continuam ignorados; veja --manter-repetidos)",
+    )
+    organizar.add_argument(
+        "--manter-repetidos",
+        action="store_true",
+        help="Processa também os arquivos com o mesmo conteúdo de outra entrada "
+        "ou de um original já organizado",
+    )
+    organizar.add_argument(
+        "--comparar-paginas",
+        action="store_true",
+        help="Avisa dos arquivos que repetem parte das páginas de outro "
+        "(hash de cada página)",
+    )
+    organizar.add_argument(
+        "--copiar-original",
+        action="store_true",
+        help="Sempre copia o PDF original (sem hardlink/reflink)",
+    )
+    organizar.add_argument(
+        "--perfil-fixo",
+        action="store_true",
+        help="Usa sempre as páginas fixas (1-2, 6, 9, 11) em vez da classificação",
+    )
+    organizar.add_argument(
+        "--documento-unico",
+        action="store_true",
+        help="Grava os documentos de cada pacote em um PDF só (DOCUMENTOS.pdf), "
+        "com um marcador por documento",
+    )
+    organizar.add_argument(
+        "--incluir-restantes",
+        action="store_true",
+        help="Com --documento-unico: acrescenta no fim as páginas que não "
+        "entraram em nenhum documento",
+    )
+    organizar.add_argument(
+        "--confianca-minima",
+        type=float,
+        default=CONFIANCA_MINIMA_PADRAO,
+        help="Confiança mínima (0 a 1) para uma página entrar em um documento",
+    )
+    organizar.add_argument(
+        "--confianca-documento",
+        type=float,
+        default=CONFIANCA_DOCUMENTO_PADRAO,
+        help="Confiança média (0 a 1) abaixo da qual um documento principal usa "
+        "as páginas fixas",
+    )
+    organizar.add_argument(
+        "--documentos-extras",
+        action="store_true",
+        help="Grava também os documentos fora dos principais (procuração, "
+        "contrato); se a leitura parar antes do fim do pacote, eles ficam de fora "
+        "(use com --ler-todas)",
+    )
+    organizar.add_argument(
+        "--ler-todas",
+        action="store_true",
+        help="Classifica todas as páginas, mesmo depois de achar os documentos principais",
+    )
+    organizar.add_argument(
+        "--limite-paginas",
+        type=int,
+        default=0,
+        help="Máximo de páginas classificadas por arquivo (0 = todas)",
+    )
+    organizar.add_argument(
+        "--extrator",
+        choices=list(EXTRATORES),
+        default=EXTRATOR_PADRAO,
+        help="Extrator do texto das páginas (pypdfium2 e pdfminer precisam ser instalados)",
+    )
+    organizar.add_argument(
+        "--memoria-limitada",
+        action="store_true",
+        help="Usa pouca memória (mmap, páginas liberadas, gravação direta no disco)",
+    )
+    organizar.add_argument(
+        "--limite-memoria",
+        type=int,
+        default=LIMITE_MEMORIA_PADRAO_MB,
+        metavar="MB",
+        help="Memória para os arquivos em processamento; os demais esperam (0 = sem limite)",
+    )
+    organizar.add_argument(
+        "--sem-etapas",
+        action="store_true",
+        help="Processa um arquivo de cada vez do início ao fim (sem o pipeline em etapas)",
+    )
+    organizar.add_argument(
+        "--concorrencia",
+        type=ConcorrenciaEtapas.de_texto,
+        default=CONCORRENCIA_PADRAO,
+        metavar="ETAPA=N,...",
+        help="Threads por etapa do pipeline (leitura, classificacao, escrita, copia) "
+        "e tamanho das filas (fila); padrão: "
+        + ConcorrenciaEtapas.de_texto(CONCORRENCIA_PADRAO).como_texto(),
+    )
+    organizar.add_argument(
+        "--processados",
+        metavar="PASTA",
+        help="Monta os arquivos de cada cliente nesta pasta e publica a pasta do "
+        "cliente de uma vez quando ela está completa",
+    )
+    organizar.add_argument(
+        "--simular",
+        action="store_true",
+        help="Só mostra o plano (pastas e arquivos a criar ou substituir), sem gravar",
+    )
+    organizar.add_argument(
+        "--relatorio",
+        default="-",
+        help="Arquivo do relatório JSON (padrão: saída padrão)",
+    )
+    organizar.add_argument(
+        "--log-desempenho",
+        help="Grava também o desempenho por arquivo/etapa em CSV",
+    )
+    organizar.add_argument(
+        "--na-fila",
+        action="store_true",
+        help="Só enfileira a execução; quem processa é o trabalhador",
+    )
+    organizar.set_defaults(funcao=comando_organizar)
+
+    trabalhador = subcomandos.add_parser(
+        "trabalhador", help="Processa as execuções enfileiradas pelo app"
+    )
+    trabalhador.add_argument(
+        "--vagas",
+        type=int,
+        default=VAGAS_PADRAO,
+        help="Execuções processadas ao mesmo tempo (padrão: AUTOMACAO_VAGAS ou 2)",
+    )
+    trabalhador.add_argument(
+        "--uma-vez",
+        action="store_true",
+        help="Processa o que está na fila e termina",
+    )
+    trabalhador.add_argument(
+        "--tempo-abandono",
+        type=float,
+        default=TEMPO_ABANDONO,
+        metavar="SEGUNDOS",
+        help="Sem sinal de vida por este tempo, a execução volta para a fila",
+    )
+    trabalhador.add_argument(
+        "--ocioso",
+        type=float,
+        default=0,
+        metavar="SEGUNDOS",
+        help="Termina depois de tanto tempo sem execuções na fila (0 = nunca)",
+    )
+    trabalhador.set_defaults(funcao=comando_trabalhador)
+
+    fila = subcomandos.add_parser("fila", help="Lista as execuções enfileiradas")
+    fila.add_argument("--limite", type=int, default=20)
+    fila.set_defaults(funcao=comando_fila)
+
+    exportar = subcomandos.add_parser(
+        "exportar", help="Grava as pastas dos clientes em um arquivo ZIP"
+    )
+    exportar.add_argument(
+        "--clientes", required=True, help="Pasta onde ficam as pastas dos clientes"
+    )
+    exportar.add_argument(
+        "--saida", required=True, help="Arquivo ZIP a gravar (- = saída padrão)"
+    )
+    exportar.add_argument(
+        "--pastas",
+        nargs="+",
+        metavar="NOME",
+        help="Só estas pastas de clientes (padrão: todas)",
+    )
+    exportar.set_defaults(funcao=comando_exportar)
+
+    indexar = subcomandos.add_parser(
+        "indexar", help="Atualiza o índice de busca das pastas dos clientes"
+    )
+    indexar.add_argument(
+        "--clientes", required=True, help="Pasta onde ficam as pastas dos clientes"
+    )
+    indexar.add_argument(
+        "--workers", type=int, default=1, help="Processos em paralelo (padrão: 1)"
+    )
+    indexar.add_argument(
+        "--forcar",
+        action="store_true",
+        help="Lê de novo todos os PDFs, mesmo os inalterados",
+    )
+    indexar.set_defaults(funcao=comando_indexar)
+
+    tipos = obter_classificador().tipos
+    buscar = subcomandos.add_parser(
+        "buscar", help="Procura palavras nos PDFs das pastas dos clientes (indexadas)"
+    )
+    buscar.add_argument(
+        "--clientes", required=True, help="Pasta onde ficam as pastas dos clientes"
+    )
+    buscar.add_argument("palavras", nargs="+", help="Palavras (todas na mesma página)")
+    buscar.add_argument("--tipo", choices=tipos, help="Só páginas deste tipo")
+    buscar.add_argument("--limite", type=int, default=LIMITE_RESULTADOS)
+    buscar.set_defaults(funcao=comando_buscar)
+
+    faltando = subcomandos.add_parser(
+        "faltando", help="Lista os clientes sem algum dos documentos (indexados)"
+    )
+    faltando.add_argument(
+        "--clientes", required=True, help="Pasta onde ficam as pastas dos clientes"
+    )
+    faltando.add_argument(
+        "--tipos",
+        nargs="+",
+        choices=tipos,
+        default=sorted(TIPOS_PRINCIPAIS),
+        metavar="TIPO",
+        help="Tipos de documento exigidos (padrão: os documentos principais)",
+    )
+    faltando.set_defaults(funcao=comando_faltando)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    return args.funcao(args)
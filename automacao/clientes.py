@@ -0,0 +1,137 @@
+"""
+Índice das pastas de clientes, com os nomes normalizados
+
+Uma única leitura da pasta dos clientes por execução; depois disso, achar a
+pasta de um cliente não acessa o disco (que pode ser o Drive na rede).
+"Joao Silva", "JOÃO  SILVA" e "Silva Joao" caem na mesma pasta; nomes quase
+iguais (um erro de digitação) também, acima de SIMILARIDADE_MINIMA.
+"""
+
+import os
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+# Semelhança mínima (0 a 1) entre dois nomes para serem o mesmo cliente.
+# Alta de propósito: "Maria Souza" x "Mario Souza" (0,91) são pessoas diferentes
+SIMILARIDADE_MINIMA = 0.95
+
+
+def normalizar_nome(nome):
+    """Palavras do nome sem acento, em minúsculas e sem pontuação"""
+    decomposto = unicodedata.normalize("NFKD", nome)
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return re.sub(r"[\W_]+", " ", sem_acento.casefold()).split()
+
+
+@dataclass
+class DestinoCliente:
+    """Pasta de um cliente, resolvida pelo índice no início da execução"""
+
+    caminho: str
+    existente: bool  # a pasta já existia no início da execução (None = não verificado)
+    # Pasta que o nome do arquivo daria, quando o índice escolheu outra
+    pasta_pelo_nome: str = ""
+
+
+class IndicePastasClientes:
+    """
+    Pastas de clientes por nome normalizado (com e sem a ordem das palavras)
+
+    As pastas criadas durante a execução entram no índice com registrar(),
+    para os próximos arquivos do mesmo cliente irem para elas.
+    """
+
+    def __init__(self, pasta_clientes, nomes_pastas=()):
+        self.pasta_clientes = pasta_clientes
+        self._existentes = set()
+        self._por_nome = {}  # {palavras normalizadas: pasta}
+        self._por_palavras = {}  # {palavras em ordem alfabética: pasta}
+        self._com_palavra = {}  # {palavra: chaves de _por_palavras que a contêm}
+        for nome_pasta in nomes_pastas:
+            self._existentes.add(nome_pasta)
+            self.registrar(nome_pasta)
+
+    @classmethod
+    def carregar(cls, pasta_clientes):
+        """Índice montado com uma única leitura da pasta dos clientes"""
+        try:
+            with os.scandir(pasta_clientes) as entradas:
+                nomes = sorted(entrada.name for entrada in entradas if entrada.is_dir())
+        except OSError:
+            nomes = []  # pasta ainda não existe: todos os clientes são novos
+        return cls(pasta_clientes, nomes)
+
+    def __len__(self):
+        return len(self._existentes)
+
+    @property
+    def pastas_existentes(self):
+        """Pastas que já existiam quando o índice foi carregado"""
+        return sorted(self._existentes)
+
+    def registrar(self, nome_pasta):
+        palavras = normalizar_nome(nome_pasta)
+        if not palavras:
+            return
+        chave = " ".join(sorted(palavras))
+        self._por_nome.setdefault(" ".join(palavras), nome_pasta)
+        self._por_palavras.setdefault(chave, nome_pasta)
+        for palavra in palavras:
+            self._com_palavra.setdefault(palavra, set()).add(chave)
+
+    def procurar(self, nome_pasta):
+        """Pasta já conhecida para o nome (ou None)"""
+        palavras = normalizar_nome(nome_pasta)
+        if not palavras:
+            return None
+        pasta = self._por_nome.get(" ".join(palavras))
+        if pasta is None:
+            pasta = self._por_palavras.get(" ".join(sorted(palavras)))
+        if pasta is None:
+            pasta = self._mais_parecida(palavras)
+        return pasta
+
+    def _mais_parecida(self, palavras):
+        """
+        Só para nomes sem correspondência exata (cliente novo ou erro de digitação)
+
+        Os candidatos são as pastas com tamanho próximo e todas as palavras
+        iguais menos uma (a do erro); os demais nem são comparados.
+        """
+        chave = " ".join(sorted(palavras))
+        folga = len(chave) * (1 - SIMILARIDADE_MINIMA) * 2 + 1
+        distintas = set(palavras)
+        comuns = Counter()
+        for palavra in distintas:
+            comuns.update(self._com_palavra.get(palavra, ()))
+        minimo = max(1, len(distintas) - 1)
+        candidatas = [outra for outra, total in comuns.items() if total >= minimo]
+        melhor = None
+        maior = SIMILARIDADE_MINIMA
+        comparador = SequenceMatcher(b=chave, autojunk=False)
+        for outra in sorted(candidatas):
+            if abs(len(outra) - len(chave)) > folga:
+                continue
+            pasta = self._por_palavras[outra]
+            comparador.set_seq1(outra)
+            if comparador.real_quick_ratio() < maior or comparador.quick_ratio() < maior:
+                continue
+            similaridade = comparador.ratio()
+            if similaridade >= maior:
+                melhor, maior = pasta, similaridade
+        return melhor
+
+    def destino(self, nome_pasta):
+        """Pasta do cliente: a existente com nome equivalente ou uma nova"""
+        pasta = self.procurar(nome_pasta)
+        if pasta is None:
+            self.registrar(nome_pasta)
+            pasta = nome_pasta
+        return DestinoCliente(
+            caminho=os.path.join(self.pasta_clientes, pasta),
+            existente=pasta in self._existentes,
+            pasta_pelo_nome=nome_pasta if pasta != nome_pasta else "",
+        )
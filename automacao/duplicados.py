@@ -0,0 +1,294 @@
+"""
+Arquivos repetidos: o mesmo PDF recebido mais de uma vez
+
+O WhatsApp costuma entregar o mesmo arquivo com nomes diferentes
+("doc (1).pdf", "doc (2).pdf"). O hash do conteúdo de cada arquivo de
+entrada é comparado com o das outras entradas e com o dos originais já
+organizados nas pastas dos clientes; opcionalmente, também página a página,
+para avisar de pacotes que repetem só parte das páginas de outro.
+"""
+
+import json
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from automacao.analise import hash_pagina, liberar_objetos
+from automacao.cache import DIRETORIO_PADRAO, CachePaginas
+from automacao.processamento import OpcoesProcessamento
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS hashes_paginas (
+    hash TEXT PRIMARY KEY,
+    paginas TEXT NOT NULL
+);
+"""
+
+# Os originais nas pastas dos clientes são PDFs gravados sem a extensão
+_ASSINATURA_PDF = b"%PDF-"
+
+# Sufixo das cópias baixadas de novo: "doc (1).pdf", "doc (2).pdf"
+_SUFIXO_COPIA = re.compile(r"\s*\((\d+)\)$")
+
+
+@dataclass
+class Sobreposicao:
+    """Páginas de um arquivo que também estão em outro (entrada ou original)"""
+
+    arquivo: str
+    outro: str
+    paginas: list  # páginas (base 1) do arquivo presentes no outro
+    total_paginas: int
+
+
+@dataclass
+class SeparacaoDuplicados:
+    pendentes: list = field(default_factory=list)
+    # {arquivo repetido: arquivo de mesmo conteúdo (entrada anterior ou original)}
+    duplicados: dict = field(default_factory=dict)
+    sobreposicoes: list = field(default_factory=list)
+
+    def anotar(self, resultado):
+        """Copia para o resultado do arquivo as sobreposições dele"""
+        resultado.sobreposicoes = [
+            {
+                "outro": sobreposicao.outro,
+                "paginas": sobreposicao.paginas,
+                "total_paginas": sobreposicao.total_paginas,
+            }
+            for sobreposicao in self.sobreposicoes
+            if sobreposicao.arquivo == resultado.arquivo
+        ]
+
+
+def originais_organizados(pasta_clientes, nomes_pastas=None, hash_conhecido=None):
+    """
+    Originais (PDFs sem extensão) dentro das pastas dos clientes
+
+    Retorna [(caminho, os.stat_result, hash ou None)]. Com nomes_pastas (do
+    índice das pastas já carregado), a pasta dos clientes não é lida de
+    novo. Um arquivo que hash_conhecido(caminho, info) reconhece pelo
+    caminho, tamanho e mtime não é aberto; só os desconhecidos têm o começo
+    lido para conferir se são PDF.
+    """
+    if nomes_pastas is None:
+        try:
+            with os.scandir(pasta_clientes) as entradas:
+                nomes_pastas = [entrada.name for entrada in entradas if entrada.is_dir()]
+        except OSError:
+            return []
+    originais = []
+    for nome_pasta in nomes_pastas:
+        try:
+            with os.scandir(os.path.join(pasta_clientes, nome_pasta)) as entradas:
+                entradas = list(entradas)
+        except OSError:
+            continue
+        for entrada in entradas:
+            if entrada.name.lower().endswith(".pdf"):
+                continue
+            try:
+                if not entrada.is_file():
+                    continue
+                info = entrada.stat()
+                hash_conteudo = hash_conhecido(entrada.path, info) if hash_conhecido else None
+                if hash_conteudo is None:
+                    with open(entrada.path, "rb") as arquivo:
+                        if arquivo.read(len(_ASSINATURA_PDF)) != _ASSINATURA_PDF:
+                            continue
+            except OSError:
+                continue
+            originais.append((entrada.path, info, hash_conteudo))
+    return originais
+
+
+def _preferencia(pdf_path):
+    """Ordem de escolha entre entradas iguais: o nome sem " (n)" primeiro"""
+    stem = Path(pdf_path).stem
+    sufixo = _SUFIXO_COPIA.search(stem)
+    return (int(sufixo.group(1)) if sufixo else 0, str(pdf_path))
+
+
+def _copia_da_entrada(original, pdf_path):
+    """O original é a cópia que a própria entrada gerou antes (mesmo nome)"""
+    return os.path.basename(original) == Path(pdf_path).stem.upper()
+
+
+class IndiceConteudo:
+    """
+    Hash do conteúdo dos arquivos e das páginas
+
+    O hash dos arquivos vem do cache de páginas (reaproveitado enquanto
+    tamanho e mtime não mudam, e de novo na classificação); o das páginas
+    fica guardado pelo hash do arquivo, então cada PDF é lido uma vez só.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self._cache = CachePaginas(diretorio)
+        self._conexao = sqlite3.connect(
+            os.path.join(diretorio, "conteudo.sqlite3"), timeout=30
+        )
+        self._conexao.executescript(_ESQUEMA)
+
+    def close(self):
+        self._conexao.close()
+        self._cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def hash_do_arquivo(self, caminho, info=None):
+        return self._cache.hash_do_arquivo(caminho, info)
+
+    def hashes_paginas(self, caminho, hash_conteudo):
+        """Hash de cada página (None nas páginas em branco); [] se não abrir"""
+        linha = self._conexao.execute(
+            "SELECT paginas FROM hashes_paginas WHERE hash = ?", (hash_conteudo,)
+        ).fetchone()
+        if linha:
+            return json.loads(linha[0])
+
+        from automacao.leitor import LeitorSobDemanda
+
+        try:
+            with open(caminho, "rb") as arquivo:
+                pdf_reader = LeitorSobDemanda(arquivo)
+                hashes = []
+                for pagina in pdf_reader.pages:
+                    hashes.append(hash_pagina(pagina))
+                    liberar_objetos(pdf_reader)
+        except Exception:
+            return []  # PDF com defeito: o erro aparece no processamento
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO hashes_paginas VALUES (?, ?)",
+                (hash_conteudo, json.dumps(hashes)),
+            )
+        return hashes
+
+    def separar_duplicados(
+        self,
+        pdf_files,
+        pasta_clientes,
+        comparar_paginas=False,
+        forcar=False,
+        nomes_pastas=None,
+    ):
+        """
+        Divide os arquivos em pendentes e duplicados (mesmo conteúdo)
+
+        Entre entradas iguais fica uma só, a de nome sem " (n)" (e, no
+        empate, a primeira em ordem alfabética), qualquer que seja a ordem
+        de pdf_files. Uma entrada igual a um original já organizado também
+        é ignorada; com forcar, a não ser que o original seja a cópia gerada
+        por ela mesma (reprocessamento). Com comparar_paginas, os pendentes
+        que repetem parte das páginas de outro arquivo são informados em
+        sobreposicoes (mas processados normalmente).
+        """
+        separacao = SeparacaoDuplicados()
+        existentes = {}  # {hash: [originais]}
+        originais = originais_organizados(
+            pasta_clientes, nomes_pastas, self._cache.hash_conhecido
+        )
+        for original, info, hash_conteudo in originais:
+            try:
+                hash_conteudo = hash_conteudo or self.hash_do_arquivo(original, info)
+            except OSError:
+                continue
+            existentes.setdefault(hash_conteudo, []).append(original)
+
+        hashes = {}  # {entrada: hash}, sem as que não puderam ser lidas
+        for pdf_path in pdf_files:
+            try:
+                hashes[str(pdf_path)] = self.hash_do_arquivo(pdf_path)
+            except OSError:
+                pass  # o erro aparece no processamento
+
+        ordem = sorted(hashes, key=_preferencia)
+        mantidos = {}  # {hash: entrada mantida ou original de mesmo conteúdo}
+        if forcar:
+            # Reprocessamento: fica a entrada que gerou o original
+            for pdf_path in ordem:
+                hash_conteudo = hashes[pdf_path]
+                iguais = existentes.get(hash_conteudo, [])
+                if any(_copia_da_entrada(original, pdf_path) for original in iguais):
+                    mantidos.setdefault(hash_conteudo, pdf_path)
+        for hash_conteudo, iguais in existentes.items():
+            mantidos.setdefault(hash_conteudo, iguais[0])
+        for pdf_path in ordem:
+            mantidos.setdefault(hashes[pdf_path], pdf_path)
+
+        for pdf_path in dict.fromkeys(pdf_files):
+            mantido = mantidos.get(hashes.get(str(pdf_path)), str(pdf_path))
+            if mantido == str(pdf_path):
+                separacao.pendentes.append(pdf_path)
+            else:
+                separacao.duplicados[str(pdf_path)] = mantido
+
+        if comparar_paginas:
+            separacao.sobreposicoes = self._sobreposicoes(
+                separacao.pendentes,
+                hashes,
+                {hash_conteudo: iguais[0] for hash_conteudo, iguais in existentes.items()},
+            )
+        return separacao
+
+    def _sobreposicoes(self, pendentes, hashes, existentes):
+        """Páginas de cada pendente que aparecem nos originais ou nos pendentes anteriores"""
+        onde = {}  # {hash da página: [arquivos em que ela aparece]}
+
+        def indexar(caminho, hash_conteudo):
+            for hash_da_pagina in set(self.hashes_paginas(caminho, hash_conteudo)):
+                if hash_da_pagina is not None:
+                    onde.setdefault(hash_da_pagina, []).append(str(caminho))
+
+        # Original igual a um pendente (reprocessamento forçado) não conta
+        dos_pendentes = set(hashes.values())
+        for hash_conteudo, original in existentes.items():
+            if hash_conteudo not in dos_pendentes:
+                indexar(original, hash_conteudo)
+
+        sobreposicoes = []
+        for pdf_path in pendentes:
+            hash_conteudo = hashes.get(str(pdf_path))
+            if hash_conteudo is None:
+                continue
+            paginas = self.hashes_paginas(pdf_path, hash_conteudo)
+            comuns = {}  # {outro arquivo: páginas em comum}
+            for numero, hash_da_pagina in enumerate(paginas, 1):
+                for outro in dict.fromkeys(onde.get(hash_da_pagina, [])):
+                    comuns.setdefault(outro, []).append(numero)
+            sobreposicoes += [
+                Sobreposicao(str(pdf_path), outro, numeros, len(paginas))
+                for outro, numeros in comuns.items()
+            ]
+            indexar(pdf_path, hash_conteudo)
+        return sobreposicoes
+
+
+def separar_repetidos(
+    pdf_files, pasta_clientes, opcoes=None, forcar=False, indice_pastas=None
+):
+    """
+    separar_duplicados conforme as opções do processamento
+
+    Com o índice das pastas dos clientes (IndicePastasClientes), a pasta
+    dos clientes não é lida de novo para achar os originais.
+    """
+    opcoes = opcoes or OpcoesProcessamento()
+    if not opcoes.ignorar_repetidos:
+        return SeparacaoDuplicados(pendentes=list(pdf_files))
+    with IndiceConteudo(opcoes.diretorio_cache or DIRETORIO_PADRAO) as indice:
+        return indice.separar_duplicados(
+            pdf_files,
+            pasta_clientes,
+            comparar_paginas=opcoes.comparar_paginas,
+            forcar=forcar,
+            nomes_pastas=indice_pastas.pastas_existentes if indice_pastas else None,
+        )
@@ -0,0 +1,168 @@
+"""
+Exportação das pastas dos clientes em ZIP, gerado aos poucos
+
+Na versão hospedada as pastas ficam no servidor, fora do alcance do usuário;
+o ZIP é a forma de levá-las. Ele é montado em blocos, na ordem em que é
+enviado (o ZIP inteiro nunca fica na memória nem em um arquivo temporário),
+e os PDFs entram sem compressão (ZIP_STORED): já são comprimidos, e
+recomprimir só gastaria CPU. Os demais arquivos usam ZIP_DEFLATED.
+"""
+
+import os
+import zipfile
+from dataclasses import dataclass
+
+# Tamanho dos blocos lidos dos arquivos e entregues pelo gerar_zip
+TAMANHO_BLOCO = 1048576
+
+# Tamanho máximo (MB) de cada parte baixada pelo app (0 = uma parte só).
+# O download do Streamlit guarda a parte inteira na memória do servidor até o
+# próximo rerun da sessão, então este é também o limite de memória do ZIP por
+# sessão (vezes o número de sessões baixando ao mesmo tempo)
+LIMITE_PARTE_MB = int(os.environ.get("AUTOMACAO_ZIP_MB", "100"))
+
+_ASSINATURA_PDF = b"%PDF-"
+
+
+@dataclass
+class ArquivoExportado:
+    caminho: str
+    nome: str  # caminho dentro do ZIP ("Cliente/arquivo")
+    tamanho: int
+
+    @property
+    def pasta(self):
+        return self.nome.split("/", 1)[0]
+
+
+def arquivos_das_pastas(pastas):
+    """Arquivos das pastas (e subpastas), com o nome que terão dentro do ZIP"""
+    arquivos = []
+    for pasta in dict.fromkeys(pastas):
+        base = os.path.dirname(os.path.normpath(pasta))
+        for raiz, subpastas, nomes in os.walk(pasta):
+            subpastas.sort()
+            for nome in sorted(nomes):
+                caminho = os.path.join(raiz, nome)
+                try:
+                    tamanho = os.path.getsize(caminho)
+                except OSError:
+                    continue
+                nome_zip = os.path.relpath(caminho, base).replace(os.sep, "/")
+                arquivos.append(ArquivoExportado(caminho, nome_zip, tamanho))
+    return arquivos
+
+
+def dividir_em_partes(arquivos, limite_mb=LIMITE_PARTE_MB):
+    """
+    Arquivos em partes de até limite_mb cada
+
+    A pasta de um cliente só é dividida entre partes quando sozinha passa do
+    limite.
+    """
+    if not arquivos:
+        return []
+    if limite_mb <= 0:
+        return [list(arquivos)]
+    limite = limite_mb * 1048576
+
+    por_pasta = {}
+    for arquivo in arquivos:
+        por_pasta.setdefault(arquivo.pasta, []).append(arquivo)
+
+    partes = [[]]
+    tamanho_parte = 0
+    for pasta in por_pasta.values():
+        tamanho_pasta = sum(arquivo.tamanho for arquivo in pasta)
+        if partes[-1] and tamanho_parte + tamanho_pasta > limite:
+            partes.append([])
+            tamanho_parte = 0
+        for arquivo in pasta:
+            if partes[-1] and tamanho_parte + arquivo.tamanho > limite:
+                partes.append([])
+                tamanho_parte = 0
+            partes[-1].append(arquivo)
+            tamanho_parte += arquivo.tamanho
+    return partes
+
+
+def _e_pdf(caminho):
+    """PDF pela extensão ou pelo conteúdo (os originais não têm extensão)"""
+    if caminho.lower().endswith(".pdf"):
+        return True
+    try:
+        with open(caminho, "rb") as arquivo:
+            return arquivo.read(len(_ASSINATURA_PDF)) == _ASSINATURA_PDF
+    except OSError:
+        return False
+
+
+class _SaidaEmBlocos:
+    """
+    Destino do ZipFile sem seek
+
+    Sem seek, o zipfile grava cada entrada uma única vez, em sequência (com
+    o descritor de dados depois do conteúdo), e os bytes gravados podem ser
+    entregues e descartados logo em seguida.
+    """
+
+    def __init__(self):
+        self._blocos = []
+
+    def write(self, dados):
+        self._blocos.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        dados = b"".join(self._blocos)
+        self._blocos.clear()
+        return dados
+
+
+def gerar_zip(arquivos, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Bytes do ZIP em blocos (gerador)
+
+    A memória usada é a de um bloco, qualquer que seja o tamanho dos
+    arquivos. Arquivos removidos depois de listados ficam de fora.
+    """
+    saida = _SaidaEmBlocos()
+    with zipfile.ZipFile(saida, "w") as zip_saida:
+        for arquivo in arquivos:
+            try:
+                info = zipfile.ZipInfo.from_file(
+                    arquivo.caminho, arquivo.nome, strict_timestamps=False
+                )
+                origem = open(arquivo.caminho, "rb")
+            except OSError:
+                continue
+            info.compress_type = (
+                zipfile.ZIP_STORED if _e_pdf(arquivo.caminho) else zipfile.ZIP_DEFLATED
+            )
+            with origem, zip_saida.open(
+                info, "w", force_zip64=info.file_size >= zipfile.ZIP64_LIMIT
+            ) as destino:
+                while True:
+                    bloco = origem.read(tamanho_bloco)
+                    if not bloco:
+                        break
+                    destino.write(bloco)
+                    dados = saida.retirar()
+                    if dados:
+                        yield dados
+            dados = saida.retirar()
+            if dados:
+                yield dados
+    yield saida.retirar()  # diretório central
+
+
+def exportar_zip(arquivos, destino):
+    """Grava o ZIP em um arquivo binário aberto; retorna os bytes gravados"""
+    total = 0
+    for dados in gerar_zip(arquivos):
+        destino.write(dados)
+        total += len(dados)
+    return total
@@ -0,0 +1,167 @@
+"""
+Extratores do texto das páginas
+
+PyPDF2 é o padrão (sempre instalado). pypdfium2 e pdfminer.six são opcionais:
+basta instalar o pacote e escolher o extrator (AUTOMACAO_EXTRATOR, --extrator
+na linha de comando ou a opção no app).
+"""
+
+import importlib.util
+import os
+from io import StringIO
+
+EXTRATOR_PADRAO = os.environ.get("AUTOMACAO_EXTRATOR", "pypdf2")
+
+
+class ExtratorTexto:
+    """Interface: abre o documento uma vez e extrai o texto página a página"""
+
+    nome = ""
+    modulo = ""  # módulo que precisa estar instalado
+    pacote = ""  # nome no pip
+
+    @classmethod
+    def disponivel(cls):
+        return importlib.util.find_spec(cls.modulo) is not None
+
+    def abrir(self, origem, pdf_reader=None):
+        """Documento pronto para extração; origem é um caminho ou um stream"""
+        raise NotImplementedError
+
+    def total_paginas(self, documento):
+        return len(documento)
+
+    def extrair(self, documento, indice):
+        """Texto da página (índice base 0); erros são levantados, não escondidos"""
+        raise NotImplementedError
+
+    def fechar(self, documento):
+        pass
+
+
+class ExtratorPyPDF2(ExtratorTexto):
+    """extract_text do PyPDF2 (reaproveita o PdfReader já aberto)"""
+
+    nome = "pypdf2"
+    modulo = "PyPDF2"
+    pacote = "PyPDF2"
+
+    def abrir(self, origem, pdf_reader=None):
+        if pdf_reader is not None:
+            return pdf_reader
+        from automacao.leitor import LeitorSobDemanda
+
+        return LeitorSobDemanda(origem)
+
+    def total_paginas(self, documento):
+        return len(documento.pages)
+
+    def extrair(self, documento, indice):
+        return documento.pages[indice].extract_text()
+
+
+class ExtratorPdfium(ExtratorTexto):
+    """PDFium (o motor de PDF do Chrome, em C)"""
+
+    nome = "pypdfium2"
+    modulo = "pypdfium2"
+    pacote = "pypdfium2"
+
+    def abrir(self, origem, pdf_reader=None):
+        import pypdfium2
+
+        return pypdfium2.PdfDocument(origem)
+
+    def extrair(self, documento, indice):
+        pagina = documento[indice]
+        try:
+            pagina_texto = pagina.get_textpage()
+            try:
+                return pagina_texto.get_text_range()
+            finally:
+                pagina_texto.close()
+        finally:
+            pagina.close()
+
+    def fechar(self, documento):
+        documento.close()
+
+
+class _DocumentoPdfminer:
+    def __init__(self, fluxo, paginas, recursos, proprio):
+        self.fluxo = fluxo
+        self.paginas = paginas
+        self.recursos = recursos
+        self.proprio = proprio  # o fluxo foi aberto aqui (e deve ser fechado)
+
+
+class ExtratorPdfminer(ExtratorTexto):
+    """pdfminer.six (Python puro, análise de layout mais cuidadosa)"""
+
+    nome = "pdfminer"
+    modulo = "pdfminer"
+    pacote = "pdfminer.six"
+
+    def abrir(self, origem, pdf_reader=None):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        proprio = isinstance(origem, (str, os.PathLike))
+        fluxo = open(origem, "rb") if proprio else origem
+        documento = PDFDocument(PDFParser(fluxo))
+        return _DocumentoPdfminer(
+            fluxo,
+            list(PDFPage.create_pages(documento)),
+            PDFResourceManager(caching=True),
+            proprio,
+        )
+
+    def total_paginas(self, documento):
+        return len(documento.paginas)
+
+    def extrair(self, documento, indice):
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        saida = StringIO()
+        conversor = TextConverter(documento.recursos, saida, laparams=LAParams())
+        try:
+            PDFPageInterpreter(documento.recursos, conversor).process_page(
+                documento.paginas[indice]
+            )
+        finally:
+            conversor.close()
+        return saida.getvalue()
+
+    def fechar(self, documento):
+        if documento.proprio:
+            documento.fluxo.close()
+
+
+EXTRATORES = {
+    extrator.nome: extrator
+    for extrator in (ExtratorPyPDF2, ExtratorPdfium, ExtratorPdfminer)
+}
+
+
+def extratores_disponiveis():
+    """Nomes dos extratores cujo pacote está instalado"""
+    return [nome for nome, extrator in EXTRATORES.items() if extrator.disponivel()]
+
+
+def obter_extrator(nome=None):
+    """Instância do extrator pelo nome (padrão: EXTRATOR_PADRAO)"""
+    nome = (nome or EXTRATOR_PADRAO).lower()
+    if nome not in EXTRATORES:
+        raise ValueError(
+            f"Extrator de texto desconhecido: {nome} (opções: {', '.join(EXTRATORES)})"
+        )
+    extrator = EXTRATORES[nome]
+    if not extrator.disponivel():
+        raise ValueError(
+            f"Extrator {nome} não instalado (pip install {extrator.pacote})"
+        )
+    return extrator()
@@ -0,0 +1,390 @@
+"""
+Fila persistente (SQLite) das execuções, processadas por um trabalhador separado
+
+O app só enfileira a execução e acompanha o andamento; quem processa é o
+trabalhador (python -m automacao trabalhador), então a execução continua
+mesmo que a página seja recarregada ou fechada. Cada arquivo da execução tem
+o próprio estado: depois de uma queda, a execução é retomada a partir dos
+arquivos que ainda não foram concluídos.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+
+from automacao.cache import DIRETORIO_PADRAO
+from automacao.pipeline import ConcorrenciaEtapas
+from automacao.processamento import OpcoesProcessamento, ResultadoArquivo
+
+# Estados de uma execução
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CANCELANDO = "cancelando"
+CONCLUIDO = "concluido"
+CANCELADO = "cancelado"
+FALHOU = "falhou"
+ESTADOS_ATIVOS = (PENDENTE, EXECUTANDO, CANCELANDO)
+
+# Estados de cada arquivo
+ARQUIVO_PENDENTE = "pendente"
+ARQUIVO_CONCLUIDO = "concluido"
+ARQUIVO_IGNORADO = "ignorado"  # já organizado e sem alteração
+
+# Sem sinal do trabalhador por este tempo (s), a execução volta para a fila
+TEMPO_ABANDONO = 60
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabalhos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT NOT NULL,
+    pasta_clientes TEXT NOT NULL,
+    workers INTEGER NOT NULL,
+    forcar INTEGER NOT NULL,
+    opcoes TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    criado_em TEXT NOT NULL,
+    iniciado_em TEXT,
+    concluido_em TEXT,
+    trabalhador INTEGER,
+    batimento REAL,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    mensagem TEXT
+);
+CREATE INDEX IF NOT EXISTS trabalhos_estado ON trabalhos (estado);
+CREATE TABLE IF NOT EXISTS arquivos_trabalho (
+    trabalho INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    caminho TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    resultado TEXT,
+    PRIMARY KEY (trabalho, posicao)
+);
+CREATE TABLE IF NOT EXISTS trabalhadores (
+    pid INTEGER PRIMARY KEY,
+    iniciado_em TEXT NOT NULL,
+    batimento REAL NOT NULL
+);
+"""
+
+
+def _agora():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def opcoes_para_texto(opcoes):
+    return json.dumps(asdict(opcoes), ensure_ascii=False)
+
+
+def opcoes_de_texto(texto):
+    """OpcoesProcessamento gravada na fila (campos desconhecidos são ignorados)"""
+    valores = json.loads(texto)
+    conhecidos = {campo.name for campo in fields(OpcoesProcessamento)}
+    valores = {nome: valor for nome, valor in valores.items() if nome in conhecidos}
+    if isinstance(valores.get("concorrencia"), dict):
+        valores["concorrencia"] = ConcorrenciaEtapas(**valores["concorrencia"])
+    return OpcoesProcessamento(**valores)
+
+
+def resultado_de_texto(texto):
+    """ResultadoArquivo gravado na fila"""
+    valores = json.loads(texto)
+    conhecidos = {campo.name for campo in fields(ResultadoArquivo)}
+    return ResultadoArquivo(
+        **{nome: valor for nome, valor in valores.items() if nome in conhecidos}
+    )
+
+
+@dataclass
+class Trabalho:
+    """Uma execução enfileirada e o andamento dela"""
+
+    id: int
+    usuario: str
+    pasta_clientes: str
+    workers: int
+    forcar: bool
+    opcoes: str  # OpcoesProcessamento em JSON (opcoes_de_texto)
+    estado: str
+    criado_em: str
+    iniciado_em: str = None
+    concluido_em: str = None
+    tentativas: int = 0
+    mensagem: str = None
+    total: int = 0
+    concluidos: int = 0
+    ignorados: int = 0
+    posicao_fila: int = 0  # execuções pendentes na frente desta (0 = próxima)
+
+    @property
+    def ativo(self):
+        return self.estado in ESTADOS_ATIVOS
+
+    @property
+    def progresso(self):
+        if not self.total:
+            return 1.0 if not self.ativo else 0.0
+        return (self.concluidos + self.ignorados) / self.total
+
+
+class FilaTrabalhos:
+    """
+    Execuções enfileiradas pelo app e processadas pelo trabalhador
+
+    A escolha da próxima execução é justa entre usuários: vai primeiro quem
+    tem menos execuções em andamento e, entre esses, a mais antiga.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, "fila.sqlite3")
+        self._conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_ESQUEMA)
+
+    def close(self):
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def _transacao(self):
+        """Transação com trava de escrita desde o início (BEGIN IMMEDIATE)"""
+        self._conexao.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conexao
+        except BaseException:
+            self._conexao.execute("ROLLBACK")
+            raise
+        self._conexao.execute("COMMIT")
+
+    def enfileirar(
+        self, pdf_files, pasta_clientes, opcoes, usuario="", workers=1, forcar=False
+    ):
+        """Grava a execução e os arquivos dela; retorna o id da execução"""
+        with self._transacao() as conexao:
+            cursor = conexao.execute(
+                "INSERT INTO trabalhos (usuario, pasta_clientes, workers, forcar, "
+                "opcoes, estado, criado_em) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    usuario,
+                    pasta_clientes,
+                    workers,
+                    int(forcar),
+                    opcoes_para_texto(opcoes),
+                    PENDENTE,
+                    _agora(),
+                ),
+            )
+            trabalho_id = cursor.lastrowid
+            conexao.executemany(
+                "INSERT INTO arquivos_trabalho (trabalho, posicao, caminho, estado) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (trabalho_id, posicao, str(caminho), ARQUIVO_PENDENTE)
+                    for posicao, caminho in enumerate(pdf_files)
+                ],
+            )
+        return trabalho_id
+
+    def reservar(self, pid):
+        """Próxima execução para o trabalhador (justa entre usuários), ou None"""
+        with self._transacao() as conexao:
+            linha = conexao.execute(
+                "SELECT t.id FROM trabalhos t WHERE t.estado = ? ORDER BY "
+                "(SELECT COUNT(*) FROM trabalhos e "
+                " WHERE e.usuario = t.usuario AND e.estado = ?), t.id LIMIT 1",
+                (PENDENTE, EXECUTANDO),
+            ).fetchone()
+            if linha is None:
+                return None
+            conexao.execute(
+                "UPDATE trabalhos SET estado = ?, trabalhador = ?, batimento = ?, "
+                "iniciado_em = COALESCE(iniciado_em, ?), tentativas = tentativas + 1 "
+                "WHERE id = ?",
+                (EXECUTANDO, pid, time.time(), _agora(), linha[0]),
+            )
+        return self.obter(linha[0])
+
+    def recuperar_abandonados(self, tempo_abandono=TEMPO_ABANDONO):
+        """Execuções sem sinal do trabalhador voltam para a fila; retorna quantas"""
+        limite = time.time() - tempo_abandono
+        with self._transacao() as conexao:
+            conexao.execute(
+                "UPDATE trabalhos SET estado = ?, concluido_em = ? "
+                "WHERE estado = ? AND COALESCE(batimento, 0) < ?",
+                (CANCELADO, _agora(), CANCELANDO, limite),
+            )
+            cursor = conexao.execute(
+                "UPDATE trabalhos SET estado = ?, trabalhador = NULL "
+                "WHERE estado = ? AND COALESCE(batimento, 0) < ?",
+                (PENDENTE, EXECUTANDO, limite),
+            )
+        return cursor.rowcount
+
+    def bater(self, trabalho_id):
+        """Sinal de vida do trabalhador; retorna False se a execução foi cancelada"""
+        with self._transacao() as conexao:
+            conexao.execute(
+                "UPDATE trabalhos SET batimento = ? WHERE id = ?",
+                (time.time(), trabalho_id),
+            )
+            (estado,) = conexao.execute(
+                "SELECT estado FROM trabalhos WHERE id = ?", (trabalho_id,)
+            ).fetchone()
+        return estado != CANCELANDO
+
+    def arquivos_pendentes(self, trabalho_id):
+        """[(posição, caminho)] dos arquivos que ainda não foram concluídos"""
+        return self._conexao.execute(
+            "SELECT posicao, caminho FROM arquivos_trabalho "
+            "WHERE trabalho = ? AND estado = ? ORDER BY posicao",
+            (trabalho_id, ARQUIVO_PENDENTE),
+        ).fetchall()
+
+    def registrar_arquivo(
+        self, trabalho_id, posicao, resultado=None, estado=ARQUIVO_CONCLUIDO
+    ):
+        """Marca um arquivo como concluído (com o ResultadoArquivo) ou ignorado"""
+        texto = json.dumps(asdict(resultado), ensure_ascii=False) if resultado else None
+        with self._transacao() as conexao:
+            conexao.execute(
+                "UPDATE arquivos_trabalho SET estado = ?, resultado = ? "
+                "WHERE trabalho = ? AND posicao = ?",
+                (estado, texto, trabalho_id, posicao),
+            )
+            conexao.execute(
+                "UPDATE trabalhos SET batimento = ? WHERE id = ?",
+                (time.time(), trabalho_id),
+            )
+
+    def finalizar(self, trabalho_id, estado, mensagem=None):
+        with self._transacao() as conexao:
+            conexao.execute(
+                "UPDATE trabalhos SET estado = ?, mensagem = ?, concluido_em = ? "
+                "WHERE id = ?",
+                (estado, mensagem, _agora(), trabalho_id),
+            )
+
+    def cancelar(self, trabalho_id):
+        """Pendente: cancela na hora; em andamento: para depois do arquivo atual"""
+        with self._transacao() as conexao:
+            conexao.execute(
+                "UPDATE trabalhos SET estado = ?, concluido_em = ? "
+                "WHERE id = ? AND estado = ?",
+                (CANCELADO, _agora(), trabalho_id, PENDENTE),
+            )
+            conexao.execute(
+                "UPDATE trabalhos SET estado = ? WHERE id = ? AND estado = ?",
+                (CANCELANDO, trabalho_id, EXECUTANDO),
+            )
+
+    def obter(self, trabalho_id):
+        """Trabalho com o andamento, ou None"""
+        trabalhos = self._listar("WHERE t.id = ?", (trabalho_id,))
+        return trabalhos[0] if trabalhos else None
+
+    def listar(self, usuario=None, limite=20):
+        """Execuções mais recentes (de um usuário ou de todos)"""
+        if usuario is None:
+            return self._listar("ORDER BY t.id DESC LIMIT ?", (limite,))
+        return self._listar(
+            "WHERE t.usuario = ? ORDER BY t.id DESC LIMIT ?", (usuario, limite)
+        )
+
+    def _listar(self, filtro, parametros):
+        linhas = self._conexao.execute(
+            "SELECT t.id, t.usuario, t.pasta_clientes, t.workers, t.forcar, t.opcoes, "
+            "t.estado, t.criado_em, t.iniciado_em, t.concluido_em, t.tentativas, "
+            "t.mensagem, "
+            "(SELECT COUNT(*) FROM arquivos_trabalho a WHERE a.trabalho = t.id), "
+            "(SELECT COUNT(*) FROM arquivos_trabalho a "
+            " WHERE a.trabalho = t.id AND a.estado = ?), "
+            "(SELECT COUNT(*) FROM arquivos_trabalho a "
+            " WHERE a.trabalho = t.id AND a.estado = ?), "
+            "(SELECT COUNT(*) FROM trabalhos p WHERE p.estado = ? AND p.id < t.id) "
+            f"FROM trabalhos t {filtro}",
+            (ARQUIVO_CONCLUIDO, ARQUIVO_IGNORADO, PENDENTE, *parametros),
+        ).fetchall()
+        return [
+            Trabalho(*linha[:4], bool(linha[4]), *linha[5:]) for linha in linhas
+        ]
+
+    def tem_ativos(self):
+        """Há execuções pendentes ou em andamento"""
+        return (
+            self._conexao.execute(
+                "SELECT 1 FROM trabalhos WHERE estado IN (?, ?, ?) LIMIT 1",
+                ESTADOS_ATIVOS,
+            ).fetchone()
+            is not None
+        )
+
+    def resultados(self, trabalho_id):
+        """ResultadoArquivo dos arquivos concluídos, na ordem de entrada"""
+        linhas = self._conexao.execute(
+            "SELECT resultado FROM arquivos_trabalho "
+            "WHERE trabalho = ? AND estado = ? ORDER BY posicao",
+            (trabalho_id, ARQUIVO_CONCLUIDO),
+        ).fetchall()
+        return [resultado_de_texto(texto) for (texto,) in linhas]
+
+    def ignorados(self, trabalho_id):
+        return [
+            caminho
+            for (caminho,) in self._conexao.execute(
+                "SELECT caminho FROM arquivos_trabalho "
+                "WHERE trabalho = ? AND estado = ? ORDER BY posicao",
+                (trabalho_id, ARQUIVO_IGNORADO),
+            )
+        ]
+
+    def entrar_trabalhador(self, pid, tempo_abandono=TEMPO_ABANDONO):
+        """
+        Registra o processo trabalhador; False se já existe outro ativo
+
+        Assim o app pode iniciar um trabalhador sempre que não encontrar
+        nenhum, sem o risco de dois rodarem ao mesmo tempo.
+        """
+        limite = time.time() - tempo_abandono
+        with self._transacao() as conexao:
+            conexao.execute("DELETE FROM trabalhadores WHERE batimento < ?", (limite,))
+            outro = conexao.execute(
+                "SELECT 1 FROM trabalhadores WHERE pid != ?", (pid,)
+            ).fetchone()
+            if outro is not None:
+                return False
+            conexao.execute(
+                "INSERT OR REPLACE INTO trabalhadores VALUES (?, ?, ?)",
+                (pid, _agora(), time.time()),
+            )
+        return True
+
+    def bater_trabalhador(self, pid):
+        """Sinal de vida do processo trabalhador"""
+        with self._transacao() as conexao:
+            conexao.execute(
+                "UPDATE trabalhadores SET batimento = ? WHERE pid = ?",
+                (time.time(), pid),
+            )
+
+    def remover_trabalhador(self, pid):
+        with self._transacao() as conexao:
+            conexao.execute("DELETE FROM trabalhadores WHERE pid = ?", (pid,))
+
+    def trabalhadores_ativos(self, tempo_abandono=TEMPO_ABANDONO):
+        """PIDs dos trabalhadores que deram sinal de vida recentemente"""
+        return [
+            pid
+            for (pid,) in self._conexao.execute(
+                "SELECT pid FROM trabalhadores WHERE batimento >= ?",
+                (time.time() - tempo_abandono,),
+            )
+        ]
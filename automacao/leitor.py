@@ -0,0 +1,110 @@
+"""
+Leitura de PDF sob demanda: só as páginas usadas são montadas
+
+Os outros módulos importam este (e o PyPDF2) só ao abrir o primeiro PDF,
+para o app mostrar a primeira tela sem esperar por essa importação.
+"""
+
+from bisect import bisect_right
+
+import PyPDF2
+from PyPDF2 import PageObject
+from PyPDF2.generic import IndirectObject, NameObject
+
+# Atributos que a página herda dos nós /Pages acima dela
+ATRIBUTOS_HERDADOS = tuple(
+    NameObject(nome) for nome in ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+)
+
+
+class LeitorSobDemanda(PyPDF2.PdfReader):
+    """
+    PdfReader que monta apenas as páginas pedidas
+
+    O PdfReader do PyPDF2 percorre a árvore de páginas inteira (e resolve o
+    dicionário de cada página) no primeiro acesso a reader.pages. Aqui o
+    total de páginas vem do /Count da raiz e cada página é localizada
+    descendo a árvore pelos /Count dos nós intermediários (a primeira página
+    de cada filho é calculada uma vez por nó). Se a árvore estiver
+    inconsistente, volta ao comportamento normal (todas as páginas).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._paginas_montadas = {}
+        self._filhos_por_no = {}
+        super().__init__(*args, **kwargs)
+
+    def _sob_demanda(self):
+        return self.flattened_pages is None and not self.is_encrypted
+
+    def _raiz_paginas(self):
+        return self.trailer["/Root"].get_object()["/Pages"].get_object()
+
+    def _get_num_pages(self):
+        if self._sob_demanda():
+            try:
+                return int(self._raiz_paginas()["/Count"])
+            except Exception:
+                pass
+        return super()._get_num_pages()
+
+    def _get_page(self, page_number):
+        if not self._sob_demanda():
+            return super()._get_page(page_number)
+        pagina = self._paginas_montadas.get(page_number)
+        if pagina is None:
+            try:
+                pagina = self._localizar(page_number)
+            except Exception:
+                pagina = None
+            if pagina is None:
+                self._paginas_montadas.clear()
+                return super()._get_page(page_number)
+            self._paginas_montadas[page_number] = pagina
+        return pagina
+
+    def _filhos(self, no, chave):
+        """([primeira página de cada filho], [filhos], total) de um nó /Pages"""
+        filhos = self._filhos_por_no.get(chave)
+        if filhos is None:
+            inicios, referencias, total = [], [], 0
+            for filho_ref in no["/Kids"]:
+                filho = filho_ref.get_object()
+                inicios.append(total)
+                referencias.append(filho_ref)
+                total += int(filho["/Count"]) if "/Kids" in filho else 1
+            filhos = self._filhos_por_no[chave] = (inicios, referencias, total)
+        return filhos
+
+    def _localizar(self, indice):
+        """Página de índice base 0, ou None se a árvore não bater com os /Count"""
+        no = self._raiz_paginas()
+        chave = None  # raiz
+        referencia = None
+        herdados = {}
+        while "/Kids" in no:
+            for nome in ATRIBUTOS_HERDADOS:
+                if nome in no:
+                    herdados[nome] = no[nome]
+            inicios, referencias, total = self._filhos(no, chave)
+            if not 0 <= indice < total:
+                return None
+            posicao = bisect_right(inicios, indice) - 1
+            indice -= inicios[posicao]
+            filho_ref = referencias[posicao]
+            no = filho_ref.get_object()
+            if isinstance(filho_ref, IndirectObject):
+                referencia = filho_ref
+                chave = filho_ref.idnum
+            else:
+                referencia = None
+                chave = (chave, posicao)
+
+        if indice != 0:
+            return None
+        pagina = PageObject(self, referencia)
+        pagina.update(no)
+        for nome, valor in herdados.items():
+            if nome not in pagina:
+                pagina[nome] = valor
+        return pagina
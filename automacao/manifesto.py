@@ -0,0 +1,146 @@
+"""Manifesto dos PDFs já organizados, para processar só o que é novo ou mudou"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from automacao.cache import DIRETORIO_PADRAO, hash_arquivo
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS manifesto (
+    caminho TEXT NOT NULL,
+    pasta_clientes TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    saidas TEXT NOT NULL,
+    processado_em TEXT NOT NULL,
+    PRIMARY KEY (caminho, pasta_clientes)
+);
+"""
+
+
+def _normalizar(caminho):
+    return os.path.normcase(os.path.abspath(caminho))
+
+
+class ManifestoProcessamento:
+    """
+    Registro de cada PDF de entrada já organizado em uma pasta de clientes
+
+    A chave é (caminho, pasta_clientes); tamanho e mtime decidem rápido se o
+    arquivo mudou, e o hash do conteúdo desempata quando só o mtime mudou.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, "manifesto.sqlite3")
+        self._conexao = sqlite3.connect(self.caminho, timeout=30)
+        self._conexao.executescript(_ESQUEMA)
+
+    def close(self):
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def separar_pendentes(self, pdf_files, pasta_clientes, forcar=False):
+        """
+        Divide os arquivos em (pendentes, ignorados)
+
+        Ignorados são os já organizados que não mudaram e cujo original
+        ainda está na pasta do cliente. Caminhos repetidos entram uma vez só.
+        """
+        pasta_clientes = _normalizar(pasta_clientes)
+        pendentes = []
+        ignorados = []
+        vistos = set()
+
+        for pdf_path in pdf_files:
+            chave = _normalizar(pdf_path)
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+
+            if forcar or not self._inalterado(chave, pasta_clientes):
+                pendentes.append(pdf_path)
+            else:
+                ignorados.append(pdf_path)
+
+        return pendentes, ignorados
+
+    def registrar(self, resultado, pasta_clientes):
+        """
+        Grava no manifesto um arquivo concluído
+
+        Ficam de fora os simulados e os com erro, inclusive parcial (um
+        documento que não foi gravado), para serem processados de novo. O
+        hash vem do resultado (calculado na classificação); o arquivo só é
+        lido de novo quando a execução foi sem o cache de páginas.
+        """
+        if resultado.erro is not None or resultado.erros or resultado.simulacao:
+            return
+
+        caminho = _normalizar(resultado.arquivo)
+        try:
+            info = os.stat(caminho)
+            hash_conteudo = resultado.hash_conteudo or hash_arquivo(caminho)
+        except OSError:
+            return  # removido ou renomeado durante a execução
+        saidas = {
+            "pasta": resultado.caminho_pasta,
+            "documentos": resultado.documentos,
+            "original": resultado.original,
+        }
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO manifesto VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    caminho,
+                    _normalizar(pasta_clientes),
+                    info.st_size,
+                    info.st_mtime_ns,
+                    hash_conteudo,
+                    json.dumps(saidas, ensure_ascii=False),
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+    def _inalterado(self, caminho, pasta_clientes):
+        linha = self._conexao.execute(
+            "SELECT tamanho, mtime_ns, hash, saidas FROM manifesto "
+            "WHERE caminho = ? AND pasta_clientes = ?",
+            (caminho, pasta_clientes),
+        ).fetchone()
+        if linha is None:
+            return False
+
+        tamanho, mtime_ns, hash_conteudo, saidas = linha
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return False
+
+        # Se o original sumiu da pasta do cliente, organiza de novo
+        original = json.loads(saidas).get("original")
+        if not original or not os.path.exists(original):
+            return False
+
+        if info.st_size != tamanho:
+            return False
+        if info.st_mtime_ns == mtime_ns:
+            return True
+
+        # Só o mtime mudou (ex.: baixado de novo): compara o conteúdo
+        if hash_arquivo(caminho) != hash_conteudo:
+            return False
+        with self._conexao:
+            self._conexao.execute(
+                "UPDATE manifesto SET mtime_ns = ? WHERE caminho = ? AND pasta_clientes = ?",
+                (info.st_mtime_ns, caminho, pasta_clientes),
+            )
+        return True
@@ -0,0 +1,285 @@
+"""Limite de memória por execução: arquivos grandes esperam na fila"""
+
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from automacao.cache import DIRETORIO_PADRAO
+
+# Limite padrão de memória (MB) para os arquivos em processamento (0 = sem limite)
+LIMITE_MEMORIA_PADRAO_MB = int(os.environ.get("AUTOMACAO_MEMORIA_MB", "0"))
+
+# A partir deste tamanho o arquivo é sempre processado com pouca memória
+ARQUIVO_GRANDE_MB = 64
+
+# Estimativa de memória de um arquivo: tamanho * fator + base. No modo normal
+# o arquivo inteiro fica em memória, mais os objetos do PyPDF2 e o PDF gerado;
+# no modo com pouca memória o arquivo é mapeado (mmap) e as páginas liberadas.
+FATOR_MEMORIA_NORMAL = 2.5
+FATOR_MEMORIA_LIMITADA = 1.0
+MEMORIA_BASE_MB = 20
+
+# Reservas de memória de todos os processos (app e vagas do trabalhador)
+ARQUIVO_RESERVAS = "memoria.sqlite3"
+
+# Segundos entre as tentativas de quem espera memória de outro processo e
+# entre as buscas por reservas de processos que terminaram sem liberar
+INTERVALO_RESERVA = 0.2
+INTERVALO_LIMPEZA = 2.0
+
+_ESQUEMA_RESERVAS = """
+CREATE TABLE IF NOT EXISTS reservas (
+    id INTEGER PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    mb REAL NOT NULL,
+    criada REAL NOT NULL
+);
+"""
+
+
+class ReservaCancelada(Exception):
+    """A execução foi cancelada enquanto esperava memória"""
+
+
+def arquivo_grande(caminho):
+    """Indica se o arquivo deve ser processado com pouca memória de qualquer forma"""
+    try:
+        return os.path.getsize(caminho) >= ARQUIVO_GRANDE_MB * 1048576
+    except OSError:
+        return False
+
+
+def estimar_memoria_mb(caminho, memoria_limitada=False):
+    """Memória estimada (MB) para processar o arquivo"""
+    try:
+        tamanho_mb = os.path.getsize(caminho) / 1048576
+    except OSError:
+        tamanho_mb = 0
+    limitada = memoria_limitada or tamanho_mb >= ARQUIVO_GRANDE_MB
+    fator = FATOR_MEMORIA_LIMITADA if limitada else FATOR_MEMORIA_NORMAL
+    return tamanho_mb * fator + MEMORIA_BASE_MB
+
+
+@contextmanager
+def abrir_conteudo(caminho, memoria_limitada=False):
+    """
+    Conteúdo do arquivo para o PdfReader e a cópia do original
+
+    Normalmente lê o arquivo inteiro (uma única leitura). Com pouca memória,
+    mapeia o arquivo (mmap): as páginas do arquivo ficam no cache do sistema
+    operacional, que pode descartá-las, em vez de ocupar a memória do processo.
+    """
+    if not memoria_limitada or os.path.getsize(caminho) == 0:
+        yield Path(caminho).read_bytes()
+        return
+
+    with open(caminho, "rb") as arquivo:
+        conteudo = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield conteudo
+        finally:
+            try:
+                conteudo.close()
+            except BufferError:
+                pass  # ainda referenciado; é liberado junto com o objeto
+
+
+def processo_vivo(pid):
+    """Indica se o processo ainda existe (na dúvida, considera vivo)"""
+    if pid == os.getpid():
+        return True
+    try:
+        import psutil
+
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name == "nt":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        processo = kernel32.OpenProcess(0x1000, False, pid)  # só consulta
+        if not processo:
+            return False
+        codigo = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(processo, ctypes.byref(codigo))
+        kernel32.CloseHandle(processo)
+        return codigo.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class OrcamentoMemoria:
+    """
+    Memória (MB) disponível para os arquivos em processamento no processo
+
+    Compartilhado por todas as execuções do processo: quem não cabe no
+    limite espera até outro arquivo terminar. Um arquivo maior que o limite
+    inteiro roda sozinho. Entre processos, ver OrcamentoCompartilhado.
+    """
+
+    def __init__(self, limite_mb):
+        self.limite_mb = limite_mb
+        self.reservado_mb = 0.0
+        self._condicao = threading.Condition()
+
+    def _cabe(self, mb):
+        return self.reservado_mb == 0 or self.reservado_mb + mb <= self.limite_mb
+
+    def tentar_reservar(self, mb):
+        """Reserva sem esperar; retorna False se não couber agora"""
+        with self._condicao:
+            if not self._cabe(mb):
+                return False
+            self.reservado_mb += mb
+            return True
+
+    def reservar(self, mb, cancelado=None):
+        """
+        Reserva, esperando na fila se preciso; retorna os segundos de espera
+
+        Com cancelado (threading.Event), a espera é conferida a cada
+        INTERVALO_RESERVA e termina com ReservaCancelada.
+        """
+        inicio = time.perf_counter()
+        intervalo = INTERVALO_RESERVA if cancelado is not None else None
+        with self._condicao:
+            while not self._cabe(mb):
+                if cancelado is not None and cancelado.is_set():
+                    raise ReservaCancelada()
+                self._condicao.wait(intervalo)
+            self.reservado_mb += mb
+        return time.perf_counter() - inicio
+
+    def liberar(self, mb):
+        with self._condicao:
+            self.reservado_mb = max(0.0, self.reservado_mb - mb)
+            self._condicao.notify_all()
+
+    @contextmanager
+    def reserva(self, mb, cancelado=None):
+        """Bloco com a memória reservada; produz os segundos de espera"""
+        espera = self.reservar(mb, cancelado)
+        try:
+            yield espera
+        finally:
+            self.liberar(mb)
+
+
+class OrcamentoCompartilhado(OrcamentoMemoria):
+    """
+    OrcamentoMemoria dividido entre processos
+
+    Cada vaga do trabalhador é um processo, e o app pode processar no
+    próprio processo. Para todos respeitarem o mesmo limite, as reservas
+    ficam em memoria.sqlite3, na pasta do cache. Quem não cabe tenta de
+    novo a cada INTERVALO_RESERVA, ou antes, quando uma reserva do mesmo
+    processo é liberada. As reservas de um processo que terminou sem
+    liberar (vaga que caiu) são descartadas.
+    """
+
+    def __init__(self, limite_mb, diretorio=DIRETORIO_PADRAO):
+        super().__init__(limite_mb)
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, ARQUIVO_RESERVAS)
+        self._conexao = None
+        self._pid = None
+        self._ultima_limpeza = 0.0
+        self._conectar()
+
+    def _conectar(self):
+        # Depois de um fork, o processo filho abre a própria conexão
+        if self._pid != os.getpid():
+            self._conexao = sqlite3.connect(
+                self.caminho, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.executescript(_ESQUEMA_RESERVAS)
+            self._pid = os.getpid()
+        return self._conexao
+
+    def tentar_reservar(self, mb):
+        with self._condicao:
+            conexao = self._conectar()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                cabe = self._cabe_no_total(conexao, mb)
+                if not cabe and self._limpar_orfas(conexao):
+                    cabe = self._cabe_no_total(conexao, mb)
+                if cabe:
+                    conexao.execute(
+                        "INSERT INTO reservas (pid, mb, criada) VALUES (?, ?, ?)",
+                        (os.getpid(), mb, time.time()),
+                    )
+                conexao.execute("COMMIT")
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            if cabe:
+                self.reservado_mb += mb
+            return cabe
+
+    def _cabe_no_total(self, conexao, mb):
+        (reservado,) = conexao.execute(
+            "SELECT COALESCE(SUM(mb), 0) FROM reservas"
+        ).fetchone()
+        return reservado == 0 or reservado + mb <= self.limite_mb
+
+    def _limpar_orfas(self, conexao):
+        """Descarta reservas de processos que terminaram; True se havia alguma"""
+        agora = time.monotonic()
+        if agora - self._ultima_limpeza < INTERVALO_LIMPEZA:
+            return False
+        self._ultima_limpeza = agora
+        mortos = [
+            (pid,)
+            for (pid,) in conexao.execute("SELECT DISTINCT pid FROM reservas")
+            if not processo_vivo(pid)
+        ]
+        conexao.executemany("DELETE FROM reservas WHERE pid = ?", mortos)
+        return bool(mortos)
+
+    def reservar(self, mb, cancelado=None):
+        inicio = time.perf_counter()
+        while not self.tentar_reservar(mb):
+            if cancelado is not None and cancelado.is_set():
+                raise ReservaCancelada()
+            with self._condicao:
+                self._condicao.wait(INTERVALO_RESERVA)
+        return time.perf_counter() - inicio
+
+    def liberar(self, mb):
+        with self._condicao:
+            self._conectar().execute(
+                "DELETE FROM reservas WHERE id = "
+                "(SELECT id FROM reservas WHERE pid = ? AND mb = ? LIMIT 1)",
+                (os.getpid(), mb),
+            )
+            self.reservado_mb = max(0.0, self.reservado_mb - mb)
+            self._condicao.notify_all()
+
+
+@lru_cache(maxsize=None)
+def obter_orcamento(limite_mb, diretorio=DIRETORIO_PADRAO):
+    """
+    Orçamento para o limite informado (None se sem limite)
+
+    Compartilhado entre os processos pela pasta do cache; se ela não puder
+    ser usada, vale só para o processo atual.
+    """
+    if not limite_mb or limite_mb <= 0:
+        return None
+    try:
+        return OrcamentoCompartilhado(limite_mb, diretorio)
+    except (OSError, sqlite3.Error):
+        return OrcamentoMemoria(limite_mb)
@@ -0,0 +1,337 @@
+"""Medição de tempo, bytes e memória por etapa do processamento"""
+
+import csv
+import io
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Ordem em que as etapas aparecem nos relatórios
+ETAPAS = [
+    "fila_memoria",
+    "criar_pasta",
+    "leitura",
+    "abrir_pdf",
+    "deteccao_camada",
+    "extracao_texto",
+    "classificacao",
+    "montagem_pdf",
+    "pdfwriter_write",
+    "escrita_disco",
+    "original",
+    "publicacao",
+]
+
+CAMPOS_CSV = [
+    "arquivo",
+    "paginas",
+    "segundos",
+    "paginas_por_segundo",
+    "bytes_lidos",
+    "bytes_gravados",
+    "memoria_pico_mb",
+    "memoria_aumento_mb",
+] + [f"{nome}_s" for nome in ETAPAS] + [f"{nome}_mb" for nome in ETAPAS]
+
+# Intervalo (s) entre as leituras do RSS enquanto alguma etapa está medindo
+INTERVALO_AMOSTRAGEM = 0.005
+
+
+class _LeitorMemoria:
+    """
+    RSS atual do processo, em bytes (None quando a plataforma não informa)
+
+    No Linux, /proc/self/statm fica aberto e é relido com pread (~2 µs); nas
+    outras plataformas, psutil quando instalado. Depois de um fork o arquivo
+    é reaberto: o descritor herdado mediria o processo pai.
+    """
+
+    def __init__(self):
+        self._descritor = None
+        self._tamanho_pagina = 4096
+        self._psutil = None
+        self._disponivel = None
+
+    def reabrir(self):
+        if self._descritor is not None:
+            try:
+                os.close(self._descritor)
+            except OSError:
+                pass
+        self._descritor = None
+        self._disponivel = None
+
+    def _abrir(self):
+        try:
+            self._descritor = os.open("/proc/self/statm", os.O_RDONLY)
+            self._tamanho_pagina = os.sysconf("SC_PAGE_SIZE")
+            self._disponivel = True
+            return
+        except (OSError, AttributeError, ValueError):
+            self._descritor = None
+        try:
+            import psutil
+
+            self._psutil = psutil
+            self._disponivel = True
+        except ImportError:
+            self._disponivel = False
+
+    def __call__(self):
+        if self._disponivel is None:
+            self._abrir()
+        if self._descritor is not None:
+            return int(os.pread(self._descritor, 64, 0).split()[1]) * self._tamanho_pagina
+        if self._disponivel:
+            return self._psutil.Process().memory_info().rss
+        return None
+
+
+class _AmostradorMemoria:
+    """
+    Thread que lê o RSS a cada INTERVALO_AMOSTRAGEM enquanto há etapas
+    abertas; cada etapa guarda o maior valor visto entre o início e o fim
+
+    Só as leituras do início e do fim perdem picos que sobem e descem dentro
+    da etapa (ex.: o PDF montado em memória antes de ir para o disco).
+    """
+
+    def __init__(self, ler):
+        self._ler = ler
+        self._iniciar_estado()
+
+    def _iniciar_estado(self):
+        self._trava = threading.Lock()
+        self._picos = {}  # {chave da etapa aberta: maior RSS visto}
+        self._ativo = threading.Event()
+        self._thread = None
+
+    def abrir(self, rss):
+        chave = object()
+        with self._trava:
+            self._picos[chave] = rss
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._executar, name="amostrador-memoria", daemon=True
+                )
+                self._thread.start()
+            self._ativo.set()
+        return chave
+
+    def fechar(self, chave, rss):
+        with self._trava:
+            pico = self._picos.pop(chave)
+            if not self._picos:
+                self._ativo.clear()
+        return max(pico, rss)
+
+    def _executar(self):
+        while True:
+            self._ativo.wait()
+            time.sleep(INTERVALO_AMOSTRAGEM)
+            rss = self._ler()
+            with self._trava:
+                for chave, pico in self._picos.items():
+                    if rss > pico:
+                        self._picos[chave] = rss
+
+
+_ler_memoria = _LeitorMemoria()
+_amostrador = _AmostradorMemoria(_ler_memoria)
+
+
+def _depois_do_fork():
+    # No processo filho não há a thread do amostrador, e a trava pode ter
+    # ficado presa por ela no momento do fork
+    _ler_memoria.reabrir()
+    _amostrador._iniciar_estado()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_depois_do_fork)
+
+
+def memoria_atual_mb():
+    """RSS atual do processo em MB (None quando a plataforma não informa)"""
+    rss = _ler_memoria()
+    return None if rss is None else round(rss / 1048576, 1)
+
+
+class MedidorEtapas:
+    """
+    Acumula, por etapa, o tempo gasto, o número de chamadas e os bytes
+
+    A memória é o RSS do processo: cada etapa guarda o maior aumento em
+    relação ao início dela (memoria_mb) e o medidor, o maior RSS visto nas
+    etapas (pico_mb). No pipeline em etapas, vários arquivos dividem o
+    mesmo processo, então os valores incluem o que os outros alocaram.
+    """
+
+    def __init__(self):
+        self.etapas = {}
+        self.memoria_inicio = _ler_memoria()
+        self.memoria_pico = self.memoria_inicio
+
+    @contextmanager
+    def etapa(self, nome):
+        rss = _ler_memoria()
+        chave = _amostrador.abrir(rss) if rss is not None else None
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.adicionar(nome, time.perf_counter() - inicio)
+            if chave is not None:
+                pico = _amostrador.fechar(chave, _ler_memoria())
+                self._registrar_memoria(nome, rss, pico)
+
+    def _registrar_memoria(self, nome, inicio, pico):
+        etapa = self.etapas[nome]
+        aumento = round(max(pico - inicio, 0) / 1048576, 1)
+        etapa["memoria_mb"] = max(etapa.get("memoria_mb", 0.0), aumento)
+        self.memoria_pico = max(self.memoria_pico or 0, pico)
+
+    @property
+    def pico_mb(self):
+        """Maior RSS do processo durante as etapas, em MB"""
+        if self.memoria_pico is None:
+            return None
+        return round(self.memoria_pico / 1048576, 1)
+
+    @property
+    def aumento_mb(self):
+        """Quanto o RSS subiu, no pico, em relação à criação do medidor"""
+        if self.memoria_pico is None or self.memoria_inicio is None:
+            return None
+        return round(max(self.memoria_pico - self.memoria_inicio, 0) / 1048576, 1)
+
+    def adicionar(self, nome, segundos, bytes_processados=0):
+        etapa = self.etapas.setdefault(
+            nome, {"segundos": 0.0, "chamadas": 0, "bytes": 0}
+        )
+        etapa["segundos"] += segundos
+        etapa["chamadas"] += 1
+        etapa["bytes"] += bytes_processados
+
+    def contar_bytes(self, nome, quantidade):
+        etapa = self.etapas.setdefault(
+            nome, {"segundos": 0.0, "chamadas": 0, "bytes": 0}
+        )
+        etapa["bytes"] += quantidade
+
+    def como_dict(self):
+        return {
+            nome: {**dados, "segundos": round(dados["segundos"], 6)}
+            for nome, dados in _ordenadas(self.etapas)
+        }
+
+
+def _ordenadas(etapas):
+    ordem = {nome: i for i, nome in enumerate(ETAPAS)}
+    return sorted(etapas.items(), key=lambda item: (ordem.get(item[0], len(ordem)), item[0]))
+
+
+def pico_memoria_mb():
+    """
+    Pico de memória (RSS) do processo atual desde que ele começou, em MB
+
+    É o mesmo valor para tudo o que rodou no processo; por arquivo e por
+    etapa, use MedidorEtapas.
+
+    Retorna None quando a plataforma não informa (Windows sem psutil).
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 1048576, 1)
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    divisor = 1048576 if sys.platform == "darwin" else 1024
+    return round(pico / divisor, 1)
+
+
+def resumir_etapas(resultados):
+    """
+    Soma as etapas de todos os arquivos
+
+    Retorna uma lista de linhas {etapa, segundos, chamadas, MB, % do tempo,
+    memória}, com o maior aumento de RSS de uma chamada da etapa.
+    """
+    total = {}
+    memoria = {}
+    for resultado in resultados:
+        for nome, dados in resultado.etapas.items():
+            acumulado = total.setdefault(
+                nome, {"segundos": 0.0, "chamadas": 0, "bytes": 0}
+            )
+            for chave in acumulado:
+                acumulado[chave] += dados[chave]
+            if "memoria_mb" in dados:
+                memoria[nome] = max(memoria.get(nome, 0.0), dados["memoria_mb"])
+
+    tempo_total = sum(dados["segundos"] for dados in total.values()) or 1.0
+    return [
+        {
+            "etapa": nome,
+            "segundos": round(dados["segundos"], 3),
+            "chamadas": dados["chamadas"],
+            "MB": round(dados["bytes"] / 1048576, 2),
+            "% do tempo": round(100 * dados["segundos"] / tempo_total, 1),
+            "memória (MB)": memoria.get(nome),
+        }
+        for nome, dados in _ordenadas(total)
+    ]
+
+
+def linha_desempenho(resultado):
+    """Uma linha plana por arquivo (para tabela e CSV)"""
+    paginas_por_segundo = (
+        resultado.paginas / resultado.duracao if resultado.duracao else 0
+    )
+    linha = {
+        "arquivo": resultado.arquivo,
+        "paginas": resultado.paginas,
+        "segundos": round(resultado.duracao, 3),
+        "paginas_por_segundo": round(paginas_por_segundo, 1),
+        "bytes_lidos": resultado.bytes_lidos,
+        "bytes_gravados": resultado.bytes_gravados,
+        "memoria_pico_mb": resultado.memoria_pico_mb,
+        "memoria_aumento_mb": resultado.memoria_aumento_mb,
+    }
+    for nome in ETAPAS:
+        linha[f"{nome}_s"] = round(resultado.etapas.get(nome, {}).get("segundos", 0.0), 4)
+    for nome in ETAPAS:
+        linha[f"{nome}_mb"] = resultado.etapas.get(nome, {}).get("memoria_mb")
+    return linha
+
+
+def resumir_execucao(resultados, duracao):
+    """Números gerais da execução (tempo de parede, páginas/s, bytes, memória)"""
+    paginas = sum(r.paginas for r in resultados)
+    picos = [r.memoria_pico_mb for r in resultados if r.memoria_pico_mb is not None]
+    return {
+        "arquivos": len(resultados),
+        "paginas": paginas,
+        "segundos": round(duracao, 3),
+        "paginas_por_segundo": round(paginas / duracao, 1) if duracao else 0,
+        "bytes_lidos": sum(r.bytes_lidos for r in resultados),
+        "bytes_gravados": sum(r.bytes_gravados for r in resultados),
+        "memoria_pico_mb": max(picos) if picos else None,
+    }
+
+
+def exportar_csv(linhas):
+    """Log de desempenho (linhas de linha_desempenho) em CSV"""
+    saida = io.StringIO()
+    escritor = csv.DictWriter(saida, fieldnames=CAMPOS_CSV)
+    escritor.writeheader()
+    escritor.writerows(linhas)
+    return saida.getvalue()
@@ -0,0 +1,235 @@
+"""
+Pipeline em etapas com filas limitadas entre elas
+
+Cada etapa tem as próprias threads; a fila de saída de uma etapa é a fila de
+entrada da seguinte e tem tamanho limitado. Quando uma etapa fica para trás
+(por exemplo, a gravação na pasta sincronizada do Drive), as anteriores param
+de puxar arquivos novos: a memória não cresce com o tamanho do lote e a
+gravação de um arquivo acontece enquanto os próximos são lidos e classificados.
+"""
+
+import os
+import queue
+import threading
+from dataclasses import dataclass, fields
+
+# Marca o fim da fila: não há mais itens para esta etapa
+_FIM = object()
+
+
+@dataclass
+class ConcorrenciaEtapas:
+    """Threads de cada etapa e tamanho das filas entre elas"""
+
+    leitura: int = 1
+    classificacao: int = 1
+    escrita: int = 2
+    copia: int = 2
+    fila: int = 2  # arquivos esperando entre uma etapa e a seguinte
+
+    @classmethod
+    def de_texto(cls, texto):
+        """Lê "escrita=4,copia=2" (etapas omitidas ficam com o padrão)"""
+        concorrencia = cls()
+        nomes = {campo.name for campo in fields(cls)}
+        for parte in filter(None, (p.strip() for p in (texto or "").split(","))):
+            nome, _, valor = parte.partition("=")
+            nome = nome.strip()
+            if nome not in nomes or not valor.strip().isdigit() or int(valor) < 1:
+                raise ValueError(
+                    f"Concorrência inválida: {parte} "
+                    f"(use etapa=N com N >= 1; etapas: {', '.join(sorted(nomes))})"
+                )
+            setattr(concorrencia, nome, int(valor))
+        return concorrencia
+
+    def como_texto(self):
+        return ",".join(f"{campo.name}={getattr(self, campo.name)}" for campo in fields(self))
+
+
+CONCORRENCIA_PADRAO = os.environ.get("AUTOMACAO_ETAPAS", "")
+
+
+@dataclass
+class Etapa:
+    nome: str
+    funcao: object  # funcao(item); uma exceção encerra o item
+    threads: int = 1
+    # chave(item): itens com a mesma chave passam pela etapa um de cada vez,
+    # na ordem de entrada (None = sem restrição)
+    serial_por: object = None
+
+
+class _Envelope:
+    __slots__ = ("indice", "item", "ordens", "erro")
+
+    def __init__(self, indice, item):
+        self.indice = indice
+        self.item = item
+        self.ordens = {}  # {posição da etapa: (chave, ordem de entrada)}
+        self.erro = None
+
+
+class _Serializador:
+    """Deixa passar um item por chave, na ordem em que entraram no pipeline"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._proxima = {}  # {chave: ordem da vez}
+        self._ocupadas = set()
+        self._aguardando = {}  # {(chave, ordem): envelope}
+        self._contagem = {}
+
+    def registrar(self, chave):
+        """Ordem de entrada do item entre os de mesma chave"""
+        with self._trava:
+            ordem = self._contagem.get(chave, 0)
+            self._contagem[chave] = ordem + 1
+            return ordem
+
+    def entrar(self, envelope, chave, ordem):
+        """True se o item pode passar agora; senão ele fica guardado"""
+        with self._trava:
+            if chave in self._ocupadas or ordem != self._proxima.get(chave, 0):
+                self._aguardando[(chave, ordem)] = envelope
+                return False
+            self._ocupadas.add(chave)
+            return True
+
+    def sair(self, chave):
+        """Libera a chave; retorna o próximo item dela, se já estiver esperando"""
+        with self._trava:
+            proxima = self._proxima.get(chave, 0) + 1
+            self._proxima[chave] = proxima
+            envelope = self._aguardando.pop((chave, proxima), None)
+            if envelope is None:
+                self._ocupadas.discard(chave)
+            return envelope
+
+
+class PipelineEtapas:
+    """
+    Executa as etapas sobre os itens e gera os itens concluídos NA ORDEM de entrada
+
+    ao_entrar(item) roda antes do item entrar na primeira fila (pode esperar,
+    por exemplo, por memória livre). finalizar(item, erro) roda uma única vez
+    por item, assim que ele sai do pipeline (concluído ou com erro): um item
+    com erro atravessa as etapas restantes sem executá-las.
+    """
+
+    def __init__(self, etapas, tamanho_fila=2, ao_entrar=None, finalizar=None):
+        self.etapas = list(etapas)
+        self.ao_entrar = ao_entrar
+        self.finalizar = finalizar
+        self._filas = [queue.Queue(maxsize=max(1, tamanho_fila)) for _ in self.etapas]
+        self._filas.append(queue.Queue())  # saída: só itens concluídos
+        self._serializadores = [
+            _Serializador() if etapa.serial_por is not None else None
+            for etapa in self.etapas
+        ]
+        self._ativas = [max(1, etapa.threads) for etapa in self.etapas]
+        self._trava = threading.Lock()
+        self._cancelado = threading.Event()
+
+    def executar(self, itens):
+        threads = [threading.Thread(target=self._alimentar, args=(itens,), daemon=True)]
+        for posicao, etapa in enumerate(self.etapas):
+            threads += [
+                threading.Thread(
+                    target=self._trabalhar,
+                    args=(posicao,),
+                    name=f"etapa-{etapa.nome}-{numero}",
+                    daemon=True,
+                )
+                for numero in range(self._ativas[posicao])
+            ]
+        for thread in threads:
+            thread.start()
+
+        prontos = {}
+        proximo = 0
+        try:
+            while True:
+                envelope = self._filas[-1].get()
+                if envelope is _FIM:
+                    break
+                prontos[envelope.indice] = envelope.item
+                while proximo in prontos:
+                    yield prontos.pop(proximo)
+                    proximo += 1
+        finally:
+            # Execução interrompida: os itens em andamento saem sem executar
+            # as etapas restantes (e são finalizados)
+            self._cancelado.set()
+            for thread in threads:
+                thread.join()
+
+    def _alimentar(self, itens):
+        try:
+            for indice, item in enumerate(itens):
+                if self._cancelado.is_set():
+                    break
+                envelope = _Envelope(indice, item)
+                try:
+                    if self.ao_entrar is not None:
+                        self.ao_entrar(item)
+                except Exception as e:
+                    envelope.erro = e
+                for posicao, etapa in enumerate(self.etapas):
+                    if etapa.serial_por is None:
+                        continue
+                    try:
+                        chave = etapa.serial_por(item)
+                    except Exception:
+                        chave = None  # o erro aparece na execução do item
+                    if chave is not None:
+                        ordem = self._serializadores[posicao].registrar(chave)
+                        envelope.ordens[posicao] = (chave, ordem)
+                self._filas[0].put(envelope)  # espera se a fila estiver cheia
+        finally:
+            for _ in range(self._ativas[0]):
+                self._filas[0].put(_FIM)
+
+    def _trabalhar(self, posicao):
+        entrada = self._filas[posicao]
+        serializador = self._serializadores[posicao]
+        while True:
+            envelope = entrada.get()
+            if envelope is _FIM:
+                break
+            if serializador is None or posicao not in envelope.ordens:
+                self._executar(posicao, envelope)
+                continue
+            chave, ordem = envelope.ordens[posicao]
+            if not serializador.entrar(envelope, chave, ordem):
+                continue  # quem estiver com a chave executa este item depois
+            while envelope is not None:
+                self._executar(posicao, envelope)
+                envelope = serializador.sair(chave)
+        self._encerrar(posicao)
+
+    def _executar(self, posicao, envelope):
+        if envelope.erro is None and self._cancelado.is_set():
+            envelope.erro = RuntimeError("Execução interrompida")
+        if envelope.erro is None:
+            try:
+                self.etapas[posicao].funcao(envelope.item)
+            except Exception as e:
+                envelope.erro = e
+        if posicao == len(self.etapas) - 1 and self.finalizar is not None:
+            try:
+                self.finalizar(envelope.item, envelope.erro)
+            except Exception:
+                pass
+        self._filas[posicao + 1].put(envelope)
+
+    def _encerrar(self, posicao):
+        """A última thread da etapa avisa a etapa seguinte que acabou"""
+        with self._trava:
+            self._ativas[posicao] -= 1
+            ultima = self._ativas[posicao] == 0
+        if not ultima:
+            return
+        seguintes = self._ativas[posicao + 1] if posicao + 1 < len(self.etapas) else 1
+        for _ in range(seguintes):
+            self._filas[posicao + 1].put(_FIM)
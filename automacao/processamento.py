@@ -0,0 +1,1115 @@
+"""Extração e organização dos PDFs por cliente (sem dependência do Streamlit)"""
+
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from automacao.analise import analisar_pdf, fluxo_leitura, liberar_objetos
+from automacao.arquivos import (
+    criar_pasta,
+    criar_pasta_preparo,
+    gravar_pdf,
+    publicar_original,
+    publicar_pasta,
+)
+from automacao.cache import DIRETORIO_PADRAO, CachePaginas
+from automacao.classificador import obter_classificador
+from automacao.clientes import DestinoCliente, IndicePastasClientes
+from automacao.memoria import (
+    LIMITE_MEMORIA_PADRAO_MB,
+    ReservaCancelada,
+    abrir_conteudo,
+    arquivo_grande,
+    estimar_memoria_mb,
+    obter_orcamento,
+)
+from automacao.metricas import MedidorEtapas
+from automacao.extratores import EXTRATOR_PADRAO, obter_extrator
+from automacao.pipeline import (
+    CONCORRENCIA_PADRAO,
+    ConcorrenciaEtapas,
+    Etapa,
+    PipelineEtapas,
+)
+from automacao.segmentacao import (
+    CONFIANCA_DOCUMENTO_PADRAO,
+    CONFIANCA_MINIMA_PADRAO,
+    ORIGEM_PERFIL_FIXO,
+    planejar_documentos,
+    tipos_dos_documentos,
+)
+
+# Páginas (base 1) de cada documento principal no pacote padrão
+# (perfil fixo, usado para cada documento que a classificação não encontrou)
+DOCUMENTOS_PRINCIPAIS = {
+    "RG_CPF": [1, 2],  # RG da mãe
+    "CERTIDAO_NASCIMENTO": [6],  # Certidão de Nascimento
+    "COMPROVANTE_RESIDENCIA": [9],  # Comprovante de residência
+    "TERMO_REPRESENTACAO_INSS": [11],  # Termo de Representação
+}
+
+# Tipos de página que precisam ser encontrados para gerar os documentos principais
+TIPOS_PRINCIPAIS = tipos_dos_documentos(DOCUMENTOS_PRINCIPAIS)
+
+# Documento único (opcoes.documento_unico): todos os documentos em um PDF só,
+# com marcadores; as páginas que não entraram em nenhum vão no fim (opcional)
+DOCUMENTO_UNICO = "DOCUMENTOS"
+OUTRAS_PAGINAS = "OUTRAS_PAGINAS"
+
+# Conexões do cache de páginas, uma por thread
+_locais = threading.local()
+
+# Palavras do nome do arquivo que NÃO fazem parte do nome do cliente
+PALAVRAS_REMOVER = [
+    "documentos",
+    "requerimento",
+    "procuração",
+    "contrato",
+    "pdf",
+    "copia",
+]
+
+
+@dataclass
+class OpcoesProcessamento:
+    """Opções do processamento de cada arquivo (enviadas aos processos do pool)"""
+
+    # Hardlink/reflink do original quando origem e destino estão no mesmo disco
+    vincular_original: bool = True
+    # Cortar os documentos pela classificação das páginas (False = perfil fixo)
+    segmentar: bool = True
+    confianca_minima: float = CONFIANCA_MINIMA_PADRAO
+    # Documento principal com confiança média abaixo disto usa as páginas fixas
+    confianca_documento: float = CONFIANCA_DOCUMENTO_PADRAO
+    # Grava também os documentos fora dos principais (procuração, contrato)
+    documentos_extras: bool = False
+    # Parar a classificação quando todos os documentos principais foram
+    # encontrados (as páginas seguintes nem são lidas)
+    parar_ao_encontrar: bool = True
+    # Máximo de páginas classificadas por arquivo (0 = todas)
+    limite_paginas: int = 0
+    # Extrator do texto das páginas ("pypdf2", "pypdfium2" ou "pdfminer")
+    extrator: str = EXTRATOR_PADRAO
+    # Pasta do cache de páginas (None = sem cache)
+    diretorio_cache: str = DIRETORIO_PADRAO
+    # Pouca memória: arquivo mapeado (mmap), páginas liberadas após o uso e
+    # PDFs gravados direto no disco (sempre ativo para arquivos grandes)
+    memoria_limitada: bool = False
+    # Memória (MB) para os arquivos em processamento no servidor (0 = sem limite)
+    limite_memoria_mb: int = LIMITE_MEMORIA_PADRAO_MB
+    # Com um processo só: leitura, classificação, gravação e cópia em etapas
+    # com threads próprias, para a gravação no Drive não parar a leitura
+    em_etapas: bool = True
+    concorrencia: ConcorrenciaEtapas = field(
+        default_factory=lambda: ConcorrenciaEtapas.de_texto(CONCORRENCIA_PADRAO)
+    )
+    # Pasta de processamento: os arquivos de cada cliente são montados nela e
+    # publicados na pasta do cliente de uma vez (None = grava direto)
+    pasta_processados: str = None
+    # Só planeja: pastas e arquivos que seriam gravados, sem gravar nada
+    simular: bool = False
+    # Pasta de preparo da execução atual (definida por processar_lote)
+    preparo: str = None
+    # {arquivo: DestinoCliente} resolvido pelo índice das pastas de clientes
+    # no início da execução (definido por processar_lote)
+    destinos: dict = None
+    # Antes do processamento: arquivos com o mesmo conteúdo de outro (entrada
+    # ou original já organizado) são ignorados; comparar_paginas também avisa
+    # dos que repetem parte das páginas de outro
+    ignorar_repetidos: bool = True
+    comparar_paginas: bool = False
+    # Um PDF por pacote (DOCUMENTOS.pdf, com marcadores) em vez de um por
+    # documento; incluir_restantes acrescenta as páginas fora dos documentos
+    documento_unico: bool = False
+    incluir_restantes: bool = False
+
+
+@dataclass
+class ResultadoArquivo:
+    """Resultado do processamento de um PDF de entrada"""
+
+    arquivo: str
+    nome_pasta: str = ""
+    caminho_pasta: str = ""
+    pasta_pelo_nome: str = ""  # pasta que o nome do arquivo daria, se o índice escolheu outra
+    pasta_nova: bool = False
+    paginas: int = 0  # páginas do PDF de entrada
+    paginas_analisadas: int = 0  # páginas classificadas (pode parar antes do fim)
+    paginas_ocr: list = field(default_factory=list)  # só imagem: precisam de OCR
+    segmentacao: str = ""  # "classificacao" ou "perfil_fixo"
+    origens_documentos: dict = field(default_factory=dict)  # {documento: origem}
+    confianca: float = 0.0  # confiança média das páginas usadas na segmentação
+    paginas_documentos: dict = field(default_factory=dict)  # {documento: [páginas]}
+    documentos: dict = field(default_factory=dict)  # {documento: caminho gerado}
+    original: str = ""  # caminho da cópia do original
+    modo_original: str = ""  # "hardlink", "reflink" ou "copia"
+    memoria_limitada: bool = False  # processado no modo com pouca memória
+    simulacao: bool = False  # só planejado: documentos e original não foram gravados
+    # Outros arquivos com páginas iguais: [{outro, paginas, total_paginas}]
+    sobreposicoes: list = field(default_factory=list)
+    hash_conteudo: str = ""  # SHA-256 do PDF de entrada (vazio sem o cache de páginas)
+    bytes_lidos: int = 0
+    bytes_gravados: int = 0
+    erros: list = field(default_factory=list)  # falhas parciais (não impedem a cópia)
+    erro: str = None  # falha que interrompeu o arquivo
+    duracao: float = 0.0  # segundos
+    etapas: dict = field(default_factory=dict)  # {etapa: {segundos, chamadas, bytes}}
+    memoria_pico_mb: float = None  # maior RSS do processo durante as etapas do arquivo
+    memoria_aumento_mb: float = None  # quanto o RSS subiu durante o arquivo
+
+    @property
+    def arquivos_organizados(self):
+        """Documentos extraídos + o original (apenas se o arquivo foi concluído)"""
+        if self.erro is not None:
+            return 0
+        # No documento único, todos os documentos apontam para o mesmo arquivo
+        return len(set(self.documentos.values())) + 1
+
+    @property
+    def documentos_pelo_perfil_fixo(self):
+        """Documentos cortados pelas páginas fixas, sem a classificação"""
+        return [
+            nome
+            for nome, origem in self.origens_documentos.items()
+            if origem == ORIGEM_PERFIL_FIXO
+        ]
+
+    @property
+    def pdf_unico(self):
+        """Caminho do DOCUMENTOS.pdf, quando os documentos foram gravados juntos"""
+        caminhos = set(self.documentos.values())
+        if len(caminhos) == 1:
+            caminho = caminhos.pop()
+            if Path(caminho).stem == DOCUMENTO_UNICO:
+                return caminho
+        return ""
+
+
+def extrair_nome_cliente(caminho_pdf):
+    """Extrai nome do cliente do nome do arquivo"""
+    nome_arquivo = Path(caminho_pdf).stem
+
+    # Remove números e caracteres especiais, mas mantém espaços
+    nome_limpo = re.sub(r"[_-]", " ", nome_arquivo)
+    nome_limpo = re.sub(r"\d+", "", nome_limpo)  # Remove números
+    nome_limpo = re.sub(
+        r"\.pdf$", "", nome_limpo, flags=re.IGNORECASE
+    )  # Remove .pdf se houver
+
+    # Remove APENAS palavras que realmente não são parte do nome
+    palavras = [
+        palavra
+        for palavra in nome_limpo.split()
+        if palavra.lower() not in PALAVRAS_REMOVER
+    ]
+
+    # NÃO remove palavras pequenas como "de", "da", "do" - são parte do nome!
+    # Junta TODAS as palavras para manter nome completo
+    if palavras:
+        return " ".join(palavras).title()
+    return nome_limpo.title()
+
+
+def nome_pasta_cliente(nome_cliente):
+    """Remove caracteres inválidos para nome de pasta"""
+    return re.sub(r'[<>:"/\\|?*]', "", nome_cliente).strip()
+
+
+def listar_pdfs(pasta_downloads):
+    """Lista os arquivos PDF da pasta, em ordem (vazia se a pasta não existir)"""
+    if not pasta_downloads or not os.path.exists(pasta_downloads):
+        return []
+    return sorted(str(pdf) for pdf in Path(pasta_downloads).glob("*.pdf"))
+
+
+def caminho_pasta_cliente(pdf_path, pasta_clientes):
+    """Pasta de destino do cliente a que o PDF pertence"""
+    nome_pasta = nome_pasta_cliente(extrair_nome_cliente(pdf_path))
+    return os.path.join(pasta_clientes, nome_pasta)
+
+
+def resolver_destinos(pdf_files, pasta_clientes, indice=None):
+    """
+    {arquivo: DestinoCliente} com uma única leitura da pasta dos clientes
+
+    Variações do nome do cliente (acentos, maiúsculas, ordem das palavras)
+    vão para a pasta que já existe em vez de criar outra. Um índice já
+    carregado (IndicePastasClientes) evita ler a pasta de novo.
+    """
+    if indice is None:
+        indice = IndicePastasClientes.carregar(pasta_clientes)
+    destinos = {}
+    for pdf_path in pdf_files:
+        try:
+            nome_pasta = nome_pasta_cliente(extrair_nome_cliente(pdf_path))
+        except Exception:
+            continue  # o erro aparece no processamento do arquivo
+        destinos[str(pdf_path)] = indice.destino(nome_pasta)
+    return destinos
+
+
+def destino_cliente(pdf_path, pasta_clientes, opcoes):
+    """Destino resolvido no início da execução (ou pelo nome do arquivo)"""
+    if opcoes.destinos and str(pdf_path) in opcoes.destinos:
+        return opcoes.destinos[str(pdf_path)]
+    return DestinoCliente(caminho_pasta_cliente(pdf_path, pasta_clientes), None)
+
+
+def caminho_original(pdf_path, pasta):
+    """Cópia do original na pasta do cliente: MAIÚSCULAS e sem .pdf"""
+    return os.path.join(pasta, Path(pdf_path).stem.upper())
+
+
+def extrair_paginas(pdf_reader, output_pdf, page_numbers, medidor=None, direto=False):
+    """
+    Extrai páginas específicas (base 1) de um PDF e salva em um novo arquivo
+
+    Retorna (caminho gravado, bytes gravados).
+    """
+    import PyPDF2
+
+    medidor = medidor or MedidorEtapas()
+    with medidor.etapa("montagem_pdf"):
+        pdf_writer = PyPDF2.PdfWriter()
+
+        for page_num in page_numbers:
+            # Ajusta para índice base 0
+            pdf_writer.add_page(pdf_reader.pages[page_num - 1])
+
+    # Garantir que o arquivo seja salvo como PDF mesmo sem extensão
+    if not output_pdf.lower().endswith(".pdf"):
+        output_pdf += ".pdf"
+
+    # Objetos compartilhados entre as páginas (fontes, imagens) são clonados
+    # uma única vez por PdfWriter; o arquivo é gravado em uma só escrita
+    return output_pdf, gravar_pdf(pdf_writer, output_pdf, medidor, direto)
+
+
+def extrair_documento_unico(
+    pdf_reader, output_pdf, documentos, medidor=None, direto=False, incluir_restantes=False
+):
+    """
+    Grava os documentos ({nome: [páginas base 1]}) em um único PDF
+
+    Cada documento ganha um marcador, um destino nomeado (abre direto em
+    DOCUMENTOS.pdf#RG_CPF) e o próprio rótulo na numeração das páginas
+    ("RG_CPF 1", "RG_CPF 2"). Com um PdfWriter só, fontes e imagens usadas
+    por mais de um documento são gravadas uma vez. Com incluir_restantes, as
+    páginas que não entraram em nenhum documento vão no fim (OUTRAS_PAGINAS).
+
+    Retorna (caminho gravado, bytes gravados).
+    """
+    import PyPDF2
+    from PyPDF2.generic import (
+        ArrayObject,
+        DictionaryObject,
+        NameObject,
+        NumberObject,
+        TextStringObject,
+    )
+
+    medidor = medidor or MedidorEtapas()
+    secoes = {nome: paginas for nome, paginas in documentos.items() if paginas}
+    if incluir_restantes:
+        usadas = {pagina for paginas in secoes.values() for pagina in paginas}
+        restantes = [
+            pagina
+            for pagina in range(1, len(pdf_reader.pages) + 1)
+            if pagina not in usadas
+        ]
+        if restantes:
+            secoes[OUTRAS_PAGINAS] = restantes
+
+    with medidor.etapa("montagem_pdf"):
+        pdf_writer = PyPDF2.PdfWriter()
+        rotulos = ArrayObject()
+        for nome, paginas in secoes.items():
+            inicio = len(pdf_writer.pages)
+            for page_num in paginas:
+                pdf_writer.add_page(pdf_reader.pages[page_num - 1])
+            pdf_writer.add_outline_item(nome, inicio)
+            pdf_writer.add_named_destination(nome, inicio)
+            rotulos.append(NumberObject(inicio))
+            rotulos.append(
+                DictionaryObject(
+                    {
+                        NameObject("/S"): NameObject("/D"),
+                        NameObject("/P"): TextStringObject(f"{nome} "),
+                    }
+                )
+            )
+        # Rótulos das páginas no catálogo (o PyPDF2 3 não tem set_page_label)
+        pdf_writer._root_object[NameObject("/PageLabels")] = DictionaryObject(
+            {NameObject("/Nums"): rotulos}
+        )
+        pdf_writer.page_mode = "/UseOutlines"  # abre com os marcadores à mostra
+
+    if not output_pdf.lower().endswith(".pdf"):
+        output_pdf += ".pdf"
+    return output_pdf, gravar_pdf(pdf_writer, output_pdf, medidor, direto)
+
+
+@dataclass
+class ResultadoExtracao:
+    documentos: dict = field(default_factory=dict)  # {documento: caminho gerado}
+    erros: list = field(default_factory=list)
+    total_paginas: int = 0
+    bytes_gravados: int = 0
+
+
+def extrair_documentos_principais(
+    input_pdf,
+    output_folder,
+    pdf_reader=None,
+    documentos=None,
+    medidor=None,
+    memoria_limitada=False,
+    unico=False,
+    incluir_restantes=False,
+):
+    """
+    Extrai os documentos informados ({nome: [páginas]}); por padrão, APENAS
+    os 4 documentos principais do perfil fixo
+
+    input_pdf pode ser caminho ou stream; com um pdf_reader já aberto o PDF
+    não é lido de novo. Com memoria_limitada, cada documento é gravado direto
+    no disco e os objetos lidos do PDF são descartados em seguida. Com
+    unico, todos vão para DOCUMENTOS.pdf (ver extrair_documento_unico).
+    """
+    if documentos is None:
+        documentos = DOCUMENTOS_PRINCIPAIS
+    medidor = medidor or MedidorEtapas()
+    extracao = ResultadoExtracao()
+    try:
+        if pdf_reader is None:
+            from automacao.leitor import LeitorSobDemanda
+
+            with medidor.etapa("abrir_pdf"):
+                pdf_reader = LeitorSobDemanda(input_pdf)
+        extracao.total_paginas = len(pdf_reader.pages)
+    except Exception as e:
+        extracao.erros.append(f"Erro na extração estruturada: {e}")
+        return extracao
+
+    if unico:
+        return _extrair_unico(
+            extracao,
+            pdf_reader,
+            output_folder,
+            documentos,
+            medidor,
+            memoria_limitada,
+            incluir_restantes,
+        )
+
+    # Extrair cada documento DIRETAMENTE na pasta do cliente
+    for doc_name, paginas in documentos.items():
+        output_pdf = os.path.join(output_folder, doc_name)  # SEM .pdf no final
+        try:
+            caminho, tamanho = extrair_paginas(
+                pdf_reader, output_pdf, paginas, medidor, direto=memoria_limitada
+            )
+            extracao.documentos[doc_name] = caminho
+            extracao.bytes_gravados += tamanho
+        except Exception as e:
+            extracao.erros.append(f"Erro ao extrair páginas {paginas}: {e}")
+        if memoria_limitada:
+            liberar_objetos(pdf_reader)
+
+    return extracao
+
+
+def _extrair_unico(
+    extracao, pdf_reader, output_folder, documentos, medidor, direto, incluir_restantes
+):
+    """Documento único; um documento com páginas fora do PDF fica de fora"""
+    validos = {}
+    for doc_name, paginas in documentos.items():
+        if all(1 <= pagina <= extracao.total_paginas for pagina in paginas):
+            validos[doc_name] = paginas
+        else:
+            extracao.erros.append(
+                f"Erro ao extrair páginas {paginas}: o PDF tem "
+                f"{extracao.total_paginas} página(s)"
+            )
+    output_pdf = os.path.join(output_folder, DOCUMENTO_UNICO)
+    try:
+        caminho, tamanho = extrair_documento_unico(
+            pdf_reader, output_pdf, validos, medidor, direto, incluir_restantes
+        )
+    except Exception as e:
+        extracao.erros.append(f"Erro ao gravar {DOCUMENTO_UNICO}.pdf: {e}")
+        return extracao
+    extracao.documentos = {
+        doc_name: caminho for doc_name, paginas in validos.items() if paginas
+    }
+    extracao.bytes_gravados += tamanho
+    return extracao
+
+
+def _cache_paginas(diretorio):
+    """Cache de páginas por thread (conexões SQLite não são compartilhadas)"""
+    if not diretorio:
+        return None
+    caches = getattr(_locais, "caches", None)
+    if caches is None:
+        caches = _locais.caches = {}
+    if diretorio not in caches:
+        try:
+            caches[diretorio] = CachePaginas(diretorio)
+        except Exception:
+            caches[diretorio] = None  # segue sem cache
+    return caches[diretorio]
+
+
+def planejar_arquivo(pdf_path, dados, opcoes, medidor=None, memoria_limitada=False):
+    """
+    Classifica as páginas (com cache) e define as páginas de cada documento
+
+    Retorna (plano, pdf_reader ou None, mensagens de erro, hash do arquivo
+    ou "" quando não há cache).
+    """
+    if not opcoes.segmentar:
+        return planejar_documentos([], DOCUMENTOS_PRINCIPAIS), None, [], ""
+    try:
+        analise = analisar_pdf(
+            pdf_path,
+            cache=_cache_paginas(opcoes.diretorio_cache),
+            dados=dados,
+            medidor=medidor,
+            liberar_paginas=memoria_limitada,
+            tipos_necessarios=TIPOS_PRINCIPAIS if opcoes.parar_ao_encontrar else None,
+            limite_paginas=opcoes.limite_paginas,
+            extrator=obter_extrator(opcoes.extrator),
+        )
+    except Exception as e:
+        plano = planejar_documentos([], DOCUMENTOS_PRINCIPAIS)
+        return plano, None, [f"Erro ao classificar as páginas: {e}"], ""
+
+    plano = planejar_documentos(
+        analise.paginas,
+        DOCUMENTOS_PRINCIPAIS,
+        opcoes.confianca_minima,
+        total_paginas=analise.total_paginas,
+        # Com a análise interrompida, os outros documentos podem estar cortados
+        somente_perfil=analise.interrompida or not opcoes.documentos_extras,
+        confianca_documento=opcoes.confianca_documento,
+    )
+    return plano, analise.pdf_reader, list(analise.erros), analise.hash_arquivo
+
+
+class ArquivoEmProcessamento:
+    """
+    Um PDF passando pelas etapas: leitura, classificação, gravação dos
+    documentos e cópia do original
+
+    processar_arquivo executa as etapas em sequência; o pipeline em etapas
+    executa cada uma em uma thread diferente, com o conteúdo do arquivo
+    aberto da leitura até concluir().
+    """
+
+    def __init__(self, pdf_path, pasta_clientes, opcoes):
+        self.pdf_path = pdf_path
+        self.pasta_clientes = pasta_clientes
+        self.opcoes = opcoes
+        self.medidor = MedidorEtapas()
+        self.resultado = ResultadoArquivo(arquivo=str(pdf_path))
+        self.memoria_reservada = 0.0  # MB reservados no orçamento de memória
+        self._inicio = time.perf_counter()
+        self._conteudo = ExitStack()
+        self._dados = None
+        self._limitada = False
+        self._plano = None
+        self._pdf_reader = None
+        self._erros = []
+        self._pasta_escrita = None  # pasta do cliente ou a pasta de preparo dele
+        self._destino = None
+
+    def destino(self):
+        """Pasta do cliente normalizada (arquivos do mesmo cliente não se cruzam)"""
+        destino = destino_cliente(self.pdf_path, self.pasta_clientes, self.opcoes)
+        return os.path.normcase(os.path.normpath(destino.caminho))
+
+    def ler(self):
+        """Lê (ou mapeia) o arquivo uma única vez"""
+        resultado = self.resultado
+        self._destino = destino_cliente(self.pdf_path, self.pasta_clientes, self.opcoes)
+        resultado.caminho_pasta = self._destino.caminho
+        resultado.pasta_pelo_nome = self._destino.pasta_pelo_nome
+        resultado.nome_pasta = os.path.basename(resultado.caminho_pasta)
+        self._pasta_escrita = resultado.caminho_pasta
+        if self.opcoes.preparo:
+            self._pasta_escrita = os.path.join(self.opcoes.preparo, resultado.nome_pasta)
+        self._limitada = self.opcoes.memoria_limitada or arquivo_grande(self.pdf_path)
+        resultado.memoria_limitada = self._limitada
+        with self.medidor.etapa("leitura"):
+            self._dados = self._conteudo.enter_context(
+                abrir_conteudo(self.pdf_path, self._limitada)
+            )
+        resultado.bytes_lidos = len(self._dados)
+        self.medidor.contar_bytes("leitura", len(self._dados))
+
+    def classificar(self):
+        """A classificação (ou o cache dela) decide os cortes dos documentos"""
+        (
+            self._plano,
+            self._pdf_reader,
+            self._erros,
+            hash_conteudo,
+        ) = planejar_arquivo(
+            self.pdf_path, self._dados, self.opcoes, self.medidor, self._limitada
+        )
+        resultado = self.resultado
+        resultado.hash_conteudo = hash_conteudo
+        resultado.segmentacao = self._plano.origem
+        resultado.origens_documentos = self._plano.origens
+        resultado.confianca = self._plano.confianca
+        resultado.paginas_documentos = self._plano.documentos
+        resultado.paginas_analisadas = self._plano.paginas_analisadas
+        resultado.paginas_ocr = self._plano.paginas_ocr
+
+    def gravar_documentos(self):
+        """Cria a pasta do cliente (ou a de preparo) e grava os documentos nela"""
+        resultado = self.resultado
+        if self.opcoes.simular:
+            self._simular_documentos()
+            return
+        # Pasta que já existia no início da execução: nenhum acesso ao disco
+        if not (self._destino.existente and not self.opcoes.preparo):
+            with self.medidor.etapa("criar_pasta"):
+                if criar_pasta(self._pasta_escrita):
+                    resultado.pasta_nova = not self._pasta_existente()
+
+        # O mesmo leitor da classificação é reaproveitado na extração
+        extracao = extrair_documentos_principais(
+            fluxo_leitura(self._dados),
+            self._pasta_escrita,
+            pdf_reader=self._pdf_reader,
+            documentos=self._plano.documentos,
+            medidor=self.medidor,
+            memoria_limitada=self._limitada,
+            unico=self.opcoes.documento_unico,
+            incluir_restantes=self.opcoes.incluir_restantes,
+        )
+        self._pdf_reader = None  # objetos do PDF liberados antes da cópia do original
+        resultado.paginas = extracao.total_paginas
+        resultado.documentos = extracao.documentos
+        resultado.erros = self._erros + extracao.erros
+        resultado.bytes_gravados = extracao.bytes_gravados
+
+    def _pasta_existente(self):
+        """A pasta do cliente já existia (pelo índice, quando disponível)"""
+        if self._destino.existente is not None:
+            return self._destino.existente
+        if self.opcoes.preparo or self.opcoes.simular:
+            return os.path.exists(self.resultado.caminho_pasta)
+        return False  # criada agora na própria pasta do cliente
+
+    def _simular_documentos(self):
+        """Documentos que seriam gravados (nenhum arquivo é criado)"""
+        resultado = self.resultado
+        resultado.simulacao = True
+        resultado.pasta_nova = not self._pasta_existente()
+        from automacao.leitor import LeitorSobDemanda
+
+        try:
+            pdf_reader = self._pdf_reader or LeitorSobDemanda(fluxo_leitura(self._dados))
+            resultado.paginas = len(pdf_reader.pages)
+        except Exception as e:
+            self._erros.append(f"Erro na extração estruturada: {e}")
+        self._pdf_reader = None
+        resultado.documentos = {
+            nome: os.path.join(
+                resultado.caminho_pasta,
+                f"{DOCUMENTO_UNICO if self.opcoes.documento_unico else nome}.pdf",
+            )
+            for nome in self._plano.documentos
+        }
+        resultado.erros = self._erros
+
+    def copiar_original(self):
+        """SEMPRE copiar o PDF original SEM extensão .pdf"""
+        resultado = self.resultado
+        if self.opcoes.simular:
+            resultado.original = caminho_original(self.pdf_path, resultado.caminho_pasta)
+            return
+        caminho_destino = caminho_original(self.pdf_path, self._pasta_escrita)
+        with self.medidor.etapa("original"):
+            resultado.modo_original, gravados = publicar_original(
+                self.pdf_path,
+                caminho_destino,
+                self._dados,
+                vincular=self.opcoes.vincular_original,
+            )
+        self.medidor.contar_bytes("original", gravados)
+        resultado.bytes_gravados += gravados
+        resultado.original = caminho_destino
+
+    def concluir(self, erro=None):
+        """Fecha o conteúdo do arquivo e fecha o resultado (tempo, etapas, memória)"""
+        resultado = self.resultado
+        if erro is not None:
+            resultado.erro = str(erro)
+        self._pdf_reader = None
+        self._dados = None
+        try:
+            self._conteudo.close()
+        except Exception:
+            pass
+        resultado.duracao = time.perf_counter() - self._inicio
+        resultado.etapas = self.medidor.como_dict()
+        resultado.memoria_pico_mb = self.medidor.pico_mb
+        resultado.memoria_aumento_mb = self.medidor.aumento_mb
+        return resultado
+
+
+def processar_arquivo(pdf_path, pasta_clientes, opcoes=None):
+    """
+    Organiza um PDF: pasta do cliente, documentos principais e original
+
+    O arquivo é lido uma única vez: os mesmos bytes alimentam o PdfReader
+    (compartilhado por todos os documentos) e, se preciso, a cópia do original.
+    No modo com pouca memória o arquivo é mapeado em vez de lido.
+    """
+    arquivo = ArquivoEmProcessamento(
+        pdf_path, pasta_clientes, opcoes or OpcoesProcessamento()
+    )
+    try:
+        arquivo.ler()
+        arquivo.classificar()
+        arquivo.gravar_documentos()
+        arquivo.copiar_original()
+    except Exception as e:
+        return arquivo.concluir(e)
+    return arquivo.concluir()
+
+
+def _processar_grupo(pdf_paths, pasta_clientes, opcoes):
+    """Processa, em sequência, os arquivos que caem na mesma pasta de cliente"""
+    return [
+        processar_arquivo(pdf_path, pasta_clientes, opcoes) for pdf_path in pdf_paths
+    ]
+
+
+def agrupar_por_pasta(pdf_files, pasta_clientes, destinos=None):
+    """
+    Agrupa os índices dos arquivos pela pasta de cliente de destino
+
+    Arquivos do mesmo cliente ficam no mesmo grupo para nunca serem
+    gravados em paralelo na mesma pasta.
+    """
+    destinos = destinos or {}
+    grupos = {}
+    for indice, pdf_path in enumerate(pdf_files):
+        try:
+            if str(pdf_path) in destinos:
+                destino = destinos[str(pdf_path)].caminho
+            else:
+                destino = caminho_pasta_cliente(pdf_path, pasta_clientes)
+        except Exception:
+            destino = str(pdf_path)  # o erro aparece no processamento do arquivo
+        chave = os.path.normcase(os.path.normpath(destino))
+        grupos.setdefault(chave, []).append(indice)
+    return list(grupos.values())
+
+
+def _registrar_espera(resultado, segundos):
+    """Tempo que o arquivo esperou na fila por memória (etapa fila_memoria)"""
+    if segundos > 0:
+        resultado.etapas = {
+            "fila_memoria": {"segundos": round(segundos, 6), "chamadas": 1, "bytes": 0},
+            **resultado.etapas,
+        }
+
+
+def _processar_no_limite(pdf_path, pasta_clientes, opcoes, orcamento, cancelado=None):
+    """processar_arquivo, esperando memória livre quando há um limite"""
+    if orcamento is None:
+        return processar_arquivo(pdf_path, pasta_clientes, opcoes)
+    memoria = estimar_memoria_mb(pdf_path, opcoes.memoria_limitada)
+    with orcamento.reserva(memoria, cancelado) as espera:
+        resultado = processar_arquivo(pdf_path, pasta_clientes, opcoes)
+    _registrar_espera(resultado, espera)
+    return resultado
+
+
+def processar_em_etapas(
+    pdf_files, pasta_clientes, opcoes, orcamento=None, cancelado=None
+):
+    """
+    Processa os PDFs no pipeline em etapas e gera os resultados NA ORDEM de entrada
+
+    As filas entre as etapas são limitadas (opcoes.concorrencia.fila): se a
+    gravação na pasta dos clientes atrasa, a leitura de arquivos novos para.
+    A gravação é feita na ordem de entrada para cada pasta de cliente, como no
+    processamento sequencial; a cópia do original não disputa os mesmos nomes.
+    Com cancelado definido durante a espera por memória, os resultados param
+    no arquivo que esperava.
+    """
+    concorrencia = opcoes.concorrencia
+    interrompidos = set()  # arquivos que não chegaram a começar (cancelado)
+
+    def ao_entrar(arquivo):
+        # Reservada em ordem de entrada: um arquivo nunca espera memória
+        # presa por outro que, por sua vez, espera por ele
+        if orcamento is not None:
+            memoria = estimar_memoria_mb(arquivo.pdf_path, opcoes.memoria_limitada)
+            try:
+                espera = orcamento.reservar(memoria, cancelado)
+            except ReservaCancelada:
+                interrompidos.add(id(arquivo))
+                raise
+            arquivo.memoria_reservada = memoria
+            if espera > 0:
+                arquivo.medidor.adicionar("fila_memoria", espera)
+
+    def finalizar(arquivo, erro):
+        arquivo.concluir(erro)
+        if orcamento is not None and arquivo.memoria_reservada:
+            orcamento.liberar(arquivo.memoria_reservada)
+            arquivo.memoria_reservada = 0.0
+
+    pipeline = PipelineEtapas(
+        [
+            Etapa("leitura", ArquivoEmProcessamento.ler, concorrencia.leitura),
+            Etapa(
+                "classificacao",
+                ArquivoEmProcessamento.classificar,
+                concorrencia.classificacao,
+            ),
+            Etapa(
+                "escrita",
+                ArquivoEmProcessamento.gravar_documentos,
+                concorrencia.escrita,
+                serial_por=ArquivoEmProcessamento.destino,
+            ),
+            Etapa("copia", ArquivoEmProcessamento.copiar_original, concorrencia.copia),
+        ],
+        tamanho_fila=concorrencia.fila,
+        ao_entrar=ao_entrar,
+        finalizar=finalizar,
+    )
+    arquivos = (
+        ArquivoEmProcessamento(pdf_path, pasta_clientes, opcoes)
+        for pdf_path in pdf_files
+        if not interrompidos
+    )
+    for arquivo in pipeline.executar(arquivos):
+        if id(arquivo) in interrompidos:
+            return
+        yield arquivo.resultado
+
+
+def _publicar_grupo(resultados, preparo):
+    """Publica a pasta montada de um cliente e aponta os resultados para ela"""
+    concluidos = [resultado for resultado in resultados if resultado.nome_pasta]
+    if not concluidos:
+        return
+    destino = concluidos[0].caminho_pasta
+    montada = os.path.join(preparo, concluidos[0].nome_pasta)
+    if not os.path.isdir(montada):
+        return  # nenhum arquivo do cliente chegou a gravar
+
+    pasta_existia = os.path.exists(destino)
+    inicio = time.perf_counter()
+    try:
+        copiados = publicar_pasta(montada, destino)
+    except Exception as e:
+        for resultado in concluidos:
+            if resultado.erro is None:
+                resultado.erro = f"Erro ao publicar a pasta do cliente: {e}"
+        return
+    segundos = time.perf_counter() - inicio
+
+    for resultado in concluidos:
+        if pasta_existia:
+            resultado.pasta_nova = False
+        resultado.documentos = {
+            nome: os.path.join(destino, os.path.basename(caminho))
+            for nome, caminho in resultado.documentos.items()
+        }
+        copiados_arquivo = sum(
+            copiados.get(os.path.basename(caminho), 0)
+            for caminho in resultado.documentos.values()
+        )
+        if resultado.original:
+            nome_original = os.path.basename(resultado.original)
+            resultado.original = os.path.join(destino, nome_original)
+            if copiados.get(nome_original):
+                resultado.modo_original = "copia"  # o vínculo não atravessa discos
+                copiados_arquivo += copiados[nome_original]
+        resultado.bytes_gravados += copiados_arquivo
+        resultado.etapas = {
+            **resultado.etapas,
+            "publicacao": {
+                "segundos": round(segundos / len(concluidos), 6),
+                "chamadas": 1,
+                "bytes": copiados_arquivo,
+            },
+        }
+
+
+def _publicar_por_cliente(
+    resultados, pdf_files, pasta_clientes, preparo, destinos=None
+):
+    """
+    Publica a pasta de cada cliente quando o último arquivo dele na execução
+    termina e gera os resultados NA ORDEM de entrada
+
+    Se a execução for interrompida, a pasta de preparo é apagada: os clientes
+    ainda não publicados ficam como estavam antes da execução.
+    """
+    grupos = agrupar_por_pasta(pdf_files, pasta_clientes, destinos)
+    ultimo_do_grupo = {grupo[-1]: grupo for grupo in grupos}
+    recebidos = {}
+    prontos = set()
+    proximo = 0
+    try:
+        for indice, resultado in enumerate(resultados):
+            recebidos[indice] = resultado
+            grupo = ultimo_do_grupo.get(indice)
+            if grupo is None:
+                continue
+            _publicar_grupo([recebidos[i] for i in grupo], preparo)
+            prontos.update(grupo)
+            while proximo in prontos:
+                yield recebidos.pop(proximo)
+                proximo += 1
+    finally:
+        resultados.close()
+        shutil.rmtree(preparo, ignore_errors=True)
+
+
+def _simular_lote(resultados):
+    """Na simulação, a pasta nova aparece só no primeiro arquivo do cliente"""
+    planejadas = set()
+    for resultado in resultados:
+        if resultado.caminho_pasta in planejadas:
+            resultado.pasta_nova = False
+        planejadas.add(resultado.caminho_pasta)
+        yield resultado
+
+
+def descrever_plano(resultado, planejados):
+    """
+    Linhas do plano de um arquivo simulado: "criar" ou "substituir" para
+    cada arquivo que seria gravado
+
+    `planejados` guarda os caminhos já planejados na execução (um arquivo
+    gravado por um arquivo anterior do mesmo cliente seria substituído).
+    """
+    linhas = []
+    if resultado.pasta_nova:
+        linhas.append(f"criar pasta {resultado.caminho_pasta}")
+    caminhos = list(dict.fromkeys(resultado.documentos.values()))
+    if resultado.original:
+        caminhos.append(resultado.original)
+    for caminho in caminhos:
+        existe = caminho in planejados or os.path.exists(caminho)
+        linhas.append(f"{'substituir' if existe else 'criar'} {caminho}")
+        planejados.add(caminho)
+    return linhas
+
+
+def processar_lote(pdf_files, pasta_clientes, workers=1, opcoes=None, cancelado=None):
+    """
+    Processa uma lista de PDFs e gera os resultados NA ORDEM de entrada
+
+    Com workers > 1 os arquivos são distribuídos em um ProcessPoolExecutor;
+    a falha de um arquivo (ou de um processo) não afeta os demais: se um
+    processo morre, o pool é recriado e os grupos que estavam nele rodam de
+    novo, um de cada vez, e só o que derrubou o processo sai com erro. Com
+    um processo só, o padrão é o pipeline em etapas (opcoes.em_etapas).
+
+    Com um limite de memória (opcoes.limite_memoria_mb), um arquivo só começa
+    quando a memória estimada para ele cabe no que sobra do limite; os
+    demais esperam na fila, inclusive entre execuções simultâneas no app.
+    Se cancelado (threading.Event) for definido durante essa espera, o lote
+    termina ali: os arquivos seguintes não geram resultado.
+
+    Com opcoes.pasta_processados, os arquivos são montados em uma pasta de
+    preparo e cada cliente é publicado de uma vez ao final dos arquivos
+    dele; com opcoes.simular, nada é gravado (só o plano).
+
+    A pasta de cada cliente é resolvida no início, por um índice montado
+    com uma única leitura da pasta dos clientes (resolver_destinos).
+    """
+    opcoes = opcoes or OpcoesProcessamento()
+    if opcoes.destinos is None:
+        opcoes = replace(opcoes, destinos=resolver_destinos(pdf_files, pasta_clientes))
+    if opcoes.simular:
+        yield from _simular_lote(
+            _executar_lote(
+                pdf_files,
+                pasta_clientes,
+                workers,
+                replace(opcoes, preparo=None),
+                cancelado,
+            )
+        )
+        return
+    if opcoes.pasta_processados:
+        preparo = criar_pasta_preparo(opcoes.pasta_processados)
+        resultados = _executar_lote(
+            pdf_files,
+            pasta_clientes,
+            workers,
+            replace(opcoes, preparo=preparo),
+            cancelado,
+        )
+        yield from _publicar_por_cliente(
+            resultados, pdf_files, pasta_clientes, preparo, opcoes.destinos
+        )
+        return
+    yield from _executar_lote(pdf_files, pasta_clientes, workers, opcoes, cancelado)
+
+
+def _opcoes_do_grupo(opcoes, pdf_paths):
+    """Opções enviadas ao processo do pool só com os destinos do grupo"""
+    if not opcoes.destinos:
+        return opcoes
+    destinos = {
+        str(pdf_path): opcoes.destinos[str(pdf_path)]
+        for pdf_path in pdf_paths
+        if str(pdf_path) in opcoes.destinos
+    }
+    return replace(opcoes, destinos=destinos)
+
+
+def _executar_lote(pdf_files, pasta_clientes, workers, opcoes, cancelado=None):
+    """Corpo de processar_lote: gravação direta ou na pasta de preparo"""
+    orcamento = obter_orcamento(opcoes.limite_memoria_mb)
+
+    if workers <= 1 or len(pdf_files) <= 1:
+        if opcoes.em_etapas and len(pdf_files) > 1:
+            yield from processar_em_etapas(
+                pdf_files, pasta_clientes, opcoes, orcamento, cancelado
+            )
+            return
+        for pdf_path in pdf_files:
+            try:
+                resultado = _processar_no_limite(
+                    pdf_path, pasta_clientes, opcoes, orcamento, cancelado
+                )
+            except ReservaCancelada:
+                return
+            yield resultado
+        return
+
+    grupos = agrupar_por_pasta(pdf_files, pasta_clientes, opcoes.destinos)
+    max_workers = min(workers, len(grupos))
+    pendentes = deque(grupos)
+    # Grupos que estavam no pool quando um processo morreu (falta de memória,
+    # falha do PyPDF2 em C): rodam de novo, um de cada vez, para descobrir
+    # qual derrubou o processo sem perder os demais
+    isolar = deque()
+    futuros = {}  # futuro -> (índices, MB reservados, segundos de espera, isolado)
+    prontos = {}
+    proximo = 0
+    bloqueado_desde = None
+    quebrado = False
+
+    # Compilado antes de criar o pool: com fork, os processos herdam pronto
+    obter_classificador()
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        while pendentes or isolar or futuros:
+            if quebrado and not futuros:
+                executor.shutdown()
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+                quebrado = False
+
+            # Sem limite, todos os grupos vão para a fila do pool; com
+            # limite, só os que cabem na memória (um por processo livre)
+            while not quebrado:
+                if isolar:
+                    if futuros:
+                        break
+                    fila = isolar
+                elif pendentes and (orcamento is None or len(futuros) < max_workers):
+                    fila = pendentes
+                else:
+                    break
+                indices = fila[0]
+                memoria = 0
+                espera = 0.0
+                if orcamento is not None:
+                    # Os arquivos do grupo são processados um de cada vez
+                    memoria = max(
+                        estimar_memoria_mb(pdf_files[i], opcoes.memoria_limitada)
+                        for i in indices
+                    )
+                    if not orcamento.tentar_reservar(memoria):
+                        if bloqueado_desde is None:
+                            bloqueado_desde = time.perf_counter()
+                        if futuros:
+                            break  # espera um grupo desta execução terminar
+                        # A memória está com outra execução
+                        try:
+                            orcamento.reservar(memoria, cancelado)
+                        except ReservaCancelada:
+                            return
+                    if bloqueado_desde is not None:
+                        espera = time.perf_counter() - bloqueado_desde
+                        bloqueado_desde = None
+                try:
+                    futuro = executor.submit(
+                        _processar_grupo,
+                        [pdf_files[i] for i in indices],
+                        pasta_clientes,
+                        _opcoes_do_grupo(opcoes, [pdf_files[i] for i in indices]),
+                    )
+                except BrokenProcessPool:
+                    if orcamento is not None:
+                        orcamento.liberar(memoria)
+                    quebrado = True
+                    break
+                fila.popleft()
+                futuros[futuro] = (indices, memoria, espera, fila is isolar)
+
+            concluidos, _ = wait(futuros, return_when=FIRST_COMPLETED)
+            for concluido in concluidos:
+                indices, memoria, espera, isolado = futuros.pop(concluido)
+                if orcamento is not None:
+                    orcamento.liberar(memoria)
+                try:
+                    resultados = concluido.result()
+                except BrokenProcessPool:
+                    quebrado = True
+                    if not isolado:
+                        isolar.append(indices)
+                        continue
+                    resultados = [
+                        ResultadoArquivo(
+                            arquivo=str(pdf_files[i]),
+                            erro="O processo que lia o arquivo terminou de forma "
+                            "inesperada (falta de memória?)",
+                        )
+                        for i in indices
+                    ]
+                except Exception as e:
+                    resultados = [
+                        ResultadoArquivo(arquivo=str(pdf_files[i]), erro=str(e))
+                        for i in indices
+                    ]
+                _registrar_espera(resultados[0], espera)
+                prontos.update(zip(indices, resultados))
+
+            # Liberar tudo o que já está disponível na ordem original
+            while proximo in prontos:
+                yield prontos.pop(proximo)
+                proximo += 1
+    finally:
+        # Execução interrompida: devolve a memória dos grupos em andamento
+        if orcamento is not None:
+            for _, memoria, _, _ in futuros.values():
+                orcamento.liberar(memoria)
+        executor.shutdown()
@@ -0,0 +1,202 @@
+"""Segmentação do PDF em documentos a partir da classificação de cada página"""
+
+from dataclasses import dataclass, field
+
+from automacao.classificador import TIPO_DESCONHECIDO
+
+# Confiança mínima para uma página entrar em um documento
+CONFIANCA_MINIMA_PADRAO = 0.3
+
+# Confiança média abaixo da qual um documento principal usa as páginas fixas
+CONFIANCA_DOCUMENTO_PADRAO = 0.5
+
+# Nome do arquivo gerado para cada tipo (o padrão é o próprio nome do tipo)
+NOMES_DOCUMENTOS = {
+    "TERMO_REPRESENTACAO": "TERMO_REPRESENTACAO_INSS",
+}
+
+ORIGEM_CLASSIFICACAO = "classificacao"
+ORIGEM_PERFIL_FIXO = "perfil_fixo"
+
+
+@dataclass
+class Segmento:
+    """Sequência contínua de páginas do mesmo tipo"""
+
+    tipo: str
+    inicio: int  # página inicial (base 1)
+    fim: int  # página final (base 1, inclusiva)
+    confianca: float
+
+    @property
+    def paginas(self):
+        return list(range(self.inicio, self.fim + 1))
+
+
+@dataclass
+class PlanoDocumentos:
+    """Quais páginas vão para cada documento gerado"""
+
+    documentos: dict = field(default_factory=dict)  # {nome: [páginas base 1]}
+    origem: str = ORIGEM_CLASSIFICACAO
+    origens: dict = field(default_factory=dict)  # {nome: origem das páginas}
+    confianca: float = 0.0  # média das páginas dos documentos classificados
+    confiancas: dict = field(default_factory=dict)  # {nome: confiança da classificação}
+    segmentos: list = field(default_factory=list)
+    paginas_analisadas: int = 0  # páginas classificadas usadas no plano
+    paginas_ocr: list = field(default_factory=list)  # páginas só com imagem
+
+
+def segmentar(paginas, confianca_minima=CONFIANCA_MINIMA_PADRAO):
+    """
+    Junta páginas consecutivas com o mesmo rótulo em segmentos
+
+    Páginas desconhecidas ou com confiança abaixo do mínimo interrompem o
+    segmento e não entram em nenhum documento.
+    """
+    segmentos = []
+    atual = None
+    confiancas = []
+
+    for pagina in paginas:
+        classificacao = pagina.classificacao
+        tipo = classificacao.tipo
+        if classificacao.confianca < confianca_minima:
+            tipo = TIPO_DESCONHECIDO
+
+        if atual is not None and tipo == atual.tipo and pagina.numero == atual.fim + 1:
+            atual.fim = pagina.numero
+            confiancas.append(classificacao.confianca)
+            continue
+
+        if atual is not None:
+            atual.confianca = round(sum(confiancas) / len(confiancas), 3)
+            segmentos.append(atual)
+            atual = None
+
+        if tipo != TIPO_DESCONHECIDO:
+            atual = Segmento(tipo, pagina.numero, pagina.numero, 0.0)
+            confiancas = [classificacao.confianca]
+
+    if atual is not None:
+        atual.confianca = round(sum(confiancas) / len(confiancas), 3)
+        segmentos.append(atual)
+
+    return segmentos
+
+
+def planejar_documentos(
+    paginas,
+    perfil_fixo,
+    confianca_minima=CONFIANCA_MINIMA_PADRAO,
+    total_paginas=None,
+    somente_perfil=True,
+    confianca_documento=CONFIANCA_DOCUMENTO_PADRAO,
+):
+    """
+    Define as páginas de cada documento a partir da classificação
+
+    Segmentos do mesmo tipo viram um único documento (páginas em ordem).
+    Um documento do perfil fixo sem segmento, ou com confiança média abaixo
+    de confianca_documento, usa as páginas fixas dele que não estão em
+    outro documento (e que existem no PDF, com total_paginas); sem nenhum
+    segmento, o perfil fixo inteiro. Só os documentos do perfil fixo são
+    gerados, a não ser com somente_perfil=False (os outros tipos, como
+    procuração e contrato, entram só com a classificação).
+    """
+    segmentos = segmentar(paginas, confianca_minima)
+    paginas_ocr = [p.numero for p in paginas if getattr(p, "precisa_ocr", False)]
+    if not segmentos:
+        return PlanoDocumentos(
+            documentos={nome: list(pags) for nome, pags in perfil_fixo.items()},
+            origem=ORIGEM_PERFIL_FIXO,
+            origens=dict.fromkeys(perfil_fixo, ORIGEM_PERFIL_FIXO),
+            paginas_analisadas=len(paginas),
+            paginas_ocr=paginas_ocr,
+        )
+
+    por_documento = {}  # {nome: [segmentos]}
+    for segmento in segmentos:
+        nome = NOMES_DOCUMENTOS.get(segmento.tipo, segmento.tipo)
+        if somente_perfil and nome not in perfil_fixo:
+            continue
+        por_documento.setdefault(nome, []).append(segmento)
+    confiancas = {
+        nome: _confianca_media(segmentos_documento)
+        for nome, segmentos_documento in por_documento.items()
+    }
+
+    # Documentos do perfil com a classificação duvidosa dão lugar às páginas
+    # fixas, desde que elas não estejam em um documento confiável
+    duvidosos = {
+        nome
+        for nome in por_documento
+        if nome in perfil_fixo and confiancas[nome] < confianca_documento
+    }
+    documentos = {
+        nome: [pagina for segmento in segmentos_documento for pagina in segmento.paginas]
+        for nome, segmentos_documento in por_documento.items()
+    }
+    origens = dict.fromkeys(documentos, ORIGEM_CLASSIFICACAO)
+    ocupadas = {
+        pagina
+        for nome, pags in documentos.items()
+        if nome not in duvidosos
+        for pagina in pags
+    }
+    for nome, pags in perfil_fixo.items():
+        if nome in documentos and nome not in duvidosos:
+            continue
+        livres = [
+            pagina
+            for pagina in pags
+            if pagina not in ocupadas
+            and (total_paginas is None or pagina <= total_paginas)
+        ]
+        if livres:
+            documentos[nome] = livres
+            origens[nome] = ORIGEM_PERFIL_FIXO
+            ocupadas.update(livres)
+    documentos = dict(sorted(documentos.items(), key=lambda item: min(item[1])))
+
+    usados = [
+        segmento
+        for nome, segmentos_documento in por_documento.items()
+        if origens.get(nome) == ORIGEM_CLASSIFICACAO
+        for segmento in segmentos_documento
+    ]
+    return PlanoDocumentos(
+        documentos=documentos,
+        origem=ORIGEM_CLASSIFICACAO,
+        origens={nome: origens[nome] for nome in documentos},
+        confianca=_confianca_media(usados),
+        confiancas={nome: confiancas[nome] for nome in documentos if nome in confiancas},
+        segmentos=segmentos,
+        paginas_analisadas=len(paginas),
+        paginas_ocr=paginas_ocr,
+    )
+
+
+def _confianca_media(segmentos):
+    """Confiança média das páginas dos segmentos (0 sem segmentos)"""
+    total = sum(s.fim - s.inicio + 1 for s in segmentos)
+    if not total:
+        return 0.0
+    return round(sum(s.confianca * (s.fim - s.inicio + 1) for s in segmentos) / total, 3)
+
+
+def tipos_dos_documentos(nomes):
+    """Tipos do classificador que geram os documentos com estes nomes"""
+    tipos_por_nome = {nome: tipo for tipo, nome in NOMES_DOCUMENTOS.items()}
+    return {tipos_por_nome.get(nome, nome) for nome in nomes}
+
+
+def descrever_paginas(paginas):
+    """Descreve a lista de páginas em faixas (ex.: [1, 2, 3, 6] -> 1-3, 6)"""
+    faixas = []
+    for pagina in sorted(paginas):
+        if faixas and pagina == faixas[-1][1] + 1:
+            faixas[-1][1] = pagina
+        else:
+            faixas.append([pagina, pagina])
+    return ", ".join(f"{a}-{b}" if a != b else str(a) for a, b in faixas)
@@ -0,0 +1,235 @@
+"""
+Trabalhador da fila: processa as execuções enfileiradas pelo app
+
+Uso:
+    python -m automacao trabalhador [--vagas 2]
+
+Cada vaga é um processo que pega uma execução de cada vez; com 2 vagas, até
+duas execuções (de usuários diferentes, se houver) andam ao mesmo tempo e as
+demais esperam na fila. O limite de memória (opcoes.limite_memoria_mb) é
+dividido entre as vagas pelo OrcamentoCompartilhado. O app inicia um
+trabalhador sozinho quando não encontra nenhum ativo.
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from automacao.cache import DIRETORIO_PADRAO
+from automacao.classificador import obter_classificador
+from automacao.clientes import IndicePastasClientes
+from automacao.duplicados import separar_repetidos
+from automacao.fila import (
+    ARQUIVO_IGNORADO,
+    CANCELADO,
+    CONCLUIDO,
+    FALHOU,
+    TEMPO_ABANDONO,
+    FilaTrabalhos,
+    opcoes_de_texto,
+)
+from automacao.manifesto import ManifestoProcessamento
+from automacao.processamento import processar_lote, resolver_destinos
+
+# Execuções processadas ao mesmo tempo (processos do trabalhador)
+VAGAS_PADRAO = int(os.environ.get("AUTOMACAO_VAGAS", "2"))
+
+# Segundos entre os sinais de vida e entre as consultas à fila vazia
+INTERVALO_BATIMENTO = 5
+INTERVALO_CONSULTA = 1.0
+
+# O trabalhador iniciado pelo app termina depois deste tempo (s) sem execuções
+OCIOSO_APP = 600
+
+
+class _Batimento:
+    """Thread que mantém a execução viva na fila enquanto os arquivos são processados"""
+
+    def __init__(self, diretorio, trabalho_id):
+        self.cancelado = threading.Event()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(
+            target=self._bater, args=(diretorio, trabalho_id), daemon=True
+        )
+
+    def _bater(self, diretorio, trabalho_id):
+        # Conexão própria: conexões SQLite não são compartilhadas entre threads
+        with FilaTrabalhos(diretorio) as fila:
+            while not self._parar.wait(INTERVALO_BATIMENTO):
+                try:
+                    if not fila.bater(trabalho_id):
+                        self.cancelado.set()
+                except Exception:
+                    pass  # banco ocupado: tenta de novo no próximo sinal
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+
+
+def executar_trabalho(fila, trabalho, diretorio=DIRETORIO_PADRAO):
+    """
+    Processa os arquivos ainda pendentes de uma execução
+
+    Cada arquivo concluído é gravado na fila (e no manifesto) na hora: se o
+    processo cair, a execução recomeça do primeiro arquivo não concluído.
+    Retorna o estado final (concluido ou cancelado).
+    """
+    opcoes = opcoes_de_texto(trabalho.opcoes)
+    pendentes = fila.arquivos_pendentes(trabalho.id)
+    with ManifestoProcessamento(diretorio) as manifesto:
+        a_processar, _ = manifesto.separar_pendentes(
+            [caminho for _, caminho in pendentes],
+            trabalho.pasta_clientes,
+            forcar=trabalho.forcar,
+        )
+        indice_pastas = IndicePastasClientes.carregar(trabalho.pasta_clientes)
+        separacao = separar_repetidos(
+            a_processar, trabalho.pasta_clientes, opcoes, trabalho.forcar, indice_pastas
+        )
+        # Já organizados e inalterados (ou repetidos) ficam como ignorados
+        restantes = set(separacao.pendentes)
+        itens = []
+        for posicao, caminho in pendentes:
+            if caminho in restantes:
+                restantes.discard(caminho)
+                itens.append((posicao, caminho))
+            else:
+                fila.registrar_arquivo(trabalho.id, posicao, estado=ARQUIVO_IGNORADO)
+
+        arquivos = [caminho for _, caminho in itens]
+        opcoes = replace(
+            opcoes,
+            destinos=resolver_destinos(arquivos, trabalho.pasta_clientes, indice_pastas),
+        )
+        with _Batimento(diretorio, trabalho.id) as batimento:
+            resultados = processar_lote(
+                arquivos,
+                trabalho.pasta_clientes,
+                workers=trabalho.workers,
+                opcoes=opcoes,
+                # Um arquivo esperando memória de outra vaga para de esperar
+                cancelado=batimento.cancelado,
+            )
+            try:
+                for (posicao, _), resultado in zip(itens, resultados):
+                    separacao.anotar(resultado)
+                    fila.registrar_arquivo(trabalho.id, posicao, resultado)
+                    manifesto.registrar(resultado, trabalho.pasta_clientes)
+                    if batimento.cancelado.is_set():
+                        return CANCELADO
+            finally:
+                resultados.close()
+            if batimento.cancelado.is_set():
+                return CANCELADO  # lote interrompido na espera por memória
+    return CONCLUIDO
+
+
+def _atender(diretorio, uma_vez=False, tempo_abandono=TEMPO_ABANDONO):
+    """Laço de uma vaga: pega a próxima execução da fila e processa"""
+    pid = os.getpid()
+    with FilaTrabalhos(diretorio) as fila:
+        while True:
+            fila.recuperar_abandonados(tempo_abandono)
+            trabalho = fila.reservar(pid)
+            if trabalho is None:
+                if uma_vez:
+                    return
+                time.sleep(INTERVALO_CONSULTA)
+                continue
+            try:
+                estado = executar_trabalho(fila, trabalho, diretorio)
+                fila.finalizar(trabalho.id, estado)
+            except Exception as e:
+                fila.finalizar(trabalho.id, FALHOU, str(e))
+
+
+def executar_trabalhador(
+    diretorio=DIRETORIO_PADRAO,
+    vagas=VAGAS_PADRAO,
+    uma_vez=False,
+    tempo_abandono=TEMPO_ABANDONO,
+    ocioso=0,
+):
+    """
+    Mantém as vagas processando a fila até ser interrompido
+
+    Uma vaga que cai é reiniciada; a execução que ela tinha volta para a fila
+    quando passa o tempo de abandono. Com uma_vez=True, processa o que está
+    na fila e termina; com ocioso > 0, termina depois de tantos segundos sem
+    nada na fila. Retorna False se já havia outro trabalhador ativo.
+    """
+    pid = os.getpid()
+    with FilaTrabalhos(diretorio) as fila:
+        if not fila.entrar_trabalhador(pid, tempo_abandono):
+            return False
+        # Compilado antes das vagas: com fork, elas herdam pronto
+        obter_classificador()
+        processos = []
+        ocioso_desde = time.monotonic()
+        try:
+            while True:
+                vivos = [processo for processo in processos if processo.is_alive()]
+                if uma_vez and processos and not vivos:
+                    break
+                if fila.tem_ativos():
+                    ocioso_desde = time.monotonic()
+                elif ocioso and time.monotonic() - ocioso_desde >= ocioso:
+                    break
+                if not uma_vez or not processos:
+                    while len(vivos) < max(1, vagas):
+                        processo = multiprocessing.Process(
+                            target=_atender, args=(diretorio, uma_vez, tempo_abandono)
+                        )
+                        processo.start()
+                        vivos.append(processo)
+                processos = vivos
+                fila.bater_trabalhador(pid)
+                time.sleep(INTERVALO_CONSULTA if uma_vez else INTERVALO_BATIMENTO)
+        finally:
+            for processo in processos:
+                if processo.is_alive():
+                    processo.terminate()
+            fila.remover_trabalhador(pid)
+    return True
+
+
+def iniciar_trabalhador(diretorio=DIRETORIO_PADRAO):
+    """Inicia um trabalhador em segundo plano se nenhum estiver ativo"""
+    with FilaTrabalhos(diretorio) as fila:
+        if fila.trabalhadores_ativos():
+            return False
+    argumentos = {
+        "cwd": str(Path(__file__).resolve().parent.parent),
+        "stdin": subprocess.DEVNULL,
+        "stdout": subprocess.DEVNULL,
+        "stderr": subprocess.DEVNULL,
+    }
+    if os.name == "nt":
+        argumentos["creationflags"] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        argumentos["start_new_session"] = True  # sobrevive ao fim do app
+    subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "automacao",
+            "trabalhador",
+            "--ocioso",
+            str(OCIOSO_APP),
+        ],
+        env={**os.environ, "AUTOMACAO_CACHE_DIR": diretorio},
+        **argumentos,
+    )
+    return True
@@ -0,0 +1,196 @@
+"""
+Tempo até a primeira tela e latência dos reruns do app (Streamlit)
+
+O app é executado pelo AppTest do Streamlit (sem navegador): a primeira tela
+é medida em um processo novo (importações incluídas; à parte, só a primeira
+execução do script, sem a importação do próprio Streamlit, que o servidor já
+fez antes de abrir a sessão) e os reruns, que o Streamlit faz a cada clique,
+no mesmo processo. A pasta dos PDFs recebe
+pacotes sintéticos, para a lista de arquivos detectados ter um tamanho real.
+
+Uso:
+    python -m benchmarks.bench_app [--arquivos 200] [--reruns 20]
+        [--processos 3] [--salvar atual.json] [--base anterior.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.gerador_pdfs import gerar_lote
+
+ARQUIVO_APP = str(Path(__file__).resolve().parent.parent / "app.py")
+
+
+class _Cronometro:
+    """
+    Início e fim de cada execução do script dentro do AppTest
+
+    O AppTest confere o fim do script a cada 100 ms; o tempo medido aqui é o
+    do script em si, que é o que o usuário espera a cada clique. O AppTest
+    também compila o app.py de novo a cada execução (o servidor compila uma
+    vez só), então a compilação fica separada em `compilacoes`.
+    """
+
+    def __init__(self):
+        from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+        from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+        self.execucoes = []  # [(início, fim)] em perf_counter
+        self.compilacoes = []  # segundos compilando, por execução
+        executar_script = LocalScriptRunner._run_script
+        compilar = ScriptCache.get_bytecode
+        cronometro = self
+
+        def _run_script(runner, rerun_data):
+            inicio = time.perf_counter()
+            try:
+                return executar_script(runner, rerun_data)
+            finally:
+                cronometro.execucoes.append((inicio, time.perf_counter()))
+
+        def get_bytecode(cache, script_path):
+            inicio = time.perf_counter()
+            try:
+                return compilar(cache, script_path)
+            finally:
+                cronometro.compilacoes.append(time.perf_counter() - inicio)
+
+        LocalScriptRunner._run_script = _run_script
+        ScriptCache.get_bytecode = get_bytecode
+
+
+def _abrir_app(pasta_downloads, pasta_clientes):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(ARQUIVO_APP, default_timeout=120)
+    app.session_state["pasta_downloads"] = pasta_downloads
+    app.session_state["pasta_clientes"] = pasta_clientes
+    return app
+
+
+def medir_primeira_tela(pasta_downloads, pasta_clientes):
+    """
+    Segundos do início do processo até a primeira tela e da primeira execução
+    do script (chamado em subprocesso)
+    """
+    inicio = time.perf_counter()
+    cronometro = _Cronometro()
+    app = _abrir_app(pasta_downloads, pasta_clientes)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    primeira_inicio, primeira_fim = cronometro.execucoes[0]
+    return primeira_fim - inicio, primeira_fim - primeira_inicio
+
+
+def medir_reruns(pasta_downloads, pasta_clientes, reruns):
+    """Duração (s) de cada rerun depois da primeira tela, sem a compilação"""
+    cronometro = _Cronometro()
+    app = _abrir_app(pasta_downloads, pasta_clientes)
+    for _ in range(reruns + 1):
+        app.run()
+    return [
+        fim - inicio - compilacao
+        for (inicio, fim), compilacao in zip(
+            cronometro.execucoes[1:], cronometro.compilacoes[1:]
+        )
+    ]
+
+
+def executar(args):
+    with tempfile.TemporaryDirectory(prefix="bench_app_") as pasta:
+        pasta_downloads = os.path.join(pasta, "downloads")
+        pasta_clientes = os.path.join(pasta, "clientes")
+        gerar_lote(pasta_downloads, arquivos=args.arquivos, paginas=args.paginas)
+        os.makedirs(pasta_clientes)
+        ambiente = {**os.environ, "AUTOMACAO_CACHE_DIR": os.path.join(pasta, "cache")}
+
+        primeiras = []
+        scripts = []
+        for _ in range(args.processos):
+            saida = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_app",
+                    "--primeira-tela",
+                    pasta_downloads,
+                    pasta_clientes,
+                ],
+                env=ambiente,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            primeira, script = json.loads(saida.stdout.strip().splitlines()[-1])
+            primeiras.append(primeira)
+            scripts.append(script)
+
+        os.environ["AUTOMACAO_CACHE_DIR"] = ambiente["AUTOMACAO_CACHE_DIR"]
+        reruns = medir_reruns(pasta_downloads, pasta_clientes, args.reruns)
+
+    return {
+        "arquivos": args.arquivos,
+        "primeira_tela_s": min(primeiras),
+        "primeira_execucao_ms": min(scripts) * 1000,
+        "rerun_mediana_ms": statistics.median(reruns) * 1000,
+        "rerun_melhor_ms": min(reruns) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--arquivos", type=int, default=200)
+    parser.add_argument("--paginas", type=int, default=4)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=3,
+        help="Processos novos para a primeira tela (vale o mais rápido)",
+    )
+    parser.add_argument("--salvar", help="Grava os resultados neste JSON")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--primeira-tela", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.primeira_tela:
+        print(json.dumps(medir_primeira_tela(*args.primeira_tela)))
+        return 0
+
+    resultado = executar(args)
+    print(f"Arquivos na pasta: {resultado['arquivos']}")
+    print(f"Primeira tela (processo novo): {resultado['primeira_tela_s']:.2f} s")
+    print(f"Primeira execução do script: {resultado['primeira_execucao_ms']:.0f} ms")
+    print(
+        f"Rerun: mediana {resultado['rerun_mediana_ms']:.0f} ms, "
+        f"melhor {resultado['rerun_melhor_ms']:.0f} ms"
+    )
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {args.salvar}")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        print(f"\nComparação com {args.base}:")
+        for chave, valor in resultado.items():
+            if chave == "arquivos" or chave not in base:
+                continue
+            anterior = base[chave]
+            variacao = (valor - anterior) / anterior * 100 if anterior else 0.0
+            print(f"{chave:<20} {anterior:>10.2f} {valor:>10.2f} {variacao:>+8.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
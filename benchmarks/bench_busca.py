@@ -0,0 +1,157 @@
+"""
+Indexação e consultas da busca nas pastas dos clientes
+
+Organiza pacotes sintéticos em pastas de clientes, indexa as pastas (do
+zero e de novo sem mudanças) e mede as consultas: busca de palavras (com e
+sem filtro de tipo) e o relatório de documentos faltando. Para comparar, a
+mesma busca feita sem índice, lendo as páginas de cada PDF (com o cache de
+páginas já preenchido, o melhor caso sem índice).
+
+Uso:
+    python -m benchmarks.bench_busca [--arquivos 200] [--paginas 12]
+        [--repeticoes 20] [--salvar atual.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from automacao.analise import analisar_pdf
+from automacao.busca import IndiceBusca, termos_do_texto
+from automacao.cache import CachePaginas
+from automacao.processamento import OpcoesProcessamento, processar_lote
+from benchmarks.gerador_pdfs import gerar_pacote
+
+# Nomes e sobrenomes combinados: um cliente (pasta) diferente por pacote
+PRENOMES = (
+    "Adriana Bruno Carla Diego Elaine Fabio Gisele Heitor Iara Jonas "
+    "Karina Leandro Marta Nelson Otavio Priscila Rafael Sueli Tiago Vera"
+).split()
+SOBRENOMES = (
+    "Almeida Barbosa Cardoso Duarte Esteves Freitas Gouveia Honorato Ikeda "
+    "Junqueira Kubota Lacerda Moreira Nogueira Ornelas Pacheco Quintana "
+    "Rezende Siqueira Toledo"
+).split()
+
+# (descrição, palavras, tipo)
+CONSULTAS = [
+    ("palavra rara", "honorários", None),
+    ("duas palavras + tipo", "outorgante maria", "PROCURACAO"),
+    ("CPF", "123.456.789-00", None),
+    ("palavra comum", "documento", None),
+]
+
+
+def medir(funcao, repeticoes):
+    """Mediana (ms) de várias execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def buscar_sem_indice(pasta_clientes, palavras, cache):
+    """Páginas com todas as palavras, lendo cada PDF das pastas"""
+    termos = termos_do_texto(palavras)
+    encontradas = 0
+    for raiz, _, nomes in os.walk(pasta_clientes):
+        for nome in nomes:
+            analise = analisar_pdf(os.path.join(raiz, nome), cache=cache)
+            encontradas += sum(
+                1 for pagina in analise.paginas if termos <= termos_do_texto(pagina.texto)
+            )
+    return encontradas
+
+
+def executar(args):
+    raiz = tempfile.mkdtemp(prefix="bench_busca_")
+    try:
+        pasta_clientes = os.path.join(raiz, "clientes")
+        diretorio_cache = os.path.join(raiz, "cache")
+        os.makedirs(pasta_clientes)
+        os.makedirs(os.path.join(raiz, "entrada"))
+        caminhos = []
+        for i in range(args.arquivos):
+            nome = (
+                f"{PRENOMES[i % len(PRENOMES)]} "
+                f"{SOBRENOMES[i // len(PRENOMES) % len(SOBRENOMES)]}"
+            )
+            caminho = os.path.join(raiz, "entrada", f"{nome}.pdf")
+            gerar_pacote(caminho, paginas=args.paginas, semente=i)
+            caminhos.append(caminho)
+        opcoes = OpcoesProcessamento(diretorio_cache=diretorio_cache)
+        for _ in processar_lote(caminhos, pasta_clientes, 1, opcoes):
+            pass
+
+        resultado = {"arquivos": args.arquivos, "paginas": args.paginas}
+        with IndiceBusca(diretorio_cache) as indice:
+            resumo = indice.indexar(pasta_clientes, diretorio_cache=diretorio_cache)
+            resultado["clientes"] = resumo.clientes
+            resultado["pdfs_indexados"] = resumo.arquivos
+            resultado["paginas_indexadas"] = resumo.paginas
+            resultado["indexacao_s"] = resumo.segundos
+            resultado["reindexacao_ms"] = (
+                indice.indexar(pasta_clientes, diretorio_cache=diretorio_cache).segundos
+                * 1000
+            )
+            resultado["consultas_ms"] = {
+                descricao: medir(
+                    lambda: indice.buscar(pasta_clientes, palavras, tipo=tipo),
+                    args.repeticoes,
+                )
+                for descricao, palavras, tipo in CONSULTAS
+            }
+            resultado["consultas_ms"]["documentos faltando"] = medir(
+                lambda: indice.situacao_clientes(pasta_clientes), args.repeticoes
+            )
+
+        with CachePaginas(diretorio_cache) as cache:
+            buscar_sem_indice(pasta_clientes, CONSULTAS[0][1], cache)  # aquece o cache
+            resultado["sem_indice_ms"] = medir(
+                lambda: buscar_sem_indice(pasta_clientes, CONSULTAS[0][1], cache), 3
+            )
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--arquivos",
+        type=int,
+        default=200,
+        help=f"Pacotes, um por cliente (até {len(PRENOMES) * len(SOBRENOMES)})",
+    )
+    parser.add_argument("--paginas", type=int, default=12)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--salvar", help="Grava os resultados neste JSON")
+    args = parser.parse_args()
+
+    resultado = executar(args)
+    print(
+        f"{resultado['clientes']} cliente(s), {resultado['pdfs_indexados']} PDF(s), "
+        f"{resultado['paginas_indexadas']} páginas"
+    )
+    print(f"Indexação do zero: {resultado['indexacao_s']:.2f} s")
+    print(f"Indexação de novo, sem mudanças: {resultado['reindexacao_ms']:.0f} ms")
+    for descricao, ms in resultado["consultas_ms"].items():
+        print(f"{descricao:<24} {ms:>8.2f} ms")
+    print(f"{'sem índice (palavra rara)':<24} {resultado['sem_indice_ms']:>8.0f} ms")
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {args.salvar}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Micro-benchmark da classificação de páginas (páginas/segundo antes e depois)
+
+Uso: python -m benchmarks.bench_classificador [--paginas 2000] [--repeticoes 5]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from automacao.classificador import obter_classificador
+
+# Implementação anterior (primeiro padrão encontrado vence), mantida só para comparação
+PADROES_LEGADO = {
+    "RG_CPF": [
+        r"CARTEIRA DE IDENTIDADE",
+        r"REGISTRO GERAL",
+        r"SECRETARIA DE SEGURANÇA PÚBLICA",
+        r"INSTITUTO DE IDENTIFICAÇÃO",
+        r"CPF.*\d{3}\.\d{3}\.\d{3}-\d{2}",
+        r"IDENTIDADE",
+    ],
+    "CERTIDAO_NASCIMENTO": [
+        r"CERTIDÃO DE NASCIMENTO",
+        r"REGISTRO CIVIL DAS PESSOAS NATURAIS",
+        r"NASCI.*EM",
+        r"FILIAÇÃO",
+        r"AVOS",
+    ],
+    "COMPROVANTE_RESIDENCIA": [
+        r"CONTA DE.*LUZ",
+        r"CONTA DE.*ÁGUA",
+        r"CONTA DE.*ENERGIA",
+        r"COMPROVANTE DE RESIDÊNCIA",
+        r"ENDEREÇO",
+        r"CEP.*\d{5}-\d{3}",
+    ],
+    "TERMO_REPRESENTACAO": [
+        r"TERMO DE REPRESENTAÇÃO",
+        r"AUTORIZAÇÃO DE ACESSO A INFORMAÇÕES PREVIDENCIÁRIAS",
+        r"INFORMAÇÕES PREVIDENCIÁRIAS",
+        r"INSS",
+        r"PREVIDENCIÁRIO",
+    ],
+    "PROCURACAO": [r"PROCURAÇÃO", r"OUTORGANTE", r"OUTORGADO", r"PODERES"],
+    "CONTRATO_ADVOCATICIOS": [
+        r"CONTRATO DE PRESTAÇÃO DE SERVIÇOS ADVOCATÍCIOS",
+        r"HONORÁRIOS",
+        r"CLÁUSULA",
+        r"CONTRATANTE",
+    ],
+}
+
+
+def identify_document_type_legado(text):
+    """Cópia da versão antiga de identify_document_type"""
+    text = text.upper()
+    for doc_type, pattern_list in PADROES_LEGADO.items():
+        for pattern in pattern_list:
+            if re.search(pattern, text, re.IGNORECASE):
+                return doc_type
+    return "DESCONHECIDO"
+
+
+TRECHOS = [
+    "REPÚBLICA FEDERATIVA DO BRASIL CARTEIRA DE IDENTIDADE REGISTRO GERAL "
+    "SECRETARIA DE SEGURANÇA PÚBLICA CPF 123.456.789-00",
+    "CERTIDÃO DE NASCIMENTO REGISTRO CIVIL DAS PESSOAS NATURAIS nascido em "
+    "São Paulo FILIAÇÃO Maria da Silva AVÓS paternos",
+    "COMPANHIA ENERGÉTICA conta de energia elétrica ENDEREÇO Rua das Flores 10 "
+    "CEP 01234-567 vencimento",
+    "TERMO DE REPRESENTAÇÃO E AUTORIZAÇÃO DE ACESSO A INFORMAÇÕES "
+    "PREVIDENCIÁRIAS perante o INSS",
+    "PROCURAÇÃO AD JUDICIA OUTORGANTE: fulano OUTORGADO: advogado com PODERES",
+    "CONTRATO DE PRESTAÇÃO DE SERVIÇOS ADVOCATÍCIOS CLÁUSULA PRIMEIRA "
+    "HONORÁRIOS CONTRATANTE",
+]
+
+PALAVRAS_NEUTRAS = (
+    "processo documento requerente benefício data assinatura página folha "
+    "anexo cópia declaração número valor referente observação"
+).split()
+
+
+def gerar_paginas(quantidade, semente=42):
+    """Gera textos de página sintéticos com ~2.500 caracteres cada"""
+    aleatorio = random.Random(semente)
+    paginas = []
+    for i in range(quantidade):
+        palavras = [aleatorio.choice(PALAVRAS_NEUTRAS) for _ in range(300)]
+        if i % 5:  # 1 em cada 5 páginas fica sem marcador nenhum
+            palavras.insert(aleatorio.randrange(len(palavras)), aleatorio.choice(TRECHOS))
+        linhas = [" ".join(palavras[j : j + 12]) for j in range(0, len(palavras), 12)]
+        paginas.append("\n".join(linhas))
+    return paginas
+
+
+def medir(funcao, paginas, repeticoes):
+    """Retorna o melhor resultado em páginas/segundo"""
+    melhor = 0.0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for texto in paginas:
+            funcao(texto)
+        decorrido = time.perf_counter() - inicio
+        melhor = max(melhor, len(paginas) / decorrido)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paginas", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    paginas = gerar_paginas(args.paginas)
+    classificador = obter_classificador()
+
+    antes = medir(identify_document_type_legado, paginas, args.repeticoes)
+    depois = medir(classificador.classificar, paginas, args.repeticoes)
+
+    divergentes = sum(
+        identify_document_type_legado(p) != classificador.classificar(p).tipo
+        for p in paginas
+    )
+
+    print(f"Páginas: {len(paginas)} (melhor de {args.repeticoes} repetições)")
+    print(f"Antes  (30 buscas, primeiro acerto): {antes:10.0f} páginas/s")
+    print(f"Depois (varredura única, pontuação): {depois:10.0f} páginas/s")
+    print(f"Ganho: {depois / antes:.1f}x")
+    print(f"Rótulos diferentes do legado: {divergentes} ({divergentes / len(paginas):.0%})")
+
+
+if __name__ == "__main__":
+    main()
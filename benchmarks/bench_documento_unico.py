@@ -0,0 +1,134 @@
+"""
+Documento único (DOCUMENTOS.pdf com marcadores) x um arquivo por documento
+
+Processa os mesmos pacotes sintéticos nos dois formatos de saída e compara
+os arquivos gravados, os bytes dos documentos (sem o original, que é o mesmo
+nos dois) e o tempo de montagem + gravação dos PDFs. --latencia-disco soma
+uma espera a cada arquivo gravado, simulando a pasta sincronizada do Drive.
+
+Uso:
+    python -m benchmarks.bench_documento_unico [--arquivos 50] [--paginas 12]
+        [--latencia-disco 50] [--salvar atual.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+from automacao.processamento import OpcoesProcessamento, processar_lote
+from benchmarks.bench_pipeline import latencia_disco
+from benchmarks.gerador_pdfs import gerar_lote
+
+# Etapas da gravação dos documentos (o original é copiado igual nos dois modos)
+ETAPAS_GRAVACAO = ("montagem_pdf", "pdfwriter_write", "escrita_disco")
+
+MODOS = {
+    "um arquivo por documento": {},
+    "documento único": {"documento_unico": True},
+    "documento único + demais páginas": {
+        "documento_unico": True,
+        "incluir_restantes": True,
+    },
+}
+
+
+def medir_modo(caminhos, pasta_clientes, opcoes, latencia):
+    shutil.rmtree(pasta_clientes, ignore_errors=True)
+    os.makedirs(pasta_clientes)
+    # Os pacotes de um mesmo cliente gravam nos mesmos caminhos: os tamanhos
+    # são lidos assim que cada pacote termina, antes do próximo sobrescrever
+    arquivos = bytes_documentos = bytes_originais = gravacao = erros = 0
+    inicio = time.perf_counter()
+    with latencia_disco(latencia):
+        for resultado in processar_lote(caminhos, pasta_clientes, 1, opcoes):
+            documentos = set(resultado.documentos.values())
+            arquivos += len(documentos) + bool(resultado.original)
+            bytes_documentos += sum(os.path.getsize(c) for c in documentos)
+            if resultado.original:
+                bytes_originais += os.path.getsize(resultado.original)
+            gravacao += sum(
+                resultado.etapas.get(etapa, {}).get("segundos", 0)
+                for etapa in ETAPAS_GRAVACAO
+            )
+            erros += bool(resultado.erro)
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "arquivos_gravados": arquivos,
+        "bytes_documentos": bytes_documentos,
+        "bytes_originais": bytes_originais,
+        "gravacao_s": gravacao,
+        "total_s": segundos,
+        "erros": erros,
+    }
+
+
+def executar(args):
+    raiz = tempfile.mkdtemp(prefix="bench_documento_unico_")
+    try:
+        caminhos = gerar_lote(
+            os.path.join(raiz, "entrada"),
+            arquivos=args.arquivos,
+            paginas=args.paginas,
+            proporcao_imagens=args.proporcao_imagens,
+        )
+        # Sem cache de páginas e sem pipeline: só o formato de saída muda
+        base = OpcoesProcessamento(diretorio_cache=None, em_etapas=False)
+        return {
+            nome: medir_modo(
+                caminhos,
+                os.path.join(raiz, "clientes"),
+                replace(base, **campos),
+                args.latencia_disco,
+            )
+            for nome, campos in MODOS.items()
+        }
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--arquivos", type=int, default=50)
+    parser.add_argument("--paginas", type=int, default=12)
+    parser.add_argument("--proporcao-imagens", type=float, default=0.3)
+    parser.add_argument(
+        "--latencia-disco",
+        type=float,
+        default=0,
+        metavar="MS",
+        help="Espera somada a cada arquivo gravado, simulando um disco de rede",
+    )
+    parser.add_argument("--salvar", help="Grava os resultados neste JSON")
+    args = parser.parse_args()
+
+    medicoes = executar(args)
+    print(f"{args.arquivos} pacote(s) de {args.paginas} páginas")
+    print(
+        f"{'Modo':<34} {'Arquivos':>8} {'Documentos':>11} {'+ originais':>12} "
+        f"{'Gravação':>9} {'Total':>8}"
+    )
+    for nome, medicao in medicoes.items():
+        total = medicao["bytes_documentos"] + medicao["bytes_originais"]
+        print(
+            f"{nome:<34} {medicao['arquivos_gravados']:>8} "
+            f"{medicao['bytes_documentos'] / 1048576:>8.2f} MB "
+            f"{total / 1048576:>9.2f} MB "
+            f"{medicao['gravacao_s']:>8.2f}s {medicao['total_s']:>7.2f}s"
+            + (f"  ({medicao['erros']} com erro)" if medicao["erros"] else "")
+        )
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(medicoes, arquivo, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {args.salvar}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
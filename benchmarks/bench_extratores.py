@@ -0,0 +1,169 @@
+"""
+Comparação dos extratores de texto: velocidade e concordância da classificação
+
+Roda todos os extratores instalados sobre um conjunto de PDFs e compara o
+rótulo de cada página (identify_document_type) com o do PyPDF2, para escolher
+o extrator mais rápido que não muda as classificações.
+
+Uso:
+    python -m benchmarks.bench_extratores [--corpus PASTA] [--arquivos 20]
+        [--paginas 12] [--salvar extratores.json]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+from automacao.classificador import obter_classificador
+from automacao.extratores import EXTRATORES, extratores_disponiveis
+from automacao.processamento import listar_pdfs
+from benchmarks.gerador_pdfs import gerar_lote
+
+# Divergências listadas por extrator no relatório
+MAX_DIVERGENCIAS = 20
+
+
+def rotular(extrator, caminhos, classificador):
+    """
+    Extrai e classifica todas as páginas com um extrator
+
+    Retorna ({(arquivo, página): tipo}, segundos de extração, erros).
+    """
+    rotulos = {}
+    segundos = 0.0
+    erros = []
+    for caminho in caminhos:
+        inicio = time.perf_counter()
+        try:
+            documento = extrator.abrir(caminho)
+        except Exception as e:
+            erros.append(f"{caminho}: {e}")
+            continue
+        try:
+            total = extrator.total_paginas(documento)
+            segundos += time.perf_counter() - inicio
+            for indice in range(total):
+                inicio = time.perf_counter()
+                try:
+                    texto = extrator.extrair(documento, indice) or ""
+                except Exception as e:
+                    erros.append(f"{caminho} página {indice + 1}: {e}")
+                    texto = ""
+                segundos += time.perf_counter() - inicio
+                rotulos[(caminho, indice + 1)] = classificador.classificar(texto).tipo
+        finally:
+            extrator.fechar(documento)
+    return rotulos, segundos, erros
+
+
+def comparar_extratores(caminhos, nomes=None):
+    """Mede cada extrator e compara os rótulos com os do primeiro (a referência)"""
+    classificador = obter_classificador()
+    nomes = nomes or extratores_disponiveis()
+    referencia = None
+    resultados = []
+    for nome in nomes:
+        print(f"Extrator {nome}...", file=sys.stderr)
+        rotulos, segundos, erros = rotular(EXTRATORES[nome](), caminhos, classificador)
+        if referencia is None:
+            referencia = rotulos
+        divergencias = [
+            {
+                "arquivo": arquivo,
+                "pagina": pagina,
+                "referencia": referencia.get((arquivo, pagina)),
+                "extrator": tipo,
+            }
+            for (arquivo, pagina), tipo in rotulos.items()
+            if referencia.get((arquivo, pagina)) != tipo
+        ]
+        paginas = len(rotulos)
+        resultados.append(
+            {
+                "extrator": nome,
+                "paginas": paginas,
+                "segundos": round(segundos, 3),
+                "paginas_por_segundo": round(paginas / segundos, 1) if segundos else 0,
+                "concordancia": (
+                    round(1 - len(divergencias) / paginas, 4) if paginas else 0
+                ),
+                "erros": erros,
+                "divergencias": divergencias[:MAX_DIVERGENCIAS],
+            }
+        )
+    return resultados
+
+
+def recomendar(resultados, concordancia_minima=1.0):
+    """Extrator mais rápido com concordância mínima e sem mais erros que a referência"""
+    erros_referencia = len(resultados[0]["erros"])
+    candidatos = [
+        r
+        for r in resultados
+        if r["concordancia"] >= concordancia_minima
+        and len(r["erros"]) <= erros_referencia
+    ]
+    if not candidatos:
+        return None
+    return max(candidatos, key=lambda r: r["paginas_por_segundo"])["extrator"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="Pasta com PDFs reais (padrão: pacotes sintéticos)")
+    parser.add_argument("--arquivos", type=int, default=20)
+    parser.add_argument("--paginas", type=int, default=12)
+    parser.add_argument(
+        "--extratores",
+        nargs="+",
+        choices=list(EXTRATORES),
+        help="Extratores a comparar (padrão: todos os instalados; o primeiro é a referência)",
+    )
+    parser.add_argument("--concordancia-minima", type=float, default=1.0)
+    parser.add_argument("--salvar", help="Grava os resultados neste JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_extratores_") as temporario:
+        if args.corpus:
+            caminhos = listar_pdfs(args.corpus)
+        else:
+            caminhos = gerar_lote(temporario, arquivos=args.arquivos, paginas=args.paginas)
+        if not caminhos:
+            print("Nenhum PDF encontrado", file=sys.stderr)
+            return 2
+        resultados = comparar_extratores(caminhos, args.extratores)
+
+    print(f"{len(caminhos)} arquivo(s); referência: {resultados[0]['extrator']}")
+    print(f"{'Extrator':<12} {'Páginas/s':>10} {'Concordância':>13} {'Erros':>6}")
+    for r in resultados:
+        print(
+            f"{r['extrator']:<12} {r['paginas_por_segundo']:>10.1f} "
+            f"{r['concordancia']:>12.1%} {len(r['erros']):>6}"
+        )
+        for d in r["divergencias"][:5]:
+            print(
+                f"    {d['arquivo']} p.{d['pagina']}: "
+                f"{d['referencia']} → {d['extrator']}"
+            )
+    escolhido = recomendar(resultados, args.concordancia_minima)
+    if escolhido:
+        print(f"Recomendado: {escolhido} (AUTOMACAO_EXTRATOR={escolhido})")
+    else:
+        print("Nenhum extrator atingiu a concordância mínima")
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(
+                {"resultados": resultados, "recomendado": escolhido},
+                arquivo,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"Resultados gravados em {args.salvar}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
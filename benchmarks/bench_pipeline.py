@@ -0,0 +1,297 @@
+"""
+Benchmark das etapas do processamento sobre pacotes sintéticos
+
+Mede a classificação (identify_document_type), a extração de texto
+(extract_text_from_page), a extração estruturada
+(extract_main_documents_structured) e o processamento completo
+(process_pdf_analysis) para lotes de 10 a 1.000 arquivos. Usa as funções do
+pacote automacao, que são as mesmas chamadas pelos métodos do app.
+
+Com 1 worker, o lote é medido nos dois modos (sequencial e pipeline em
+etapas); --latencia-disco simula a pasta sincronizada do Drive somando uma
+espera a cada arquivo gravado.
+
+Uso:
+    python -m benchmarks.bench_pipeline [--arquivos 10 100] [--paginas 12]
+        [--workers 1 4] [--latencia-disco 50] [--salvar atual.json]
+        [--base anterior.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import datetime
+
+import PyPDF2
+
+from automacao import processamento
+from automacao.analise import extrair_texto_pagina
+from automacao.classificador import obter_classificador
+from automacao.metricas import pico_memoria_mb
+from automacao.processamento import (
+    OpcoesProcessamento,
+    extrair_documentos_principais,
+    processar_lote,
+)
+from benchmarks.gerador_pdfs import gerar_lote
+
+# Amostra de arquivos usada nas medições por página (texto e classificação)
+ARQUIVOS_AMOSTRA = 10
+
+
+def _melhor_tempo(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def medir_extracao_texto(caminhos, repeticoes):
+    """Páginas/s de extrair_texto_pagina (PDF já aberto) e os textos extraídos"""
+    leitores = [PyPDF2.PdfReader(caminho) for caminho in caminhos]
+    textos = []
+
+    def extrair():
+        textos.clear()
+        for leitor in leitores:
+            for indice in range(len(leitor.pages)):
+                textos.append(extrair_texto_pagina(leitor, indice))
+
+    segundos = _melhor_tempo(extrair, repeticoes)
+    return len(textos) / segundos, list(textos)
+
+
+def medir_classificacao(textos, repeticoes):
+    """Páginas/s da classificação de textos já extraídos"""
+    classificador = obter_classificador()
+
+    def classificar():
+        for texto in textos:
+            classificador.classificar(texto)
+
+    return len(textos) / _melhor_tempo(classificar, repeticoes)
+
+
+def medir_extracao_estruturada(caminhos, pasta_saida, repeticoes):
+    """Arquivos/s de extrair_documentos_principais (perfil fixo, abre o PDF)"""
+
+    def extrair():
+        for i, caminho in enumerate(caminhos):
+            destino = os.path.join(pasta_saida, str(i))
+            os.makedirs(destino, exist_ok=True)
+            extrair_documentos_principais(caminho, destino)
+
+    return len(caminhos) / _melhor_tempo(extrair, repeticoes)
+
+
+@contextmanager
+def latencia_disco(milissegundos):
+    """Soma uma espera a cada PDF gravado e a cada cópia do original (só no processo atual)"""
+    if not milissegundos:
+        yield
+        return
+    originais = processamento.gravar_pdf, processamento.publicar_original
+
+    def com_latencia(funcao):
+        def gravar(*args, **kwargs):
+            time.sleep(milissegundos / 1000)
+            return funcao(*args, **kwargs)
+
+        return gravar
+
+    processamento.gravar_pdf = com_latencia(originais[0])
+    processamento.publicar_original = com_latencia(originais[1])
+    try:
+        yield
+    finally:
+        processamento.gravar_pdf, processamento.publicar_original = originais
+
+
+def medir_lote(caminhos, pasta_clientes, workers, opcoes):
+    """Processamento completo (processar_lote): arquivos/s e páginas/s"""
+    shutil.rmtree(pasta_clientes, ignore_errors=True)
+    os.makedirs(pasta_clientes)
+    inicio = time.perf_counter()
+    resultados = list(processar_lote(caminhos, pasta_clientes, workers, opcoes))
+    segundos = time.perf_counter() - inicio
+    erros = sum(1 for r in resultados if r.erro)
+    paginas = sum(r.paginas for r in resultados)
+    return {
+        "segundos": round(segundos, 3),
+        "arquivos_por_segundo": round(len(caminhos) / segundos, 2),
+        "paginas_por_segundo": round(paginas / segundos, 1),
+        "erros": erros,
+    }
+
+
+def executar(args):
+    """Gera os pacotes, roda as medições e retorna o dicionário de resultados"""
+    raiz = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        entrada = os.path.join(raiz, "entrada")
+        inicio = time.perf_counter()
+        caminhos = gerar_lote(
+            entrada,
+            arquivos=max(args.arquivos),
+            paginas=args.paginas,
+            proporcao_imagens=args.proporcao_imagens,
+        )
+        print(
+            f"{len(caminhos)} pacote(s) de {args.paginas} páginas gerados em "
+            f"{time.perf_counter() - inicio:.1f}s",
+            file=sys.stderr,
+        )
+
+        amostra = caminhos[:ARQUIVOS_AMOSTRA]
+        casos = {}
+
+        texto_ps, textos = medir_extracao_texto(amostra, args.repeticoes)
+        casos["extract_text_from_page"] = {
+            "valor": round(texto_ps, 1),
+            "unidade": "paginas/s",
+        }
+        casos["identify_document_type"] = {
+            "valor": round(medir_classificacao(textos, args.repeticoes), 1),
+            "unidade": "paginas/s",
+        }
+        casos["extract_main_documents_structured"] = {
+            "valor": round(
+                medir_extracao_estruturada(
+                    amostra, os.path.join(raiz, "estruturada"), args.repeticoes
+                ),
+                2,
+            ),
+            "unidade": "arquivos/s",
+        }
+
+        opcoes = OpcoesProcessamento(
+            diretorio_cache=os.path.join(raiz, "cache") if args.com_cache else None
+        )
+        for quantidade in args.arquivos:
+            for workers in args.workers:
+                # Com 1 worker: sequencial ("1w") e pipeline em etapas ("1w-etapas")
+                modos = [("", False), ("-etapas", True)] if workers <= 1 else [("", False)]
+                for sufixo, em_etapas in modos:
+                    print(
+                        f"Lote: {quantidade} arquivo(s), {workers} worker(s){sufixo}...",
+                        file=sys.stderr,
+                    )
+                    with latencia_disco(args.latencia_disco):
+                        lote = medir_lote(
+                            caminhos[:quantidade],
+                            os.path.join(raiz, "clientes"),
+                            workers,
+                            replace(opcoes, em_etapas=em_etapas),
+                        )
+                    casos[f"process_pdf_analysis[{quantidade}x{workers}w{sufixo}]"] = {
+                        "valor": lote["arquivos_por_segundo"],
+                        "unidade": "arquivos/s",
+                        **lote,
+                    }
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pypdf2": PyPDF2.__version__,
+        },
+        "parametros": {
+            "paginas": args.paginas,
+            "proporcao_imagens": args.proporcao_imagens,
+            "repeticoes": args.repeticoes,
+            "com_cache": args.com_cache,
+            "latencia_disco_ms": args.latencia_disco,
+        },
+        "memoria_pico_mb": pico_memoria_mb(),
+        "casos": casos,
+    }
+
+
+def comparar(atual, base):
+    """
+    Linhas (caso, base, atual, variação %) dos casos presentes nos dois
+
+    Todos os valores são vazões (maior é melhor).
+    """
+    linhas = []
+    for nome, caso in atual["casos"].items():
+        anterior = base.get("casos", {}).get(nome)
+        if not anterior or not anterior["valor"]:
+            continue
+        variacao = 100 * (caso["valor"] - anterior["valor"]) / anterior["valor"]
+        linhas.append((nome, anterior["valor"], caso["valor"], variacao))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--arquivos", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--paginas", type=int, default=12)
+    parser.add_argument("--proporcao-imagens", type=float, default=0.3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument(
+        "--com-cache",
+        action="store_true",
+        help="Usa o cache de páginas (por padrão mede a execução a frio)",
+    )
+    parser.add_argument(
+        "--latencia-disco",
+        type=float,
+        default=0,
+        metavar="MS",
+        help="Espera somada a cada arquivo gravado, simulando um disco de rede "
+        "(só vale com 1 worker)",
+    )
+    parser.add_argument("--salvar", help="Grava os resultados neste JSON")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar")
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        help="Sai com código 1 se algum caso ficar mais de N%% abaixo da base",
+    )
+    args = parser.parse_args()
+
+    resultado = executar(args)
+
+    print(f"{'Caso':<45} {'Valor':>12}")
+    for nome, caso in resultado["casos"].items():
+        print(f"{nome:<45} {caso['valor']:>12.1f} {caso['unidade']}")
+    print(f"Pico de memória: {resultado['memoria_pico_mb']} MB")
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {args.salvar}")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        linhas = comparar(resultado, base)
+        print(f"\nComparação com {args.base} ({base.get('data', '?')}):")
+        print(f"{'Caso':<45} {'Base':>10} {'Atual':>10} {'Variação':>9}")
+        for nome, anterior, valor, variacao in linhas:
+            print(f"{nome:<45} {anterior:>10.1f} {valor:>10.1f} {variacao:>+8.1f}%")
+        if args.tolerancia is not None and any(
+            variacao < -args.tolerancia for *_, variacao in linhas
+        ):
+            print(f"Regressão acima de {args.tolerancia}%", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Gerador de pacotes PDF sintéticos no formato dos pacotes dos clientes
+
+Mistura páginas com os textos que o classificador procura (RG, certidão,
+comprovante, termo, procuração, contrato) com páginas em branco e páginas
+só com imagem (como fotos de celular). Não depende de nenhuma biblioteca
+além da padrão.
+
+Uso: python -m benchmarks.gerador_pdfs --saida PASTA [--arquivos 10] [--paginas 12]
+"""
+
+import argparse
+import os
+import random
+import zlib
+
+# Texto de cada tipo de página (codificável em cp1252 / WinAnsiEncoding)
+TEXTOS = {
+    "RG": [
+        "REPÚBLICA FEDERATIVA DO BRASIL",
+        "SECRETARIA DE SEGURANÇA PÚBLICA",
+        "INSTITUTO DE IDENTIFICAÇÃO",
+        "CARTEIRA DE IDENTIDADE",
+        "REGISTRO GERAL 12.345.678-9",
+        "CPF 123.456.789-00",
+    ],
+    "CERTIDAO": [
+        "REGISTRO CIVIL DAS PESSOAS NATURAIS",
+        "CERTIDÃO DE NASCIMENTO",
+        "Nascido em 10 de março de 2015",
+        "FILIAÇÃO: Maria da Silva e José da Silva",
+        "AVÓS paternos e maternos",
+    ],
+    "COMPROVANTE": [
+        "COMPANHIA ENERGÉTICA",
+        "CONTA DE ENERGIA ELÉTRICA - LUZ",
+        "ENDEREÇO: Rua das Flores, 100",
+        "CEP 01234-567",
+        "COMPROVANTE DE RESIDÊNCIA",
+    ],
+    "TERMO": [
+        "TERMO DE REPRESENTAÇÃO E AUTORIZAÇÃO DE ACESSO A INFORMAÇÕES PREVIDENCIÁRIAS",
+        "Perante o INSS - Instituto Nacional do Seguro Social",
+        "Requerimento de benefício previdenciário",
+    ],
+    "PROCURACAO": [
+        "PROCURAÇÃO AD JUDICIA ET EXTRA",
+        "OUTORGANTE: Maria da Silva",
+        "OUTORGADO: Dr. Fulano de Tal, advogado",
+        "Confere amplos PODERES para o foro em geral",
+    ],
+    "CONTRATO": [
+        "CONTRATO DE PRESTAÇÃO DE SERVIÇOS ADVOCATÍCIOS",
+        "CLÁUSULA PRIMEIRA - DO OBJETO",
+        "CONTRATANTE: Maria da Silva",
+        "HONORÁRIOS de 30% sobre o valor recebido",
+    ],
+}
+
+# Tipos de página "sem marcador"
+BRANCA = "BRANCA"
+IMAGEM = "IMAGEM"
+
+# Disposição do pacote padrão (páginas 1-12), igual ao perfil fixo
+LAYOUT_PADRAO = [
+    "RG",
+    "RG",
+    "PROCURACAO",
+    "CONTRATO",
+    IMAGEM,
+    "CERTIDAO",
+    BRANCA,
+    IMAGEM,
+    "COMPROVANTE",
+    IMAGEM,
+    "TERMO",
+    BRANCA,
+]
+
+PALAVRAS_NEUTRAS = (
+    "processo documento requerente data assinatura folha anexo cópia "
+    "declaração número valor referente observação município estado"
+).split()
+
+
+def _escapar(texto):
+    texto = texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return texto.encode("cp1252", errors="replace")
+
+
+def _conteudo_texto(linhas):
+    partes = [b"BT /F1 11 Tf 14 TL 50 760 Td"]
+    for linha in linhas:
+        partes.append(b"(" + _escapar(linha) + b") Tj T*")
+    partes.append(b"ET")
+    return b"\n".join(partes)
+
+
+class _EscritorPdf:
+    """Monta um PDF mínimo objeto a objeto"""
+
+    def __init__(self):
+        self.objetos = []
+
+    def adicionar(self, conteudo):
+        self.objetos.append(conteudo)
+        return len(self.objetos)
+
+    def reservar(self):
+        return self.adicionar(None)
+
+    def definir(self, numero, conteudo):
+        self.objetos[numero - 1] = conteudo
+
+    def stream(self, dicionario, dados):
+        return self.adicionar(
+            b"<< " + dicionario + b" /Length %d >>\nstream\n" % len(dados)
+            + dados
+            + b"\nendstream"
+        )
+
+    def gravar(self, caminho, raiz):
+        saida = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        deslocamentos = []
+        for numero, objeto in enumerate(self.objetos, 1):
+            deslocamentos.append(len(saida))
+            saida += b"%d 0 obj\n" % numero + objeto + b"\nendobj\n"
+        xref = len(saida)
+        saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objetos) + 1)
+        for deslocamento in deslocamentos:
+            saida += b"%010d 00000 n \n" % deslocamento
+        saida += (
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(self.objetos) + 1, raiz, xref)
+        )
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(saida)
+        return len(saida)
+
+
+def _tipos_das_paginas(paginas, aleatorio, proporcao_imagens):
+    """As 12 primeiras seguem o layout padrão; as demais são sorteadas"""
+    tipos = LAYOUT_PADRAO[:paginas]
+    for _ in range(paginas - len(tipos)):
+        if aleatorio.random() < proporcao_imagens:
+            tipos.append(aleatorio.choice([IMAGEM, IMAGEM, BRANCA]))
+        else:
+            tipos.append(aleatorio.choice(list(TEXTOS)))
+    return tipos
+
+
+def gerar_pacote(
+    caminho, paginas=12, semente=0, proporcao_imagens=0.3, lado_imagem=256, layout=None
+):
+    """
+    Grava um pacote PDF sintético e retorna a lista de tipos de cada página
+
+    As páginas de imagem usam um bitmap em tons de cinza com ruído
+    (lado_imagem x lado_imagem), que comprime mal como uma foto real.
+    Com layout (lista de tipos de página), o pacote segue exatamente essa
+    disposição e paginas é ignorado.
+    """
+    aleatorio = random.Random(semente)
+    if layout is not None:
+        tipos = list(layout)
+    else:
+        tipos = _tipos_das_paginas(paginas, aleatorio, proporcao_imagens)
+
+    pdf = _EscritorPdf()
+    fonte = pdf.adicionar(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding /WinAnsiEncoding >>"
+    )
+    raiz_paginas = pdf.reservar()
+    filhos = []
+
+    for tipo in tipos:
+        if tipo == IMAGEM:
+            pixels = aleatorio.randbytes(lado_imagem * lado_imagem)
+            imagem = pdf.stream(
+                b"/Type /XObject /Subtype /Image /Width %d /Height %d "
+                b"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode"
+                % (lado_imagem, lado_imagem),
+                zlib.compress(pixels),
+            )
+            conteudo = pdf.stream(b"", b"q 595 0 0 842 0 0 cm /Im1 Do Q")
+            recursos = b"<< /XObject << /Im1 %d 0 R >> >>" % imagem
+        elif tipo == BRANCA:
+            conteudo = pdf.stream(b"", b"")
+            recursos = b"<< >>"
+        else:
+            linhas = list(TEXTOS[tipo])
+            for _ in range(25):
+                linhas.append(
+                    " ".join(aleatorio.choice(PALAVRAS_NEUTRAS) for _ in range(10))
+                )
+            conteudo = pdf.stream(b"", _conteudo_texto(linhas))
+            recursos = b"<< /Font << /F1 %d 0 R >> >>" % fonte
+
+        filhos.append(
+            pdf.adicionar(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                b"/Resources %s /Contents %d 0 R >>" % (raiz_paginas, recursos, conteudo)
+            )
+        )
+
+    pdf.definir(
+        raiz_paginas,
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % f for f in filhos), len(filhos)),
+    )
+    catalogo = pdf.adicionar(b"<< /Type /Catalog /Pages %d 0 R >>" % raiz_paginas)
+    pdf.gravar(caminho, catalogo)
+    return tipos
+
+
+NOMES = [
+    "Maria da Silva",
+    "João Pereira",
+    "Ana Souza",
+    "José Santos",
+    "Francisca Oliveira",
+    "Antônio Lima",
+    "Adriana Costa",
+    "Carlos Ferreira",
+]
+
+
+def gerar_lote(pasta, arquivos=10, paginas=12, semente=0, **kwargs):
+    """Gera `arquivos` pacotes na pasta (um cliente diferente a cada arquivo)"""
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    for i in range(arquivos):
+        nome = f"{NOMES[i % len(NOMES)]} {i // len(NOMES) + 1} documentos.pdf"
+        caminho = os.path.join(pasta, nome)
+        gerar_pacote(caminho, paginas=paginas, semente=semente + i, **kwargs)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--saida", required=True, help="Pasta onde gravar os PDFs")
+    parser.add_argument("--arquivos", type=int, default=10)
+    parser.add_argument("--paginas", type=int, default=12)
+    parser.add_argument("--proporcao-imagens", type=float, default=0.3)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    caminhos = gerar_lote(
+        args.saida,
+        arquivos=args.arquivos,
+        paginas=args.paginas,
+        semente=args.semente,
+        proporcao_imagens=args.proporcao_imagens,
+    )
+    print(f"{len(caminhos)} arquivo(s) gerado(s) em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
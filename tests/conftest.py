@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Antes de importar o automacao: o cache, o manifesto e as reservas de
+# memória padrão ficam em uma pasta temporária, não na do usuário
+os.environ["AUTOMACAO_CACHE_DIR"] = tempfile.mkdtemp(prefix="automacao_testes_")
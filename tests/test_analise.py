@@ -0,0 +1,83 @@
+"""Análise das páginas com parada antecipada (tipos_necessarios)"""
+
+import PyPDF2
+
+from automacao.analise import analisar_pdf
+from automacao.processamento import (
+    TIPOS_PRINCIPAIS,
+    OpcoesProcessamento,
+    processar_arquivo,
+)
+from benchmarks.gerador_pdfs import gerar_pacote
+
+# Documentos principais nas 4 primeiras páginas e uma procuração de 3 depois
+LAYOUT_PROCURACAO_NO_FIM = [
+    "RG",
+    "CERTIDAO",
+    "COMPROVANTE",
+    "TERMO",
+    "PROCURACAO",
+    "PROCURACAO",
+    "PROCURACAO",
+]
+
+
+def test_para_antes_da_pagina_do_documento_seguinte(tmp_path):
+    pdf = tmp_path / "pacote.pdf"
+    gerar_pacote(pdf, layout=LAYOUT_PROCURACAO_NO_FIM)
+
+    analise = analisar_pdf(pdf, tipos_necessarios=TIPOS_PRINCIPAIS)
+
+    assert analise.interrompida
+    assert [pagina.numero for pagina in analise.paginas] == [1, 2, 3, 4]
+    assert set(analise.document_map) == TIPOS_PRINCIPAIS
+
+
+def test_sem_tipos_necessarios_le_todas(tmp_path):
+    pdf = tmp_path / "pacote.pdf"
+    gerar_pacote(pdf, layout=LAYOUT_PROCURACAO_NO_FIM)
+
+    analise = analisar_pdf(pdf)
+
+    assert not analise.interrompida
+    assert analise.document_map["PROCURACAO"] == [5, 6, 7]
+
+
+def test_documento_cortado_pela_parada_nao_e_gravado(tmp_path):
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    pdf = entrada / "Maria Teste.pdf"
+    gerar_pacote(pdf, layout=LAYOUT_PROCURACAO_NO_FIM)
+    opcoes = OpcoesProcessamento(diretorio_cache=None, em_etapas=False)
+
+    resultado = processar_arquivo(pdf, tmp_path / "clientes", opcoes)
+
+    assert resultado.erro is None
+    assert "PROCURACAO" not in resultado.documentos
+    for caminho in resultado.documentos.values():
+        assert len(PyPDF2.PdfReader(caminho).pages) == 1
+
+
+def test_parada_igual_com_as_paginas_do_cache(tmp_path):
+    from automacao.cache import CachePaginas
+
+    pdf = tmp_path / "pacote.pdf"
+    gerar_pacote(pdf, layout=LAYOUT_PROCURACAO_NO_FIM)
+    with CachePaginas(str(tmp_path / "cache")) as cache:
+        analisar_pdf(pdf, cache=cache)  # todas as páginas no cache
+        analise = analisar_pdf(pdf, cache=cache, tipos_necessarios=TIPOS_PRINCIPAIS)
+
+    assert analise.pdf_reader is None
+    assert analise.paginas_do_cache == 5  # a 5ª só decide a parada
+    assert [pagina.numero for pagina in analise.paginas] == [1, 2, 3, 4]
+
+
+def test_limite_de_paginas(tmp_path):
+    pdf = tmp_path / "pacote.pdf"
+    gerar_pacote(pdf, layout=LAYOUT_PROCURACAO_NO_FIM)
+
+    analise = analisar_pdf(pdf, limite_paginas=2)
+
+    assert analise.total_paginas == 7
+    assert [pagina.numero for pagina in analise.paginas] == [1, 2]
+    assert not analise.interrompida
@@ -0,0 +1,52 @@
+"""Limite de tamanho do cache de páginas"""
+
+import sqlite3
+
+from automacao.cache import CachePaginas
+from automacao.classificador import Classificacao
+
+TEXTO = "x" * 5000
+
+
+def guardar(cache, nome):
+    cache.guardar_paginas(nome, {0: (TEXTO, Classificacao("RG_CPF", 1.0), "texto")})
+
+
+def soma_das_paginas(cache):
+    with sqlite3.connect(cache.caminho) as conexao:
+        return conexao.execute("SELECT SUM(tamanho) FROM paginas").fetchone()[0]
+
+
+def test_limite_vale_para_todas_as_conexoes(tmp_path):
+    limite_mb = 0.1
+    with CachePaginas(str(tmp_path), limite_mb) as um, CachePaginas(
+        str(tmp_path), limite_mb
+    ) as outro:
+        for i in range(40):
+            guardar(um if i % 2 else outro, f"arquivo{i}")
+
+        assert um.ocupado == outro.ocupado == soma_das_paginas(um)
+        assert um.ocupado <= um.limite_bytes
+        # As mais recentes ficam
+        assert um.obter_paginas("arquivo39")
+
+
+def test_regravar_a_mesma_pagina_nao_soma_de_novo(tmp_path):
+    with CachePaginas(str(tmp_path)) as cache:
+        guardar(cache, "arquivo")
+        ocupado = cache.ocupado
+        guardar(cache, "arquivo")
+
+        assert cache.ocupado == ocupado == soma_das_paginas(cache)
+
+
+def test_cache_antigo_sem_a_linha_de_ocupacao(tmp_path):
+    with CachePaginas(str(tmp_path)) as cache:
+        guardar(cache, "arquivo")
+    with sqlite3.connect(cache.caminho) as conexao:
+        conexao.execute("DROP TABLE ocupacao")
+
+    with CachePaginas(str(tmp_path)) as cache:
+        assert cache.ocupado == soma_das_paginas(cache) > 0
+        cache.limpar()
+        assert cache.ocupado == 0
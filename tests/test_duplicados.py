@@ -0,0 +1,91 @@
+"""Entradas repetidas e originais já organizados (separar_duplicados)"""
+
+import shutil
+
+import pytest
+
+from automacao.duplicados import IndiceConteudo
+from benchmarks.gerador_pdfs import gerar_pacote
+
+
+@pytest.fixture
+def indice(tmp_path):
+    with IndiceConteudo(str(tmp_path / "cache")) as indice:
+        yield indice
+
+
+@pytest.fixture
+def entradas(tmp_path):
+    """Pacote "Ana Souza.pdf", a cópia "Ana Souza (1).pdf" e um outro pacote"""
+    pasta = tmp_path / "entrada"
+    pasta.mkdir()
+    gerar_pacote(pasta / "Ana Souza.pdf", semente=1)
+    shutil.copy(pasta / "Ana Souza.pdf", pasta / "Ana Souza (1).pdf")
+    gerar_pacote(pasta / "Maria Lima.pdf", semente=2)
+    return pasta
+
+
+@pytest.fixture
+def clientes(tmp_path):
+    pasta = tmp_path / "clientes"
+    pasta.mkdir()
+    return pasta
+
+
+def organizado(clientes, entrada, nome_original):
+    """Original de entrada já publicado na pasta do cliente"""
+    pasta = clientes / "Ana Souza"
+    pasta.mkdir(exist_ok=True)
+    shutil.copy(entrada, pasta / nome_original)
+    return str(pasta / nome_original)
+
+
+@pytest.mark.parametrize("ordem", [1, -1])
+def test_mantem_o_nome_sem_sufixo_em_qualquer_ordem(indice, entradas, clientes, ordem):
+    arquivos = sorted(str(pdf) for pdf in entradas.glob("*.pdf"))[::ordem]
+
+    separacao = indice.separar_duplicados(arquivos, str(clientes))
+
+    assert separacao.duplicados == {
+        str(entradas / "Ana Souza (1).pdf"): str(entradas / "Ana Souza.pdf")
+    }
+    assert sorted(separacao.pendentes) == [
+        str(entradas / "Ana Souza.pdf"),
+        str(entradas / "Maria Lima.pdf"),
+    ]
+
+
+@pytest.mark.parametrize("forcar", [False, True])
+def test_copia_de_um_original_ja_organizado_e_ignorada(
+    indice, entradas, clientes, forcar
+):
+    original = organizado(clientes, entradas / "Ana Souza.pdf", "ANA SOUZA")
+    copia = str(entradas / "Ana Souza (1).pdf")
+
+    separacao = indice.separar_duplicados([copia], str(clientes), forcar=forcar)
+
+    assert separacao.pendentes == []
+    assert separacao.duplicados == {copia: original}
+
+
+def test_forcar_reprocessa_a_entrada_que_gerou_o_original(indice, entradas, clientes):
+    original = organizado(clientes, entradas / "Ana Souza.pdf", "ANA SOUZA")
+    arquivos = [str(entradas / "Ana Souza (1).pdf"), str(entradas / "Ana Souza.pdf")]
+
+    sem_forcar = indice.separar_duplicados(arquivos, str(clientes))
+    com_forcar = indice.separar_duplicados(arquivos, str(clientes), forcar=True)
+
+    assert sem_forcar.pendentes == []
+    assert set(sem_forcar.duplicados.values()) == {original}
+    assert com_forcar.pendentes == [str(entradas / "Ana Souza.pdf")]
+    assert com_forcar.duplicados == {
+        str(entradas / "Ana Souza (1).pdf"): str(entradas / "Ana Souza.pdf")
+    }
+
+
+def test_arquivo_ilegivel_fica_pendente(indice, entradas, clientes):
+    sumido = str(entradas / "Sumido.pdf")
+
+    separacao = indice.separar_duplicados([sumido], str(clientes))
+
+    assert separacao.pendentes == [sumido]
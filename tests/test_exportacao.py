@@ -0,0 +1,65 @@
+"""ZIP das pastas dos clientes gerado em blocos"""
+
+import io
+import zipfile
+
+from automacao.exportacao import (
+    arquivos_das_pastas,
+    dividir_em_partes,
+    exportar_zip,
+    gerar_zip,
+)
+
+
+def criar_clientes(pasta):
+    (pasta / "Ana").mkdir(parents=True)
+    (pasta / "Ana" / "RG_CPF.pdf").write_bytes(b"%PDF-1.4 rg" * 100)
+    (pasta / "Ana" / "ANA SOUZA").write_bytes(b"%PDF-1.4 original" * 100)
+    (pasta / "Joao" / "sub").mkdir(parents=True)
+    (pasta / "Joao" / "sub" / "nota.txt").write_bytes(b"texto " * 1000)
+    return [pasta / "Ana", pasta / "Joao"]
+
+
+def test_zip_com_o_conteudo_das_pastas(tmp_path):
+    pastas = criar_clientes(tmp_path / "clientes")
+    arquivos = arquivos_das_pastas([str(p) for p in pastas])
+    saida = io.BytesIO()
+
+    total = exportar_zip(arquivos, saida)
+
+    assert total == len(saida.getvalue())
+    with zipfile.ZipFile(saida) as zip_lido:
+        assert zip_lido.testzip() is None
+        assert sorted(zip_lido.namelist()) == [
+            "Ana/ANA SOUZA",
+            "Ana/RG_CPF.pdf",
+            "Joao/sub/nota.txt",
+        ]
+        tipos = {info.filename: info.compress_type for info in zip_lido.infolist()}
+        assert zip_lido.read("Ana/RG_CPF.pdf") == b"%PDF-1.4 rg" * 100
+    # PDFs (mesmo os originais sem extensão) entram sem compressão
+    assert tipos["Ana/ANA SOUZA"] == zipfile.ZIP_STORED
+    assert tipos["Joao/sub/nota.txt"] == zipfile.ZIP_DEFLATED
+
+
+def test_blocos_limitados(tmp_path):
+    pastas = criar_clientes(tmp_path / "clientes")
+    arquivos = arquivos_das_pastas([str(p) for p in pastas])
+
+    blocos = list(gerar_zip(arquivos, tamanho_bloco=256))
+
+    assert len(blocos) > 3
+    assert zipfile.ZipFile(io.BytesIO(b"".join(blocos))).testzip() is None
+
+
+def test_partes_nao_dividem_a_pasta_do_cliente(tmp_path):
+    pastas = criar_clientes(tmp_path / "clientes")
+    arquivos = arquivos_das_pastas([str(p) for p in pastas])
+
+    partes = dividir_em_partes(arquivos, limite_mb=0.004)
+
+    assert [[a.pasta for a in parte] for parte in partes] == [
+        ["Ana", "Ana"],
+        ["Joao"],
+    ]
+    assert dividir_em_partes(arquivos, limite_mb=0) == [arquivos]
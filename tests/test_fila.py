@@ -0,0 +1,71 @@
+"""Fila de execuções do trabalhador (FilaTrabalhos)"""
+
+import pytest
+
+from automacao.fila import (
+    CANCELADO,
+    CANCELANDO,
+    EXECUTANDO,
+    PENDENTE,
+    FilaTrabalhos,
+    opcoes_de_texto,
+)
+from automacao.processamento import OpcoesProcessamento, ResultadoArquivo
+
+
+@pytest.fixture
+def fila(tmp_path):
+    with FilaTrabalhos(str(tmp_path / "cache")) as fila:
+        yield fila
+
+
+def test_arquivos_concluidos_saem_dos_pendentes(fila):
+    trabalho_id = fila.enfileirar(["a.pdf", "b.pdf"], "clientes", OpcoesProcessamento())
+
+    fila.registrar_arquivo(trabalho_id, 0, ResultadoArquivo(arquivo="a.pdf"))
+
+    assert fila.arquivos_pendentes(trabalho_id) == [(1, "b.pdf")]
+    assert [r.arquivo for r in fila.resultados(trabalho_id)] == ["a.pdf"]
+
+
+def test_opcoes_voltam_iguais(fila):
+    opcoes = OpcoesProcessamento(documento_unico=True, limite_paginas=5)
+    trabalho_id = fila.enfileirar(["a.pdf"], "clientes", opcoes)
+
+    assert opcoes_de_texto(fila.obter(trabalho_id).opcoes) == opcoes
+
+
+def test_reserva_justa_entre_usuarios(fila):
+    primeiro = fila.enfileirar(["a.pdf"], "c", OpcoesProcessamento(), usuario="ana")
+    fila.enfileirar(["b.pdf"], "c", OpcoesProcessamento(), usuario="ana")
+    outro = fila.enfileirar(["c.pdf"], "c", OpcoesProcessamento(), usuario="joao")
+
+    assert fila.reservar(pid=1).id == primeiro
+    assert fila.reservar(pid=2).id == outro
+
+
+def test_cancelar(fila):
+    andamento = fila.enfileirar(["a.pdf"], "c", OpcoesProcessamento())
+    pendente = fila.enfileirar(["b.pdf"], "c", OpcoesProcessamento())
+    fila.reservar(pid=1)  # o primeiro da fila
+
+    fila.cancelar(andamento)
+    fila.cancelar(pendente)
+
+    assert fila.obter(andamento).estado == CANCELANDO
+    assert fila.obter(pendente).estado == CANCELADO
+    assert not fila.bater(andamento)
+
+
+def test_abandonado_volta_para_a_fila(fila):
+    trabalho_id = fila.enfileirar(["a.pdf"], "c", OpcoesProcessamento())
+    fila.reservar(pid=1)
+    assert fila.obter(trabalho_id).estado == EXECUTANDO
+
+    assert fila.recuperar_abandonados(tempo_abandono=-1) == 1
+
+    assert fila.obter(trabalho_id).estado == PENDENTE
+    fila.reservar(pid=2)
+    fila.cancelar(trabalho_id)
+    fila.recuperar_abandonados(tempo_abandono=-1)
+    assert fila.obter(trabalho_id).estado == CANCELADO
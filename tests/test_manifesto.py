@@ -0,0 +1,111 @@
+"""Arquivos já organizados e inalterados (ManifestoProcessamento)"""
+
+import os
+
+import pytest
+
+from automacao.manifesto import ManifestoProcessamento
+from automacao.processamento import ResultadoArquivo
+
+
+@pytest.fixture
+def manifesto(tmp_path):
+    with ManifestoProcessamento(str(tmp_path / "cache")) as manifesto:
+        yield manifesto
+
+
+@pytest.fixture
+def clientes(tmp_path):
+    pasta = tmp_path / "clientes"
+    (pasta / "Ana").mkdir(parents=True)
+    return pasta
+
+
+def organizar(manifesto, pdf, clientes, **campos):
+    """Registra pdf como organizado, com o original na pasta do cliente"""
+    original = clientes / "Ana" / pdf.stem.upper()
+    original.write_bytes(pdf.read_bytes())
+    resultado = ResultadoArquivo(
+        arquivo=str(pdf),
+        caminho_pasta=str(clientes / "Ana"),
+        original=str(original),
+        **campos,
+    )
+    manifesto.registrar(resultado, str(clientes))
+    return original
+
+
+def pdf_de_entrada(tmp_path, conteudo=b"%PDF-1.4 conteudo"):
+    pdf = tmp_path / "Ana.pdf"
+    pdf.write_bytes(conteudo)
+    return pdf
+
+
+def test_novo_fica_pendente_e_organizado_e_ignorado(manifesto, tmp_path, clientes):
+    pdf = pdf_de_entrada(tmp_path)
+    assert manifesto.separar_pendentes([str(pdf)], str(clientes)) == ([str(pdf)], [])
+
+    organizar(manifesto, pdf, clientes)
+
+    assert manifesto.separar_pendentes([str(pdf)], str(clientes)) == ([], [str(pdf)])
+    assert manifesto.separar_pendentes([str(pdf)], str(clientes), forcar=True) == (
+        [str(pdf)],
+        [],
+    )
+
+
+def test_caminho_repetido_entra_uma_vez(manifesto, tmp_path, clientes):
+    pdf = pdf_de_entrada(tmp_path)
+
+    pendentes, _ = manifesto.separar_pendentes([str(pdf), str(pdf)], str(clientes))
+
+    assert pendentes == [str(pdf)]
+
+
+def test_conteudo_alterado_fica_pendente(manifesto, tmp_path, clientes):
+    pdf = pdf_de_entrada(tmp_path)
+    organizar(manifesto, pdf, clientes)
+
+    pdf.write_bytes(b"%PDF-1.4 outro conteudo maior")
+
+    assert manifesto.separar_pendentes([str(pdf)], str(clientes)) == ([str(pdf)], [])
+
+
+def test_so_o_mtime_mudou_continua_ignorado(manifesto, tmp_path, clientes):
+    pdf = pdf_de_entrada(tmp_path)
+    organizar(manifesto, pdf, clientes)
+    info = os.stat(pdf)
+
+    os.utime(pdf, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+    assert manifesto.separar_pendentes([str(pdf)], str(clientes)) == ([], [str(pdf)])
+
+
+def test_original_removido_fica_pendente(manifesto, tmp_path, clientes):
+    pdf = pdf_de_entrada(tmp_path)
+    original = organizar(manifesto, pdf, clientes)
+
+    original.unlink()
+
+    assert manifesto.separar_pendentes([str(pdf)], str(clientes)) == ([str(pdf)], [])
+
+
+def test_outra_pasta_de_clientes_fica_pendente(manifesto, tmp_path, clientes):
+    pdf = pdf_de_entrada(tmp_path)
+    organizar(manifesto, pdf, clientes)
+
+    pendentes, _ = manifesto.separar_pendentes([str(pdf)], str(tmp_path / "outra"))
+
+    assert pendentes == [str(pdf)]
+
+
+@pytest.mark.parametrize(
+    "campos",
+    [{"erro": "falhou"}, {"erros": ["Erro ao gravar RG_CPF"]}, {"simulacao": True}],
+)
+def test_com_erro_ou_simulado_nao_e_registrado(manifesto, tmp_path, clientes, campos):
+    pdf = pdf_de_entrada(tmp_path)
+
+    organizar(manifesto, pdf, clientes, **campos)
+
+    assert manifesto.separar_pendentes([str(pdf)], str(clientes)) == ([str(pdf)], [])
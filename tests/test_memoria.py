@@ -0,0 +1,82 @@
+"""Orçamento de memória: espera por memória e cancelamento"""
+
+import threading
+import time
+
+import pytest
+
+from automacao.memoria import (
+    OrcamentoCompartilhado,
+    OrcamentoMemoria,
+    ReservaCancelada,
+    obter_orcamento,
+)
+from automacao.processamento import OpcoesProcessamento, processar_lote
+from benchmarks.gerador_pdfs import gerar_lote
+
+LIMITE_MB = 100
+
+
+def cancelar_depois(segundos):
+    cancelado = threading.Event()
+    threading.Timer(segundos, cancelado.set).start()
+    return cancelado
+
+
+@pytest.fixture(params=["processo", "compartilhado"])
+def orcamento(request, tmp_path):
+    if request.param == "processo":
+        return OrcamentoMemoria(LIMITE_MB)
+    return OrcamentoCompartilhado(LIMITE_MB, str(tmp_path))
+
+
+def test_reserva_que_cabe_nao_espera(orcamento):
+    assert orcamento.tentar_reservar(60)
+    assert not orcamento.tentar_reservar(60)
+    orcamento.liberar(60)
+    assert orcamento.reservar(60, threading.Event()) < 1
+
+
+def test_espera_cancelada(orcamento):
+    orcamento.reservar(LIMITE_MB)
+    inicio = time.perf_counter()
+
+    with pytest.raises(ReservaCancelada):
+        orcamento.reservar(10, cancelar_depois(0.3))
+
+    assert time.perf_counter() - inicio < 2
+    orcamento.liberar(LIMITE_MB)
+    assert orcamento.tentar_reservar(LIMITE_MB)
+
+
+@pytest.mark.parametrize(
+    "workers, em_etapas",
+    [(1, True), (1, False), (2, True)],
+    ids=["etapas", "sequencial", "pool"],
+)
+def test_lote_cancelado_enquanto_espera_memoria(tmp_path, workers, em_etapas):
+    caminhos = gerar_lote(str(tmp_path / "entrada"), arquivos=3, paginas=4)
+    # A memória inteira está com outra execução (outra vaga do trabalhador)
+    orcamento = obter_orcamento(LIMITE_MB)
+    orcamento.reservar(LIMITE_MB)
+    try:
+        opcoes = OpcoesProcessamento(
+            diretorio_cache=None, limite_memoria_mb=LIMITE_MB, em_etapas=em_etapas
+        )
+        inicio = time.perf_counter()
+
+        resultados = list(
+            processar_lote(
+                caminhos,
+                str(tmp_path / "clientes"),
+                workers=workers,
+                opcoes=opcoes,
+                cancelado=cancelar_depois(0.3),
+            )
+        )
+
+        assert resultados == []
+        assert time.perf_counter() - inicio < 5
+    finally:
+        orcamento.liberar(LIMITE_MB)
+    assert not (tmp_path / "clientes").exists()
@@ -0,0 +1,130 @@
+"""Plano dos documentos a partir da classificação das páginas"""
+
+from automacao.analise import PaginaAnalisada
+from automacao.classificador import TIPO_DESCONHECIDO, Classificacao
+from automacao.processamento import DOCUMENTOS_PRINCIPAIS
+from automacao.segmentacao import (
+    ORIGEM_CLASSIFICACAO,
+    ORIGEM_PERFIL_FIXO,
+    planejar_documentos,
+    segmentar,
+)
+
+
+def paginas(*tipos):
+    """Páginas a partir de (tipo, confiança), numeradas a partir de 1"""
+    return [
+        PaginaAnalisada(numero, "", Classificacao(tipo, confianca))
+        for numero, (tipo, confianca) in enumerate(tipos, 1)
+    ]
+
+
+def test_segmentos_interrompidos_por_pagina_desconhecida_ou_fraca():
+    segmentos = segmentar(
+        paginas(
+            ("RG_CPF", 1.0),
+            ("RG_CPF", 0.8),
+            (TIPO_DESCONHECIDO, 0.0),
+            ("RG_CPF", 1.0),
+            ("PROCURACAO", 0.1),
+        )
+    )
+
+    assert [(s.tipo, s.inicio, s.fim) for s in segmentos] == [
+        ("RG_CPF", 1, 2),
+        ("RG_CPF", 4, 4),
+    ]
+    assert segmentos[0].confianca == 0.9
+
+
+def test_sem_segmentos_usa_o_perfil_fixo_inteiro():
+    desconhecidas = paginas(*[(TIPO_DESCONHECIDO, 0.0)] * 12)
+
+    plano = planejar_documentos(desconhecidas, DOCUMENTOS_PRINCIPAIS)
+
+    assert plano.origem == ORIGEM_PERFIL_FIXO
+    assert plano.documentos == DOCUMENTOS_PRINCIPAIS
+
+
+def test_documento_nao_encontrado_usa_as_paginas_fixas_livres():
+    # Comprovante na página 11 (a do termo); o termo não foi encontrado
+    tipos = [(TIPO_DESCONHECIDO, 0.0)] * 12
+    tipos[0] = tipos[1] = ("RG_CPF", 1.0)
+    tipos[5] = ("CERTIDAO_NASCIMENTO", 1.0)
+    tipos[10] = ("COMPROVANTE_RESIDENCIA", 1.0)
+
+    plano = planejar_documentos(
+        paginas(*tipos), DOCUMENTOS_PRINCIPAIS, total_paginas=12
+    )
+
+    assert plano.documentos == {
+        "RG_CPF": [1, 2],
+        "CERTIDAO_NASCIMENTO": [6],
+        "COMPROVANTE_RESIDENCIA": [11],
+    }
+    assert "TERMO_REPRESENTACAO_INSS" not in plano.origens
+
+
+def test_paginas_fixas_alem_do_fim_do_pdf_ficam_de_fora():
+    plano = planejar_documentos(
+        paginas(("RG_CPF", 1.0), ("RG_CPF", 1.0), (TIPO_DESCONHECIDO, 0.0)),
+        DOCUMENTOS_PRINCIPAIS,
+        total_paginas=3,
+    )
+
+    assert plano.documentos == {"RG_CPF": [1, 2]}
+
+
+def test_documento_com_confianca_baixa_usa_as_paginas_fixas():
+    tipos = [(TIPO_DESCONHECIDO, 0.0)] * 12
+    tipos[2] = ("RG_CPF", 0.4)
+    tipos[5] = ("CERTIDAO_NASCIMENTO", 1.0)
+
+    plano = planejar_documentos(
+        paginas(*tipos), DOCUMENTOS_PRINCIPAIS, total_paginas=12
+    )
+
+    assert plano.documentos["RG_CPF"] == [1, 2]
+    assert plano.origens["RG_CPF"] == ORIGEM_PERFIL_FIXO
+    assert plano.origens["CERTIDAO_NASCIMENTO"] == ORIGEM_CLASSIFICACAO
+    assert plano.confiancas["RG_CPF"] == 0.4
+    assert plano.confianca == 1.0
+
+
+def test_confianca_baixa_sem_paginas_fixas_livres_mantem_a_classificacao():
+    # As páginas fixas do RG (1 e 2) são da certidão, classificada com confiança
+    plano = planejar_documentos(
+        paginas(
+            ("CERTIDAO_NASCIMENTO", 1.0),
+            ("CERTIDAO_NASCIMENTO", 1.0),
+            ("RG_CPF", 0.4),
+        ),
+        DOCUMENTOS_PRINCIPAIS,
+        total_paginas=3,
+    )
+
+    assert plano.documentos["RG_CPF"] == [3]
+    assert plano.origens["RG_CPF"] == ORIGEM_CLASSIFICACAO
+
+
+def test_outros_tipos_so_com_somente_perfil_desligado():
+    tipos = [("RG_CPF", 1.0), ("PROCURACAO", 1.0), ("PROCURACAO", 1.0)]
+
+    plano = planejar_documentos(paginas(*tipos), DOCUMENTOS_PRINCIPAIS, total_paginas=3)
+    extras = planejar_documentos(
+        paginas(*tipos), DOCUMENTOS_PRINCIPAIS, total_paginas=3, somente_perfil=False
+    )
+
+    assert list(plano.documentos) == ["RG_CPF"]
+    assert extras.documentos == {"RG_CPF": [1], "PROCURACAO": [2, 3]}
+
+
+def test_nome_do_documento_do_termo():
+    tipos = [(TIPO_DESCONHECIDO, 0.0)] * 10 + [("TERMO_REPRESENTACAO", 1.0)]
+
+    plano = planejar_documentos(
+        paginas(*tipos), DOCUMENTOS_PRINCIPAIS, total_paginas=11
+    )
+
+    assert plano.documentos["TERMO_REPRESENTACAO_INSS"] == [11]
+    assert plano.origens["TERMO_REPRESENTACAO_INSS"] == ORIGEM_CLASSIFICACAO